@@ -0,0 +1,291 @@
+"""Persistent Duration/Distance Matrix Store.
+
+Keeps travel-time and distance matrices between named locations on disk as
+memory-mapped float32 files, so they survive between runs and several worker
+processes can read one matrix without copying it. Adding N new locations to
+a store of M only requests the N x M, M x N and N x N blocks from OSRM; the
+existing M x M block is never recomputed. The store is tied to the processed
+map version and starts empty when the map changes.
+
+Layout of the store directory:
+
+- ``meta.json``: map version, size, capacity, location IDs and coordinates
+- ``durations.f32`` / ``distances.f32``: (capacity, capacity) row-major
+  matrices; only the leading (size, size) block is meaningful
+
+There must be a single writer process; within it, the store may be shared by
+threads, which are serialized by a lock. Readers open the store with
+``readonly=True`` and call ``refresh`` to pick up locations added since.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+from .notebooks.osrm import Coordinates, CoordinateArray, OSRMClient, TableMatrix
+
+_DTYPE = np.float32
+
+
+class MatrixStore:
+    """
+    Memory-mapped matrices keyed by location ID.
+
+    Args:
+        directory: Directory holding the store; created if missing
+        map_version: Version of the processed map, e.g. from
+            ``notebooks.osrm_hints.processed_map_version``; a store built for
+            another version is emptied
+        capacity: Locations to allocate room for when creating the store
+        readonly: Open the matrices read-only, for worker processes
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        map_version: str = "",
+        capacity: int = 1024,
+        readonly: bool = False
+    ):
+        self.directory = directory
+        self.map_version = map_version
+        self.readonly = readonly
+        # Guards growth and remapping of the memory maps against concurrent use
+        self._lock = threading.RLock()
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.coordinates = np.empty((0, 2))
+        self.capacity = 0
+        self._durations: Optional[np.memmap] = None
+        self._distances: Optional[np.memmap] = None
+
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+        meta = self._read_meta()
+        if meta is None or meta["map_version"] != map_version:
+            if readonly:
+                raise ValueError(f"No matrix store for map version {map_version!r} in {directory}")
+            self._allocate(max(1, capacity))
+            self._write_meta()
+        else:
+            self._load(meta)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self) -> Optional[Dict]:
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self) -> None:
+        # Readers only ever see a complete meta file
+        meta = {
+            "map_version": self.map_version,
+            "size": len(self.ids),
+            "capacity": self.capacity,
+            "ids": self.ids,
+            "coordinates": self.coordinates.tolist(),
+        }
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path("meta.json"))
+
+    def _open(self, name: str, capacity: int, mode: str) -> np.memmap:
+        return np.memmap(self._path(name), dtype=_DTYPE, mode=mode, shape=(capacity, capacity))
+
+    def _load(self, meta: Dict) -> None:
+        self.ids = list(meta["ids"])
+        self.index = {location: i for i, location in enumerate(self.ids)}
+        self.coordinates = np.asarray(meta["coordinates"], dtype=np.float64).reshape(-1, 2)
+        self.capacity = meta["capacity"]
+        mode = "r" if self.readonly else "r+"
+        self._durations = self._open("durations.f32", self.capacity, mode)
+        self._distances = self._open("distances.f32", self.capacity, mode)
+
+    def _allocate(self, capacity: int) -> None:
+        """Create empty matrix files, dropping every stored location."""
+        self.ids, self.index, self.coordinates = [], {}, np.empty((0, 2))
+        self.capacity = capacity
+        self._durations = self._open("durations.f32", capacity, "w+")
+        self._distances = self._open("distances.f32", capacity, "w+")
+
+    def _grow(self, needed: int) -> None:
+        """Reallocate the matrix files for at least ``needed`` locations, keeping stored values."""
+        capacity = max(needed, 2 * self.capacity)
+        size = len(self.ids)
+        for name, old in (("durations.f32", self._durations), ("distances.f32", self._distances)):
+            new = np.memmap(self._path(name + ".tmp"), dtype=_DTYPE, mode="w+", shape=(capacity, capacity))
+            new[:size, :size] = old[:size, :size]
+            new.flush()
+            del new
+        self._durations = self._distances = None
+        for name in ("durations.f32", "distances.f32"):
+            os.replace(self._path(name + ".tmp"), self._path(name))
+        self.capacity = capacity
+        self._durations = self._open("durations.f32", capacity, "r+")
+        self._distances = self._open("distances.f32", capacity, "r+")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, location: Hashable) -> bool:
+        return str(location) in self.index
+
+    @property
+    def durations(self) -> np.ndarray:
+        """Travel times in seconds between every stored location; a view of the memory map."""
+        with self._lock:
+            size = len(self.ids)
+            return self._durations[:size, :size]
+
+    @property
+    def distances(self) -> np.ndarray:
+        """Distances in meters between every stored location; a view of the memory map."""
+        with self._lock:
+            size = len(self.ids)
+            return self._distances[:size, :size]
+
+    def refresh(self) -> None:
+        """Reload locations written by the store's writer since this store was opened."""
+        with self._lock:
+            meta = self._read_meta()
+            if meta is None or meta["map_version"] != self.map_version:
+                raise ValueError(f"Matrix store in {self.directory} no longer matches map version {self.map_version!r}")
+            self._load(meta)
+
+    def add(
+        self,
+        ids: Sequence[Hashable],
+        coordinates: Coordinates,
+        client: OSRMClient,
+        tile_size: int = 50,
+        max_workers: int = 4
+    ) -> int:
+        """
+        Add locations, requesting only the matrix blocks that involve them.
+
+        IDs already stored at the same coordinates are skipped. An ID whose
+        coordinates changed keeps its slot, and its row and column are
+        recomputed.
+
+        Args:
+            ids: Location IDs, converted to strings
+            coordinates: Location of each ID
+            client: Client whose ``table_matrix`` fills the new blocks
+            tile_size: Tile size passed to ``table_matrix``
+            max_workers: Concurrent tiles passed to ``table_matrix``
+
+        Returns:
+            Number of locations added or updated
+        """
+        if self.readonly:
+            raise ValueError("Matrix store is read-only")
+        coordinates = CoordinateArray.coerce(coordinates)
+        if len(ids) != len(coordinates):
+            raise ValueError(f"Got {len(ids)} IDs for {len(coordinates)} coordinates")
+
+        with self._lock:
+            # Decide which slots need new rows and columns; the last duplicate wins
+            latest: Dict[str, np.ndarray] = dict(zip(map(str, ids), coordinates.data))
+            changed = [
+                location for location, coordinate in latest.items()
+                if location not in self.index or not np.array_equal(self.coordinates[self.index[location]], coordinate)
+            ]
+            if not changed:
+                return 0
+
+            # One coordinate list: fresh locations first, then the untouched ones.
+            # Both blocks are fetched before the store is touched, so a failed
+            # request leaves it as it was.
+            changed_set = set(changed)
+            stale = np.array([i for i, location in enumerate(self.ids) if location not in changed_set], dtype=np.int64)
+            fresh_coordinates = np.array([latest[location] for location in changed])
+            problem = np.concatenate((fresh_coordinates, self.coordinates[stale]))
+            n_fresh = len(changed)
+            fresh_rows = client.table_matrix(
+                problem, sources=list(range(n_fresh)), tile_size=tile_size, max_workers=max_workers
+            )
+            stale_rows = None
+            if len(stale):
+                stale_rows = client.table_matrix(
+                    problem,
+                    sources=list(range(n_fresh, len(problem))),
+                    destinations=list(range(n_fresh)),
+                    tile_size=tile_size,
+                    max_workers=max_workers
+                )
+
+            new_ids = [location for location in changed if location not in self.index]
+            size = len(self.ids)
+            if size + len(new_ids) > self.capacity:
+                self._grow(size + len(new_ids))
+            for location in new_ids:
+                self.index[location] = len(self.ids)
+                self.ids.append(location)
+            self.coordinates = np.concatenate((self.coordinates, np.empty((len(new_ids), 2))))
+            fresh = np.array([self.index[location] for location in changed])
+            self.coordinates[fresh] = fresh_coordinates
+            self._write(fresh, np.concatenate((fresh, stale)), fresh_rows)
+            if stale_rows is not None:
+                self._write(stale, fresh, stale_rows)
+
+            self._durations.flush()
+            self._distances.flush()
+            self._write_meta()
+            return n_fresh
+
+    def _write(self, rows: np.ndarray, cols: np.ndarray, matrix: TableMatrix) -> None:
+        block = np.ix_(rows, cols)
+        self._durations[block] = matrix.durations
+        self._distances[block] = matrix.distances
+
+    def matrix(self, ids: Sequence[Hashable]) -> TableMatrix:
+        """
+        Sub-matrices between stored locations.
+
+        Args:
+            ids: Location IDs; rows and columns follow this order
+
+        Returns:
+            Float64 copies of the (len(ids), len(ids)) blocks
+
+        Raises:
+            KeyError: If an ID is not stored
+        """
+        with self._lock:
+            idx = np.array([self.index[str(location)] for location in ids], dtype=np.int64)
+            block = np.ix_(idx, idx)
+            return TableMatrix(
+                durations=np.asarray(self._durations[block], dtype=np.float64),
+                distances=np.asarray(self._distances[block], dtype=np.float64)
+            )
+
+    def close(self) -> None:
+        """Flush and release the memory maps."""
+        with self._lock:
+            if not self.readonly and self._durations is not None:
+                self._durations.flush()
+                self._distances.flush()
+            self._durations = self._distances = None
+
+
+
+def coordinate_ids(coordinates: Coordinates, precision: int = 6) -> List[str]:
+    """
+    Location IDs derived from coordinates, for points without IDs of their own.
+
+    Args:
+        coordinates: Locations to name
+        precision: Decimal places kept; points closer than this share an ID
+
+    Returns:
+        ``"lon,lat"`` string per location
+    """
+    data = CoordinateArray.coerce(coordinates).data
+    return [f"{lon:.{precision}f},{lat:.{precision}f}" for lon, lat in data.tolist()]
@@ -8,11 +8,51 @@ References:
 - OSRM API Documentation: https://project-osrm.org/docs/v5.24.0/api/
 """
 
+import asyncio
 import enum
+import functools
+import hashlib
+import threading
+import time
 import typing
+import numpy as np
 import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Union, Tuple
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote
+from . import osrm_json, osrm_polyline
+from .osrm_backends import Backend, BackendPool
+from .osrm_cache import ResponseCache
+from .osrm_cassette import Cassette
+from .osrm_hints import HintStore
+from .osrm_metrics import ClientMetrics
+from typing import Any, Awaitable, Callable, Iterable, List, Dict, Optional, Sequence, Union, Tuple
+
+
+# Read size for streamed response bodies
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Services that accept per-coordinate ``hints``
+_HINTED_SERVICES = frozenset({"route", "table", "trip", "match"})
+
+
+class OSRMRequestError(RuntimeError):
+    """
+    An OSRM request failed.
+    
+    Attributes:
+        status_code (int, optional): HTTP status, None for network errors and timeouts
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def transient(self) -> bool:
+        """Whether retrying (possibly on another backend) may succeed."""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
 
 
 class OSRMProfile(str, enum.Enum):
@@ -55,24 +95,425 @@ class Coordinate:
         yield self.latitude
 
 
+class CoordinateArray:
+    """
+    Columnar array of coordinates backed by one contiguous NumPy buffer.
+    
+    Rows are ``(longitude, latitude)`` in float64, the order OSRM uses.
+    Slicing returns views that share the buffer, validation and hashing
+    work on the whole buffer at once, and iterating yields ``Coordinate``
+    objects so the array can stand in wherever a list of them is expected.
+    
+    Attributes:
+        data (np.ndarray): Array of shape (n, 2) holding lon, lat pairs
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data: Union[np.ndarray, Sequence[Sequence[float]]]):
+        array = np.asarray(data, dtype=np.float64)
+        if array.size == 0:
+            array = array.reshape(0, 2)
+        if array.ndim != 2 or array.shape[1] != 2:
+            raise ValueError(f"Expected an array of shape (n, 2), got {array.shape}")
+        self.data = array
+
+    @classmethod
+    def from_coordinates(cls, coordinates: Iterable[Coordinate]) -> "CoordinateArray":
+        """Build from ``Coordinate`` objects."""
+        coordinates = list(coordinates)
+        array = np.empty((len(coordinates), 2), dtype=np.float64)
+        array[:, 0] = [coord.longitude for coord in coordinates]
+        array[:, 1] = [coord.latitude for coord in coordinates]
+        return cls(array)
+
+    @classmethod
+    def from_latlon(cls, points: Union[np.ndarray, Sequence[Tuple[float, float]]]) -> "CoordinateArray":
+        """Build from ``(latitude, longitude)`` pairs as used by ``route_optimizer``."""
+        array = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return cls(np.ascontiguousarray(array[:, ::-1]))
+
+    @classmethod
+    def from_microdegrees(cls, array: np.ndarray) -> "CoordinateArray":
+        """Build from integer micro-degree ``(lon, lat)`` pairs."""
+        return cls(np.asarray(array, dtype=np.float64) / 1e6)
+
+    @classmethod
+    def coerce(cls, coordinates: "Coordinates") -> "CoordinateArray":
+        """
+        Accept any supported coordinate container.
+        
+        Args:
+            coordinates (Coordinates): ``CoordinateArray``, (n, 2) lon/lat
+                array, or a sequence of ``Coordinate`` objects or of
+                ``(lon, lat)`` pairs
+        
+        Returns:
+            CoordinateArray: The input itself when it already is one
+        """
+        if isinstance(coordinates, CoordinateArray):
+            return coordinates
+        if isinstance(coordinates, np.ndarray):
+            return cls(coordinates)
+        coordinates = list(coordinates)
+        if coordinates and not isinstance(coordinates[0], Coordinate):
+            return cls(coordinates)
+        return cls.from_coordinates(coordinates)
+
+    @property
+    def longitudes(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def latitudes(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            lon, lat = self.data[index]
+            return Coordinate(float(lon), float(lat))
+        return CoordinateArray(self.data[index])
+
+    def __iter__(self) -> typing.Iterator[Coordinate]:
+        for lon, lat in self.data.tolist():
+            yield Coordinate(lon, lat)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CoordinateArray):
+            return NotImplemented
+        return self.data.shape == other.data.shape and bool(np.array_equal(self.data, other.data))
+
+    def __hash__(self) -> int:
+        return hash(np.ascontiguousarray(self.data).tobytes())
+
+    def __repr__(self) -> str:
+        return f"CoordinateArray(n={len(self)})"
+
+    def invalid_mask(self) -> np.ndarray:
+        """Boolean mask of rows outside valid longitude/latitude ranges."""
+        lon, lat = self.longitudes, self.latitudes
+        return ~((lon >= -180) & (lon <= 180) & (lat >= -90) & (lat <= 90))
+
+    def to_latlon(self) -> np.ndarray:
+        """(n, 2) array of ``(latitude, longitude)`` pairs."""
+        return np.ascontiguousarray(self.data[:, ::-1])
+
+    def to_microdegrees(self) -> np.ndarray:
+        """(n, 2) int32 array of micro-degree ``(lon, lat)`` pairs."""
+        return np.rint(self.data * 1e6).astype(np.int32)
+
+    def to_coordinates(self) -> List[Coordinate]:
+        return list(self)
+
+
+# Any container accepted wherever the client takes a list of coordinates
+Coordinates = Union[Sequence[Coordinate], CoordinateArray, np.ndarray]
+
+
+@dataclass
+class TableMatrix:
+    """
+    Dense duration/distance matrices assembled from OSRM table responses.
+    
+    Unreachable pairs (``null`` in the OSRM response) are NaN.
+    
+    Attributes:
+        durations (np.ndarray): Travel times in seconds, shape (sources, destinations)
+        distances (np.ndarray): Travel distances in meters, same shape
+    """
+    durations: np.ndarray
+    distances: np.ndarray
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.durations.shape
+
+
+@dataclass
+class MatchedTrace:
+    """
+    Map-matched trace stitched together from windowed OSRM match responses.
+    
+    The matched geometry is one polyline; where the trace could not be
+    matched (or OSRM split the matching), the segment bridging the jump has
+    NaN duration and distance.
+    
+    Attributes:
+        coordinates (CoordinateArray): Matched geometry, one row per road node
+        durations (np.ndarray): Seconds for each geometry segment, length
+            ``len(coordinates) - 1``; NaN across gaps
+        distances (np.ndarray): Meters for each geometry segment; NaN across gaps
+        waypoints (np.ndarray): Index into ``coordinates`` of each trace
+            point's matched position, -1 where the point was not matched
+        confidence (np.ndarray): Mean matching confidence of each window
+    """
+    coordinates: CoordinateArray
+    durations: np.ndarray
+    distances: np.ndarray
+    waypoints: np.ndarray
+    confidence: np.ndarray
+
+    @property
+    def duration(self) -> float:
+        """Total matched travel time in seconds, excluding gaps."""
+        return float(np.nansum(self.durations))
+
+    @property
+    def distance(self) -> float:
+        """Total matched distance in meters, excluding gaps."""
+        return float(np.nansum(self.distances))
+
+    @property
+    def gaps(self) -> int:
+        """Number of unmatched jumps in the geometry."""
+        return int(np.count_nonzero(np.isnan(self.durations)))
+
+
+@dataclass(frozen=True)
+class _MatchedLeg:
+    """One leg of a window's matching, between trace points ``start`` and ``end``."""
+    start: int
+    end: int
+    nodes: np.ndarray
+    durations: np.ndarray
+    distances: np.ndarray
+
+
+@dataclass
+class CoalescingStats:
+    """
+    Counters for in-flight request deduplication.
+    
+    Attributes:
+        requests (int): Requests that reached the deduplication layer
+        coalesced (int): Requests that shared another caller's in-flight call
+    """
+    requests: int = 0
+    coalesced: int = 0
+
+    @property
+    def coalesced_rate(self) -> float:
+        """Fraction of requests that did not need their own call."""
+        return self.coalesced / self.requests if self.requests else 0.0
+
+
+@dataclass
+class _Flight:
+    """An in-flight call shared by every caller with the same key."""
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Thread-safe in-flight deduplication of identical calls.
+    
+    While a call for a key is running, other callers asking for the same key
+    wait for it and receive the same result (or exception) instead of
+    starting their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._stats = CoalescingStats()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` unless an identical call is already in flight.
+        
+        Args:
+            key (str): Identity of the call
+            fn (Callable[[], Any]): Call to run when this caller leads
+        
+        Returns:
+            Any: Result of the shared call
+        """
+        with self._lock:
+            self._stats.requests += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._stats.coalesced += 1
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> CoalescingStats:
+        """Copy of the deduplication counters."""
+        with self._lock:
+            return CoalescingStats(self._stats.requests, self._stats.coalesced)
+
+
+def _request_key(
+    service: str, 
+    profile: str, 
+    coordinates: "CoordinateArray", 
+    params: Optional[Dict], 
+    decoder: Optional[Callable] = None
+) -> str:
+    """Exact (unquantized) identity of a request within this process."""
+    digest = hashlib.sha1(np.ascontiguousarray(coordinates.data).tobytes())
+    digest.update(repr(sorted((params or {}).items())).encode())
+    if decoder is not None:
+        digest.update(repr(decoder).encode())
+    return f"{service}/{profile}/{digest.hexdigest()}"
+
+
+@dataclass(frozen=True)
+class _Outbound:
+    """A request ready to send to any backend."""
+    service: str
+    path: str
+    params: Dict
+    decoder: Optional[Callable[[Iterable[bytes]], Any]]
+    n_coordinates: int
+
+    @property
+    def cassette_key(self) -> str:
+        return Cassette.key(self.path, self.params)
+
+
 @dataclass
 class OSRMClient:
     """
     OSRM Client for making routing service requests.
+
+    Requests go through a persistent ``requests.Session`` whose keep-alive
+    connection pool is shared by every thread using the client, so one
+    client can serve a whole batch without reconnecting per call. Use the
+    client as a context manager (or call ``close``) to release the pool.
+    
+    Several osrm-routed servers can be given as a list of URLs (or a
+    ``BackendPool``). Requests then go to the healthy server with the fewest
+    outstanding requests, fail over once on network or server errors, and a
+    request slower than the pool's latency percentile is hedged with a
+    duplicate on another server; whichever answers first wins.
     
     Attributes:
-        base_url (str): Base URL of the OSRM service
+        base_url (Union[str, Sequence[str], BackendPool]): Base URL of the
+            OSRM service, or several for load balancing
         timeout (int, optional): Request timeout in seconds
+        pool_size (int, optional): Maximum keep-alive connections kept open
+            to each OSRM server; callers beyond this wait for a free one
+        cache (ResponseCache, optional): Response cache consulted before
+            every request
+        polyline_threshold (int, optional): Requests with more coordinates
+            than this send them as a ``polyline6(...)`` path segment instead
+            of ``lon,lat;...``; None always uses the plain format
+        coalesce (bool, optional): Share one HTTP call (and one parsed,
+            read-only result) between concurrent identical requests
+        hints (HintStore, optional): Snapping hints; when set, every location
+            is snapped once through ``nearest`` and later route/table/trip/match
+            requests send its stored hint so osrm-routed skips snapping it
+        hedge (bool, optional): Send hedged duplicates when several backends
+            are configured
+        metrics (ClientMetrics, optional): Records latency, bytes, coordinates,
+            errors and cache hits per service and backend
+        cassette (Cassette, optional): Records every response body in record
+            mode, bypassing cache lookups so the recording is complete; in
+            replay mode answers every request from the cassette without
+            contacting a server
     """
-    base_url: str
+    base_url: Union[str, Sequence[str], BackendPool]
     timeout: int = 30
+    pool_size: int = 10
+    cache: Optional[ResponseCache] = None
+    polyline_threshold: Optional[int] = 50
+    coalesce: bool = True
+    hints: Optional[HintStore] = None
+    hedge: bool = True
+    metrics: Optional[ClientMetrics] = None
+    cassette: Optional[Cassette] = None
+    backends: Optional[BackendPool] = field(default=None, init=False, repr=False)
+    _session: Optional[requests.Session] = field(default=None, init=False, repr=False)
+    _session_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _flights: SingleFlight = field(default_factory=SingleFlight, init=False, repr=False)
+    _hedge_executor: Optional[ThreadPoolExecutor] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if isinstance(self.base_url, BackendPool):
+            self.backends = self.base_url
+        elif not isinstance(self.base_url, str):
+            self.backends = BackendPool(self.base_url)
+        if self.backends is not None:
+            self.base_url = self.backends.backends[0].url
+            if len(self.backends) == 1:
+                self.backends = None
+
+    def __enter__(self) -> "OSRMClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        Pooled HTTP session, created on first use.
+        
+        Returns:
+            requests.Session: Session with a keep-alive pool of ``pool_size``
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=len(self.backends) if self.backends else 1,
+                        pool_maxsize=self.pool_size,
+                        pool_block=True
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def close(self) -> None:
+        """Close pooled connections. The client reconnects if used again."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            if self._hedge_executor is not None:
+                self._hedge_executor.shutdown(wait=False)
+                self._hedge_executor = None
+
+    def coalescing_stats(self) -> CoalescingStats:
+        """
+        How many requests shared another caller's in-flight call.
+        
+        Returns:
+            CoalescingStats: Counters since the client was created
+        """
+        return self._flights.stats()
 
     def _request(
         self, 
         service: str, 
         profile: OSRMProfile, 
-        coordinates: List[Coordinate], 
-        params: Optional[Dict] = None
+        coordinates: Coordinates, 
+        params: Optional[Dict] = None,
+        decoder: Optional[Callable[[Iterable[bytes]], Any]] = None
     ) -> Dict:
         """
         Make a generic request to OSRM service.
@@ -80,36 +521,240 @@ class OSRMClient:
         Args:
             service (str): OSRM service endpoint
             profile (OSRMProfile): Routing profile
-            coordinates (List[Coordinate]): Coordinates for the request
+            coordinates (Coordinates): Coordinates for the request
             params (Dict, optional): Additional query parameters
+            decoder (Callable, optional): Consumes the streamed response body
+                chunk by chunk; the whole body is decoded as JSON by default
         
         Returns:
             Dict: JSON response from OSRM
         
         Raises:
             requests.RequestException: For network or API errors
+            CassetteMiss: When replaying a request that was never recorded
         """
-        # Validate coordinates
+        # Validate coordinates in one vectorized pass
+        coordinates = CoordinateArray.coerce(coordinates)
         validate_coordinates(coordinates)
         
-        # Convert coordinates to semicolon-separated string of lon,lat
-        coords_str = ";".join(f"{coord.longitude},{coord.latitude}" for coord in coordinates)
+        # Serve repeated requests from the cache; a recording cassette must
+        # see every request, so the cache is then only written to
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(service, profile.value, coordinates.data, params)
+            if self.cassette is None or not self.cassette.recording:
+                cached = self.cache.get(cache_key)
+                if self.metrics is not None:
+                    self.metrics.record_cache(service, cached is not None)
+                if cached is not None:
+                    return cached
         
-        # Construct URL with path parameters
-        url = f"{self.base_url}/{service}/v1/{profile.value}/{coords_str}"
+        def fetch() -> Dict:
+            result = self._fetch(service, profile, coordinates, params, decoder)
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
+            return result
         
+        # Concurrent identical requests share a single call
+        if self.coalesce:
+            key = _request_key(service, profile.value, coordinates, params, decoder)
+            return self._flights.do(key, fetch)
+        return fetch()
+
+    def _fetch(
+        self, 
+        service: str, 
+        profile: OSRMProfile, 
+        coordinates: CoordinateArray, 
+        params: Optional[Dict], 
+        decoder: Optional[Callable[[Iterable[bytes]], Any]]
+    ) -> Dict:
+        """Send one request, balanced over the backends if there are several."""
+        coords_str = self._format_coordinates(coordinates)
+        
+        # Construct URL path with path parameters
+        path = f"/{service}/v1/{profile.value}/{coords_str}"
+        
+        # Merge default and additional parameters
+        request_params = dict(params or {})
+        replaying = self.cassette is not None and self.cassette.replaying
+        if (
+            self.hints is not None 
+            and not replaying 
+            and service in _HINTED_SERVICES 
+            and "hints" not in request_params
+        ):
+            hints = self._hints_for(profile, coordinates)
+            if any(hints):
+                request_params["hints"] = ";".join(hints)
+        
+        outbound = _Outbound(service, path, request_params, decoder, len(coordinates))
+        if replaying:
+            return self._replay(outbound)
+        if self.backends is None:
+            return self._send(self.base_url, outbound)
+        return self._send_balanced(outbound)
+
+    def _send(self, base_url: str, outbound: "_Outbound") -> Dict:
+        """Send one request over the pooled session, decode the response and record metrics."""
+        start = time.perf_counter()
+        response_bytes = 0
+        body = bytearray() if self.cassette is not None and self.cassette.recording else None
+        
+        def counted(chunks: Iterable[bytes]) -> typing.Iterator[bytes]:
+            nonlocal response_bytes
+            for chunk in chunks:
+                response_bytes += len(chunk)
+                if body is not None:
+                    body.extend(chunk)
+                yield chunk
+        
+        error = None
+        request_url = base_url + outbound.path
         try:
-            # Merge default and additional parameters
-            request_params = params or {}
-            response = requests.get(url, params=request_params, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
+            response = self.session.get(
+                base_url + outbound.path, 
+                params=outbound.params, 
+                timeout=self.timeout, 
+                stream=outbound.decoder is not None
+            )
+            # Streamed responses hold their pooled connection until closed,
+            # including when the decoder gives up part way through
+            with response:
+                request_url = response.request.url
+                if outbound.decoder is not None and response.ok:
+                    result = outbound.decoder(counted(response.iter_content(chunk_size=_STREAM_CHUNK_SIZE)))
+                    if body is not None:
+                        self.cassette.record(outbound.cassette_key, response.status_code, bytes(body))
+                    return result
+                response_bytes = len(response.content)
+                if body is not None:
+                    self.cassette.record(outbound.cassette_key, response.status_code, response.content)
+                response.raise_for_status()
+                return osrm_json.loads(response.content)
         except requests.RequestException as e:
-            raise RuntimeError(f"OSRM API request failed: {e}") from e
+            status = e.response.status_code if e.response is not None else None
+            error = str(status) if status is not None else "network"
+            raise OSRMRequestError(f"OSRM API request failed: {e}", status) from e
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_request(
+                    outbound.service, 
+                    base_url, 
+                    time.perf_counter() - start, 
+                    len(request_url), 
+                    response_bytes, 
+                    outbound.n_coordinates, 
+                    error
+                )
+
+    def _replay(self, outbound: "_Outbound") -> Dict:
+        """Answer a request from the cassette, decoding it as a live response would be."""
+        status, body = self.cassette.play(outbound.cassette_key)
+        if status >= 400:
+            raise OSRMRequestError(f"OSRM API request failed: {status} (replayed)", status)
+        if outbound.decoder is not None:
+            return outbound.decoder([body])
+        return osrm_json.loads(body)
+
+    def _send_to(self, backend: Backend, outbound: "_Outbound") -> Dict:
+        """Send to an acquired backend and report the outcome to the pool."""
+        start = time.perf_counter()
+        try:
+            result = self._send(backend.url, outbound)
+        except OSRMRequestError as e:
+            # Only network and server errors count against the backend
+            self.backends.release(backend, None, False if e.transient else None)
+            raise
+        except BaseException:
+            self.backends.release(backend, None, None)
+            raise
+        self.backends.release(backend, time.perf_counter() - start, True)
+        return result
+
+    def _send_balanced(self, outbound: "_Outbound") -> Dict:
+        """
+        Send to the least-loaded backend, hedging slow requests and failing
+        over once on transient errors.
+        """
+        tried: List[str] = []
+        last_error: Optional[OSRMRequestError] = None
+        while len(tried) < min(2, len(self.backends)):
+            backend = self.backends.acquire(exclude=tried)
+            if backend is None:
+                break
+            tried.append(backend.url)
+            try:
+                return self._send_hedged(backend, tried, outbound)
+            except OSRMRequestError as e:
+                if not e.transient:
+                    raise
+                last_error = e
+        raise last_error
+
+    def _send_hedged(self, backend: Backend, tried: List[str], outbound: "_Outbound") -> Dict:
+        """Send to ``backend``; past the hedge delay, race a duplicate on another backend."""
+        delay = self.backends.hedge_delay() if self.hedge else None
+        if delay is None:
+            return self._send_to(backend, outbound)
+        
+        executor = self._hedger()
+        pending = {executor.submit(self._send_to, backend, outbound)}
+        done, pending = wait(pending, timeout=delay)
+        if not done:
+            second = self.backends.acquire(exclude=tried)
+            if second is not None:
+                tried.append(second.url)
+                self.backends.record_hedge()
+                pending.add(executor.submit(self._send_to, second, outbound))
+        
+        # First success wins; the slower request finishes in the background
+        error: Optional[BaseException] = None
+        while done or pending:
+            for future in done:
+                try:
+                    return future.result()
+                except OSRMRequestError as e:
+                    error = e
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        raise error
+
+    def _hedger(self) -> ThreadPoolExecutor:
+        """Worker pool that runs hedged request pairs."""
+        if self._hedge_executor is None:
+            with self._session_lock:
+                if self._hedge_executor is None:
+                    self._hedge_executor = ThreadPoolExecutor(
+                        max_workers=2 * self.pool_size * len(self.backends),
+                        thread_name_prefix="osrm-hedge"
+                    )
+        return self._hedge_executor
+
+    def _format_coordinates(self, coordinates: CoordinateArray) -> str:
+        """
+        Format coordinates for the URL path.
+        
+        Long coordinate lists are polyline6-encoded, which is several times
+        shorter than ``lon,lat;lon,lat`` and keeps micro-degree precision.
+        
+        Args:
+            coordinates (CoordinateArray): Coordinates for the request
+        
+        Returns:
+            str: Path segment understood by osrm-routed
+        """
+        if self.polyline_threshold is not None and len(coordinates) > self.polyline_threshold:
+            encoded = encode_polyline(coordinates, precision=6)
+            return f"polyline6({quote(encoded, safe='')})"
+        
+        # Semicolon-separated string of lon,lat
+        return ";".join(f"{lon},{lat}" for lon, lat in coordinates.data.tolist())
 
     def route(
         self, 
-        coordinates: List[Coordinate],
+        coordinates: Coordinates,
         *,
         profile: OSRMProfile = OSRMProfile.DRIVING,
         alternatives: bool = False,
@@ -122,7 +767,7 @@ class OSRMClient:
         Request route between multiple coordinates.
         
         Args:
-            coordinates (List[Coordinate]): Sequence of coordinates to route through
+            coordinates (Coordinates): Sequence of coordinates to route through
             profile (OSRMProfile, optional): Routing profile
             alternatives (bool, optional): Request alternative routes
             steps (bool, optional): Include step information
@@ -163,50 +808,209 @@ class OSRMClient:
         params = {"number": number}
         return self._request("nearest", profile, [coordinate], params)
 
+    def snap(
+        self, 
+        coordinates: Coordinates, 
+        *, 
+        profile: OSRMProfile = OSRMProfile.DRIVING,
+        max_workers: int = 4
+    ) -> CoordinateArray:
+        """
+        Snap locations to the road network once and remember their hints.
+        
+        Locations already in the hint store are not requested again, nor are
+        locations OSRM failed to snap within the store's ``failure_ttl``.
+        Requires ``hints`` to be set.
+        
+        Args:
+            coordinates (Coordinates): Locations to snap
+            profile (OSRMProfile, optional): Routing profile
+            max_workers (int, optional): Concurrent ``nearest`` requests for new locations
+        
+        Returns:
+            CoordinateArray: Snapped position of each location (NaN where
+            OSRM found no road)
+        """
+        if self.hints is None:
+            raise ValueError("snap requires a HintStore; set OSRMClient.hints")
+        coordinates = CoordinateArray.coerce(coordinates)
+        known = self.hints.lookup(profile.value, coordinates.data)
+        failed = self.hints.failed(profile.value, coordinates.data)
+        missing = [i for i, hint in enumerate(known) if hint is None and not failed[i]]
+        
+        def nearest_waypoint(i: int) -> Optional[Dict]:
+            """First waypoint; {} if OSRM found no road, None after a transient error."""
+            try:
+                waypoints = self.nearest(coordinates[i], profile=profile).get("waypoints") or []
+            except OSRMRequestError as e:
+                return None if e.transient else {}
+            return waypoints[0] if waypoints else {}
+        
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as executor:
+                waypoints = list(executor.map(nearest_waypoint, missing))
+            found = [(i, wp) for i, wp in zip(missing, waypoints) if wp and wp.get("hint")]
+            if found:
+                self.hints.put_many(
+                    profile.value,
+                    coordinates.data[[i for i, _ in found]],
+                    [wp["hint"] for _, wp in found],
+                    np.array([wp["location"] for _, wp in found], dtype=np.float64)
+                )
+            unsnapped = [i for i, wp in zip(missing, waypoints) if wp is not None and not wp.get("hint")]
+            if unsnapped:
+                self.hints.put_failures(profile.value, coordinates.data[unsnapped])
+        
+        return CoordinateArray(self.hints.snapped(profile.value, coordinates.data))
+
+    def _hints_for(self, profile: OSRMProfile, coordinates: CoordinateArray) -> List[str]:
+        """Stored hints for a request, snapping new locations first; empty where unknown."""
+        hints = self.hints.lookup(profile.value, coordinates.data)
+        if None in hints:
+            self.snap(coordinates, profile=profile)
+            hints = self.hints.lookup(profile.value, coordinates.data)
+        return [hint or "" for hint in hints]
+
     def table(
         self, 
-        coordinates: List[Coordinate], 
+        coordinates: Coordinates, 
         *, 
         profile: OSRMProfile = OSRMProfile.DRIVING,
         sources: Optional[List[int]] = None,
-        destinations: Optional[List[int]] = None
+        destinations: Optional[List[int]] = None,
+        annotations: Optional[Tuple[str, ...]] = None
     ) -> Dict:
         """
         Compute distance/duration table between coordinates.
         
         Args:
-            coordinates (List[Coordinate]): Coordinates to compute table for
+            coordinates (Coordinates): Coordinates to compute table for
             profile (OSRMProfile, optional): Routing profile
             sources (List[int], optional): Indices of source coordinates
             destinations (List[int], optional): Indices of destination coordinates
+            annotations (Tuple[str, ...], optional): Matrices to return,
+                any of "duration" and "distance" (OSRM default: duration)
         
         Returns:
             Dict: Distance/duration matrix
         """
+        params = self._table_params(sources, destinations, annotations)
+        return self._request("table", profile, coordinates, params)
+
+    @staticmethod
+    def _table_params(
+        sources: Optional[List[int]], 
+        destinations: Optional[List[int]], 
+        annotations: Optional[Tuple[str, ...]]
+    ) -> Dict:
+        """Query parameters for the table service."""
         params = {}
         if sources is not None:
             params["sources"] = ";".join(map(str, sources))
         if destinations is not None:
             params["destinations"] = ";".join(map(str, destinations))
+        if annotations is not None:
+            params["annotations"] = ",".join(annotations)
+        return params
+
+    def table_matrix(
+        self, 
+        coordinates: Coordinates, 
+        *, 
+        profile: OSRMProfile = OSRMProfile.DRIVING,
+        sources: Optional[List[int]] = None,
+        destinations: Optional[List[int]] = None,
+        tile_size: int = 50,
+        max_workers: int = 4
+    ) -> TableMatrix:
+        """
+        Compute a duration and distance matrix of any size in tiles.
         
-        return self._request("table", profile, coordinates, params)
+        The sources x destinations problem is split into tiles of at most
+        ``tile_size`` sources and ``tile_size`` destinations, so each request
+        carries at most ``2 * tile_size`` coordinates and stays under
+        osrm-routed's ``--max-table-size`` (100 by default). Tiles are
+        requested in parallel with ``annotations=duration,distance``; each
+        response body is streamed and parsed row by row into preallocated
+        arrays without building nested lists, then copied into the result.
+        
+        Args:
+            coordinates (Coordinates): All coordinates in the problem
+            profile (OSRMProfile, optional): Routing profile
+            sources (List[int], optional): Indices of source coordinates (default: all)
+            destinations (List[int], optional): Indices of destination coordinates (default: all)
+            tile_size (int, optional): Maximum sources and destinations per request
+            max_workers (int, optional): Tiles requested concurrently
+        
+        Returns:
+            TableMatrix: Matrices of shape (len(sources), len(destinations))
+        """
+        if tile_size < 1:
+            raise ValueError("tile_size must be at least 1")
+        coordinates = CoordinateArray.coerce(coordinates)
+        source_idx = list(range(len(coordinates))) if sources is None else list(sources)
+        destination_idx = list(range(len(coordinates))) if destinations is None else list(destinations)
+        
+        durations = np.full((len(source_idx), len(destination_idx)), np.nan)
+        distances = np.full((len(source_idx), len(destination_idx)), np.nan)
+        
+        def fetch_tile(row: int, col: int) -> None:
+            tile_sources = source_idx[row:row + tile_size]
+            tile_destinations = destination_idx[col:col + tile_size]
+            
+            # Send each distinct coordinate once, even where the tile
+            # sources and destinations overlap (diagonal tiles)
+            positions: Dict[int, int] = {}
+            for idx in tile_sources + tile_destinations:
+                positions.setdefault(idx, len(positions))
+            
+            params = self._table_params(
+                [positions[idx] for idx in tile_sources],
+                [positions[idx] for idx in tile_destinations],
+                ("duration", "distance")
+            )
+            shape = (len(tile_sources), len(tile_destinations))
+            response = self._request(
+                "table", profile, coordinates[list(positions)], params,
+                decoder=functools.partial(osrm_json.parse_table_stream, shape=shape)
+            )
+            rows = slice(row, row + shape[0])
+            cols = slice(col, col + shape[1])
+            # Cached responses read back from disk hold lists rather than arrays
+            durations[rows, cols] = np.asarray(response["durations"], dtype=np.float64)
+            distances[rows, cols] = np.asarray(response["distances"], dtype=np.float64)
+        
+        tiles = [
+            (row, col) 
+            for row in range(0, len(source_idx), tile_size) 
+            for col in range(0, len(destination_idx), tile_size)
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tiles)))) as executor:
+            # list() re-raises the first tile failure
+            list(executor.map(lambda tile: fetch_tile(*tile), tiles))
+        
+        return TableMatrix(durations=durations, distances=distances)
 
     def match(
         self, 
-        coordinates: List[Coordinate], 
+        coordinates: Coordinates, 
         *, 
         profile: OSRMProfile = OSRMProfile.DRIVING,
         timestamps: Optional[List[int]] = None,
-        geometry: OSRMGeometry = OSRMGeometry.POLYLINE
+        geometry: OSRMGeometry = OSRMGeometry.POLYLINE,
+        overview: Optional[OSRMOverview] = None,
+        annotations: bool = False
     ) -> Dict:
         """
         Match GPS trace to road network.
         
         Args:
-            coordinates (List[Coordinate]): GPS trace coordinates
+            coordinates (Coordinates): GPS trace coordinates
             profile (OSRMProfile, optional): Routing profile
             timestamps (List[int], optional): Timestamps for each coordinate
             geometry (OSRMGeometry, optional): Geometry encoding format
+            overview (OSRMOverview, optional): Geometry detail (OSRM default if omitted)
+            annotations (bool, optional): Include per-segment leg annotations
         
         Returns:
             Dict: Matched route response
@@ -214,12 +1018,84 @@ class OSRMClient:
         params = {"geometries": geometry.value}
         if timestamps is not None:
             params["timestamps"] = ";".join(map(str, timestamps))
+        if overview is not None:
+            params["overview"] = overview.value
+        if annotations:
+            params["annotations"] = "duration,distance"
         
         return self._request("match", profile, coordinates, params)
 
+    def match_trace(
+        self, 
+        coordinates: Coordinates, 
+        *, 
+        profile: OSRMProfile = OSRMProfile.DRIVING,
+        timestamps: Optional[Sequence[int]] = None,
+        window: int = 100,
+        overlap: int = 10,
+        max_workers: int = 4
+    ) -> MatchedTrace:
+        """
+        Map-match a trace of any length in overlapping windows.
+        
+        The trace is split into windows of at most ``window`` points, each
+        sharing ``overlap`` points with the next, so every request stays under
+        osrm-routed's ``--max-matching-size``. Windows are matched in parallel
+        with full geometry and per-segment annotations. Each window owns the
+        legs that start in its core (its range minus half of each overlap),
+        which keeps the matching away from window edges, where it has the
+        least context; owned legs are then concatenated in trace order.
+        
+        Args:
+            coordinates (Coordinates): GPS trace coordinates
+            profile (OSRMProfile, optional): Routing profile
+            timestamps (Sequence[int], optional): Timestamp of each coordinate
+            window (int, optional): Maximum trace points per request
+            overlap (int, optional): Trace points shared by neighbouring windows
+            max_workers (int, optional): Windows matched concurrently
+        
+        Returns:
+            MatchedTrace: Stitched geometry with per-segment durations and distances
+        """
+        if window < 2 or not 0 <= overlap < window - 1:
+            raise ValueError("window must be at least 2 and overlap in [0, window - 1)")
+        coordinates = CoordinateArray.coerce(coordinates)
+        n = len(coordinates)
+        if n < 2:
+            raise ValueError("A trace needs at least two coordinates")
+        
+        step = window - overlap
+        starts = list(range(0, max(n - overlap, 1), step))
+        if n - starts[-1] < 2:
+            # Without overlap the last window could hold a single point
+            starts[-1] -= 1
+        bounds = [(start, min(start + window, n)) for start in starts]
+        # Core boundaries sit in the middle of each overlap
+        cores = [0] + [start + overlap // 2 for start in starts[1:]] + [n]
+        
+        def match_window(i: int) -> Tuple[List[_MatchedLeg], float]:
+            start, end = bounds[i]
+            response = self.match(
+                coordinates[start:end], 
+                profile=profile,
+                timestamps=None if timestamps is None else list(timestamps[start:end]),
+                geometry=OSRMGeometry.POLYLINE6,
+                overview=OSRMOverview.FULL,
+                annotations=True
+            )
+            legs = _window_legs(response, start, cores[i], cores[i + 1])
+            confidences = [m.get("confidence", np.nan) for m in response.get("matchings", [])]
+            return legs, float(np.mean(confidences)) if confidences else np.nan
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(bounds)))) as executor:
+            results = list(executor.map(match_window, range(len(bounds))))
+        
+        legs = sorted((leg for window_legs, _ in results for leg in window_legs), key=lambda leg: leg.start)
+        return _stitch_legs(legs, n, np.array([confidence for _, confidence in results]))
+
     def trip(
         self, 
-        coordinates: List[Coordinate], 
+        coordinates: Coordinates, 
         *, 
         profile: OSRMProfile = OSRMProfile.DRIVING,
         source: str = "first",
@@ -231,7 +1107,7 @@ class OSRMClient:
         Compute the shortest trip through all given coordinates.
         
         Args:
-            coordinates (List[Coordinate]): Coordinates to visit
+            coordinates (Coordinates): Coordinates to visit
             profile (OSRMProfile, optional): Routing profile
             source (str, optional): Start point strategy
             destination (str, optional): End point strategy
@@ -250,11 +1126,284 @@ class OSRMClient:
         return self._request("trip", profile, coordinates, params)
 
 
+def _window_legs(response: Dict, offset: int, core_start: int, core_end: int) -> List[_MatchedLeg]:
+    """
+    Legs of a windowed match response that start inside the window's core.
+    
+    Leg ``k`` of a matching joins its waypoints ``k`` and ``k + 1``; the
+    matching's full geometry is the legs' nodes chained end to end, so the
+    per-leg annotation lengths say where each leg's nodes lie in it.
+    """
+    matchings = response.get("matchings") or []
+    waypoint_trace: Dict[Tuple[int, int], int] = {}
+    for i, tracepoint in enumerate(response.get("tracepoints") or []):
+        if tracepoint is not None:
+            waypoint_trace[(tracepoint["matchings_index"], tracepoint["waypoint_index"])] = offset + i
+    
+    legs = []
+    for m, matching in enumerate(matchings):
+        nodes = osrm_polyline.decode_array(matching["geometry"], 6)
+        node = 0
+        for k, leg in enumerate(matching["legs"]):
+            annotation = leg["annotation"]
+            durations = np.asarray(annotation["duration"], dtype=np.float64)
+            segments = len(durations)
+            start, end = waypoint_trace.get((m, k)), waypoint_trace.get((m, k + 1))
+            if start is not None and end is not None and core_start <= start < core_end:
+                legs.append(_MatchedLeg(
+                    start, 
+                    end, 
+                    nodes[node:node + segments + 1], 
+                    durations, 
+                    np.asarray(annotation["distance"], dtype=np.float64)
+                ))
+            node += segments
+    return legs
+
+
+def _stitch_legs(legs: List[_MatchedLeg], n_points: int, confidence: np.ndarray) -> MatchedTrace:
+    """Chain legs sorted by start into one geometry, bridging jumps with NaN segments."""
+    nodes: List[np.ndarray] = []
+    durations: List[np.ndarray] = []
+    distances: List[np.ndarray] = []
+    waypoints = np.full(n_points, -1, dtype=np.int64)
+    n_nodes = 0
+    last_end = -1
+    for leg in legs:
+        if leg.start < last_end:
+            # A window edge matched past the next window's first leg; keep the earlier one
+            continue
+        if leg.start == last_end:
+            leg_nodes = leg.nodes[1:]
+        else:
+            if n_nodes:
+                durations.append(np.array([np.nan]))
+                distances.append(np.array([np.nan]))
+            leg_nodes = leg.nodes
+            waypoints[leg.start] = n_nodes
+        nodes.append(leg_nodes)
+        durations.append(leg.durations)
+        distances.append(leg.distances)
+        n_nodes += len(leg_nodes)
+        waypoints[leg.end] = n_nodes - 1
+        last_end = leg.end
+    
+    return MatchedTrace(
+        coordinates=CoordinateArray(np.concatenate(nodes) if nodes else np.empty((0, 2))),
+        durations=np.concatenate(durations) if durations else np.empty(0),
+        distances=np.concatenate(distances) if distances else np.empty(0),
+        waypoints=waypoints,
+        confidence=confidence,
+    )
+
+
+@dataclass
+class AsyncOSRMClient:
+    """
+    Awaitable OSRM client with bounded concurrency.
+    
+    Mirrors the service methods of ``OSRMClient``. Each call runs on a
+    dedicated thread pool over a pooled ``OSRMClient``, so at most
+    ``max_concurrency`` requests are in flight per client while the event
+    loop stays free to schedule the rest. Identical calls awaited at the
+    same time share one worker slot and one result.
+    
+    Attributes:
+        base_url (str): Base URL of the OSRM service
+        timeout (int, optional): Request timeout in seconds
+        max_concurrency (int, optional): Maximum requests in flight at once
+        client (OSRMClient, optional): Existing client to share; one sized
+            to ``max_concurrency`` is created when omitted
+    """
+    base_url: str = ""
+    timeout: int = 30
+    max_concurrency: int = 16
+    client: Optional[OSRMClient] = None
+    _executor: Optional[ThreadPoolExecutor] = field(default=None, init=False, repr=False)
+    _owns_client: bool = field(default=False, init=False, repr=False)
+    _inflight: Dict[str, "asyncio.Future"] = field(default_factory=dict, init=False, repr=False)
+    _stats: CoalescingStats = field(default_factory=CoalescingStats, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if self.client is None:
+            if not self.base_url:
+                raise ValueError("Either base_url or client is required")
+            self.client = OSRMClient(
+                self.base_url, timeout=self.timeout, pool_size=self.max_concurrency
+            )
+            self._owns_client = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="osrm"
+        )
+
+    async def __aenter__(self) -> "AsyncOSRMClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Stop the worker pool and close connections owned by this client."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._owns_client and self.client is not None:
+            self.client.close()
+
+    def coalescing_stats(self) -> CoalescingStats:
+        """
+        How many awaited calls shared another caller's in-flight call.
+        
+        Requests coalesced further down, in the wrapped client, are reported
+        by ``client.coalescing_stats()``.
+        
+        Returns:
+            CoalescingStats: Counters since the client was created
+        """
+        return CoalescingStats(self._stats.requests, self._stats.coalesced)
+
+    async def _call(self, method: Callable[..., Dict], *args: Any, **kwargs: Any) -> Dict:
+        """Run a blocking client method on the bounded worker pool, deduplicating identical calls."""
+        if self._executor is None:
+            raise RuntimeError("AsyncOSRMClient is closed")
+        
+        key = self._call_key(method, args, kwargs)
+        self._stats.requests += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self._stats.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._executor, functools.partial(method, *args, **kwargs)
+            )
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one cancelled caller does not cancel the shared call
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _call_key(method: Callable, args: Tuple, kwargs: Dict) -> str:
+        """Identity of a client call from its method, coordinates and options."""
+        digest = hashlib.sha1(method.__name__.encode())
+        for arg in args:
+            coordinates = CoordinateArray.coerce([arg] if isinstance(arg, Coordinate) else arg)
+            digest.update(np.ascontiguousarray(coordinates.data).tobytes())
+        for name, value in sorted(kwargs.items()):
+            digest.update(f"{name}=".encode())
+            AsyncOSRMClient._digest_value(digest, value)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _digest_value(digest: Any, value: Any) -> None:
+        """
+        Feed an option value into a call digest.
+
+        Arrays are hashed by dtype, shape and content; their ``repr`` elides
+        the middle of large arrays, so different arrays could share a key.
+        """
+        if isinstance(value, CoordinateArray):
+            value = value.data
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            digest.update(f"ndarray[{value.dtype.str}{value.shape}]".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            digest.update(f"{type(value).__name__}[{len(value)}](".encode())
+            for item in value:
+                AsyncOSRMClient._digest_value(digest, item)
+            digest.update(b")")
+        elif isinstance(value, dict):
+            digest.update(f"dict[{len(value)}](".encode())
+            for key, item in sorted(value.items(), key=lambda pair: repr(pair[0])):
+                digest.update(f"{key!r}:".encode())
+                AsyncOSRMClient._digest_value(digest, item)
+            digest.update(b")")
+        else:
+            digest.update(f"{value!r};".encode())
+
+    async def route(self, coordinates: Coordinates, **kwargs: Any) -> Dict:
+        """Awaitable ``OSRMClient.route``; accepts the same keyword options."""
+        return await self._call(self.client.route, coordinates, **kwargs)
+
+    async def nearest(self, coordinate: Coordinate, **kwargs: Any) -> Dict:
+        """Awaitable ``OSRMClient.nearest``; accepts the same keyword options."""
+        return await self._call(self.client.nearest, coordinate, **kwargs)
+
+    async def table(self, coordinates: Coordinates, **kwargs: Any) -> Dict:
+        """Awaitable ``OSRMClient.table``; accepts the same keyword options."""
+        return await self._call(self.client.table, coordinates, **kwargs)
+
+    async def table_matrix(self, coordinates: Coordinates, **kwargs: Any) -> TableMatrix:
+        """Awaitable ``OSRMClient.table_matrix``; accepts the same keyword options."""
+        return await self._call(self.client.table_matrix, coordinates, **kwargs)
+
+    async def match(self, coordinates: Coordinates, **kwargs: Any) -> Dict:
+        """Awaitable ``OSRMClient.match``; accepts the same keyword options."""
+        return await self._call(self.client.match, coordinates, **kwargs)
+
+    async def match_trace(self, coordinates: Coordinates, **kwargs: Any) -> MatchedTrace:
+        """Awaitable ``OSRMClient.match_trace``; accepts the same keyword options."""
+        return await self._call(self.client.match_trace, coordinates, **kwargs)
+
+    async def trip(self, coordinates: Coordinates, **kwargs: Any) -> Dict:
+        """Awaitable ``OSRMClient.trip``; accepts the same keyword options."""
+        return await self._call(self.client.trip, coordinates, **kwargs)
+
+    async def gather(
+        self, 
+        calls: Iterable[Awaitable[Dict]], 
+        *, 
+        return_exceptions: bool = False
+    ) -> List[Union[Dict, BaseException]]:
+        """
+        Await many requests concurrently, keeping results in input order.
+        
+        Concurrency is still capped by ``max_concurrency``; extra calls queue
+        until a worker is free.
+        
+        Args:
+            calls (Iterable[Awaitable[Dict]]): Pending client calls,
+                e.g. ``[client.route(c) for c in batches]``
+            return_exceptions (bool, optional): Return failures in place of
+                results instead of raising the first one
+        
+        Returns:
+            List[Union[Dict, BaseException]]: Responses in the order given
+        """
+        return list(await asyncio.gather(*calls, return_exceptions=return_exceptions))
+
+    async def route_many(
+        self, 
+        coordinate_lists: Iterable[Coordinates], 
+        *, 
+        return_exceptions: bool = False,
+        **kwargs: Any
+    ) -> List[Union[Dict, BaseException]]:
+        """
+        Route many coordinate sequences concurrently.
+        
+        Args:
+            coordinate_lists (Iterable[Coordinates]): One sequence per route
+            return_exceptions (bool, optional): See ``gather``
+            **kwargs: Options passed to every ``route`` call
+        
+        Returns:
+            List[Union[Dict, BaseException]]: Responses in input order
+        """
+        return await self.gather(
+            (self.route(coordinates, **kwargs) for coordinates in coordinate_lists),
+            return_exceptions=return_exceptions
+        )
+
+
 def decode_polyline(encoded_polyline: str, precision: int = 5) -> List[Coordinate]:
     """
     Decode an encoded polyline into a list of coordinates.
     
     This implementation supports both polyline and polyline6 encoding.
+    Prefer ``decode_polyline_array`` when the points are processed in bulk.
     
     Args:
         encoded_polyline (str): Encoded polyline string
@@ -263,39 +1412,109 @@ def decode_polyline(encoded_polyline: str, precision: int = 5) -> List[Coordinat
     Returns:
         List[Coordinate]: Decoded coordinates
     
+    Raises:
+        ValueError: If the polyline is invalid
+    """
+    return decode_polyline_array(encoded_polyline, precision).to_coordinates()
+
+
+def decode_polyline_array(encoded_polyline: str, precision: int = 5) -> CoordinateArray:
+    """
+    Decode an encoded polyline straight into a coordinate array.
+    
+    Args:
+        encoded_polyline (str): Encoded polyline string
+        precision (int, optional): Decimal precision (5 for standard, 6 for high precision)
+    
+    Returns:
+        CoordinateArray: Decoded coordinates
+    
     Raises:
         ValueError: If the polyline is invalid
     """
     try:
-        import polyline
-    except ImportError:
-        raise ImportError("Please install 'polyline' library: pip install polyline")
+        return CoordinateArray(osrm_polyline.decode_array(encoded_polyline, precision))
+    except ValueError as e:
+        raise ValueError(f"Failed to decode polyline: {e}") from e
+
+
+def decode_polylines(
+    encoded_polylines: Sequence[str], 
+    precision: int = 5
+) -> Tuple[CoordinateArray, np.ndarray]:
+    """
+    Decode many polylines into one flat coordinate buffer.
+    
+    Args:
+        encoded_polylines (Sequence[str]): Encoded polyline strings
+        precision (int, optional): Decimal precision (5 for standard, 6 for high precision)
+    
+    Returns:
+        Tuple[CoordinateArray, np.ndarray]: All points, plus offsets such that
+        polyline ``i`` is ``points[offsets[i]:offsets[i + 1]]``
     
+    Raises:
+        ValueError: If any polyline is invalid
+    """
     try:
-        decoded_coords = polyline.decode(encoded_polyline, precision)
-        return [Coordinate(lon, lat) for lat, lon in decoded_coords]
-    except Exception as e:
+        points, offsets = osrm_polyline.decode_many(encoded_polylines, precision)
+    except ValueError as e:
         raise ValueError(f"Failed to decode polyline: {e}") from e
+    return CoordinateArray(points), offsets
 
 
-def encode_polyline(coordinates: List[Coordinate], precision: int = 5) -> str:
+def encode_polyline(coordinates: Coordinates, precision: int = 5) -> str:
     """
     Encode a list of coordinates into a polyline string.
     
     Args:
-        coordinates (List[Coordinate]): Coordinates to encode
+        coordinates (Coordinates): Coordinates to encode
         precision (int, optional): Decimal precision (5 for standard, 6 for high precision)
     
     Returns:
         str: Encoded polyline string
     """
-    try:
-        import polyline
-    except ImportError:
-        raise ImportError("Please install 'polyline' library: pip install polyline")
+    return osrm_polyline.encode_array(CoordinateArray.coerce(coordinates).data, precision)
+
+
+_DISTANCE_UNITS = {'km': 1000.0, 'm': 1.0}
+_DURATION_UNITS = {'min': 60.0, 'sec': 1.0}
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedRoute:
+    """
+    Compact view of one route in an OSRM response.
     
-    coord_tuples = [(coord.latitude, coord.longitude) for coord in coordinates]
-    return polyline.encode(coord_tuples, precision)
+    Attributes:
+        distance (float): Route distance in meters
+        duration (float): Route duration in seconds
+        weight (float): Route weight as computed by the profile
+        leg_distances (np.ndarray): Distance of each leg in meters
+        leg_durations (np.ndarray): Duration of each leg in seconds
+        geometry (Union[str, Dict, None]): Raw geometry (polyline string or GeoJSON)
+        legs (Tuple[Dict, ...]): Raw leg dicts, kept for steps and annotations
+    """
+    distance: float
+    duration: float
+    weight: float
+    leg_distances: np.ndarray
+    leg_durations: np.ndarray
+    geometry: Union[str, Dict, None]
+    legs: Tuple[Dict, ...]
+
+    @classmethod
+    def from_dict(cls, route: Dict) -> "ParsedRoute":
+        legs = tuple(route.get('legs', ()))
+        return cls(
+            distance=float(route.get('distance', 0.0)),
+            duration=float(route.get('duration', 0.0)),
+            weight=float(route.get('weight', 0.0)),
+            leg_distances=np.fromiter((leg.get('distance', 0.0) for leg in legs), np.float64, len(legs)),
+            leg_durations=np.fromiter((leg.get('duration', 0.0) for leg in legs), np.float64, len(legs)),
+            geometry=route.get('geometry'),
+            legs=legs
+        )
 
 
 @dataclass
@@ -303,12 +1522,29 @@ class RouteAnalyzer:
     """
     Utility class for analyzing OSRM route responses.
     
-    Provides methods to extract and process route information.
+    Provides methods to extract and process route information. The response
+    is parsed lazily, once, into ``ParsedRoute`` records; per-leg and
+    annotation values are returned as NumPy arrays.
     
     Attributes:
         route_response (Dict): OSRM route response
+        route_index (int, optional): Route to analyze when alternatives were requested
+        precision (int, optional): Polyline precision of encoded geometries
+            (5 for polyline, 6 for polyline6)
     """
     route_response: Dict
+    route_index: int = 0
+    precision: int = 5
+
+    @functools.cached_property
+    def routes(self) -> Tuple[ParsedRoute, ...]:
+        """All routes in the response, parsed once."""
+        return tuple(ParsedRoute.from_dict(route) for route in self.route_response.get('routes') or ())
+
+    @property
+    def route(self) -> Optional[ParsedRoute]:
+        """The analyzed route, or None if the response has none."""
+        return self.routes[self.route_index] if self.route_index < len(self.routes) else None
 
     def total_distance(self, unit: str = 'km') -> float:
         """
@@ -320,10 +1556,10 @@ class RouteAnalyzer:
         Returns:
             float: Total route distance
         """
-        if not self.route_response.get('routes'):
+        if self.route is None:
             return 0.0
         
-        distance_meters = self.route_response['routes'][0].get('distance', 0)
+        distance_meters = self.route.distance
         return distance_meters / 1000 if unit == 'km' else distance_meters
 
     def total_duration(self, unit: str = 'min') -> float:
@@ -336,12 +1572,74 @@ class RouteAnalyzer:
         Returns:
             float: Total route duration
         """
-        if not self.route_response.get('routes'):
+        if self.route is None:
             return 0.0
         
-        duration_seconds = self.route_response['routes'][0].get('duration', 0)
+        duration_seconds = self.route.duration
         return duration_seconds / 60 if unit == 'min' else duration_seconds
 
+    def leg_distances(self, unit: str = 'km') -> np.ndarray:
+        """
+        Distance of each leg.
+        
+        Args:
+            unit (str, optional): Distance unit ('km' or 'm')
+        
+        Returns:
+            np.ndarray: One value per leg
+        """
+        if self.route is None:
+            return np.empty(0)
+        return self.route.leg_distances / _DISTANCE_UNITS[unit]
+
+    def leg_durations(self, unit: str = 'min') -> np.ndarray:
+        """
+        Duration of each leg.
+        
+        Args:
+            unit (str, optional): Duration unit ('min' or 'sec')
+        
+        Returns:
+            np.ndarray: One value per leg
+        """
+        if self.route is None:
+            return np.empty(0)
+        return self.route.leg_durations / _DURATION_UNITS[unit]
+
+    def annotation(self, name: str) -> np.ndarray:
+        """
+        Per-segment annotation values across all legs of the route.
+        
+        Requires the route to be requested with ``annotations=True``.
+        
+        Args:
+            name (str): Annotation key, e.g. 'duration', 'distance', 'speed' or 'nodes'
+        
+        Returns:
+            np.ndarray: Concatenated values for every segment of the route
+        """
+        if self.route is None:
+            return np.empty(0)
+        values = [leg.get('annotation', {}).get(name, ()) for leg in self.route.legs]
+        dtype = np.int64 if name == 'nodes' else np.float64
+        return np.concatenate([np.asarray(v, dtype=dtype) for v in values]) if values else np.empty(0, dtype)
+
+    def route_coordinate_array(self) -> CoordinateArray:
+        """
+        Route geometry as a coordinate array.
+        
+        Handles both GeoJSON and encoded polyline geometries.
+        
+        Returns:
+            CoordinateArray: Coordinates along the route
+        """
+        geometry = self.route.geometry if self.route is not None else None
+        if not geometry:
+            return CoordinateArray(np.empty((0, 2)))
+        if isinstance(geometry, dict):
+            return CoordinateArray(geometry.get('coordinates', []))
+        return decode_polyline_array(geometry, self.precision)
+
     def route_coordinates(self) -> List[Coordinate]:
         """
         Extract route coordinates from the response.
@@ -349,43 +1647,164 @@ class RouteAnalyzer:
         Returns:
             List[Coordinate]: Coordinates along the route
         """
-        if not self.route_response.get('routes'):
-            return []
-        
-        geometry = self.route_response['routes'][0].get('geometry', '')
-        return decode_polyline(geometry)
+        return self.route_coordinate_array().to_coordinates()
 
     def route_steps(self) -> List[Dict]:
         """
         Extract route navigation steps.
         
         Returns:
-            List[Dict]: Detailed navigation steps
+            List[Dict]: Detailed navigation steps of every leg, in order
         """
-        if not self.route_response.get('routes'):
+        if self.route is None:
             return []
         
-        return self.route_response['routes'][0].get('legs', [])[0].get('steps', [])
+        return [step for leg in self.route.legs for step in leg.get('steps', [])]
 
 
-def validate_coordinates(coordinates: List[Coordinate]) -> None:
+@dataclass
+class RouteBatchAnalyzer:
+    """
+    Vectorized statistics over many OSRM route responses.
+    
+    Each response's selected route and its legs are flattened once into
+    NumPy arrays, so totals, percentiles and per-leg statistics over
+    thousands of responses are single array operations. Responses without
+    a route contribute NaN to route-level arrays and no legs.
+    
+    Attributes:
+        responses (Sequence[Dict]): OSRM route (or trip) responses
+        route_index (int, optional): Route to analyze in each response
+    """
+    responses: Sequence[Dict]
+    route_index: int = 0
+
+    @functools.cached_property
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        n = len(self.responses)
+        distances = np.full(n, np.nan)
+        durations = np.full(n, np.nan)
+        leg_counts = np.zeros(n, dtype=np.int64)
+        leg_distances: List[float] = []
+        leg_durations: List[float] = []
+        for i, response in enumerate(self.responses):
+            routes = response.get('routes') or ()
+            if self.route_index >= len(routes):
+                continue
+            route = routes[self.route_index]
+            distances[i] = route.get('distance', 0.0)
+            durations[i] = route.get('duration', 0.0)
+            legs = route.get('legs', ())
+            leg_counts[i] = len(legs)
+            leg_distances.extend(leg.get('distance', 0.0) for leg in legs)
+            leg_durations.extend(leg.get('duration', 0.0) for leg in legs)
+        return {
+            'distances': distances,
+            'durations': durations,
+            'leg_offsets': np.concatenate(([0], np.cumsum(leg_counts))),
+            'leg_distances': np.asarray(leg_distances, dtype=np.float64),
+            'leg_durations': np.asarray(leg_durations, dtype=np.float64),
+        }
+
+    def distances(self, unit: str = 'km') -> np.ndarray:
+        """Route distance per response (NaN where no route)."""
+        return self._arrays['distances'] / _DISTANCE_UNITS[unit]
+
+    def durations(self, unit: str = 'min') -> np.ndarray:
+        """Route duration per response (NaN where no route)."""
+        return self._arrays['durations'] / _DURATION_UNITS[unit]
+
+    def leg_distances(self, unit: str = 'km') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distances of every leg across all responses.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Flat leg values and offsets such that
+            response ``i`` owns ``values[offsets[i]:offsets[i + 1]]``
+        """
+        return self._arrays['leg_distances'] / _DISTANCE_UNITS[unit], self._arrays['leg_offsets']
+
+    def leg_durations(self, unit: str = 'min') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Durations of every leg across all responses.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Flat leg values and offsets, as in ``leg_distances``
+        """
+        return self._arrays['leg_durations'] / _DURATION_UNITS[unit], self._arrays['leg_offsets']
+
+    def percentiles(
+        self, 
+        q: Sequence[float] = (50, 90, 95, 99), 
+        metric: str = 'duration', 
+        unit: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Percentiles of route distance or duration, ignoring missing routes.
+        
+        Args:
+            q (Sequence[float], optional): Percentiles in [0, 100]
+            metric (str, optional): 'duration' or 'distance'
+            unit (str, optional): Unit of the metric (defaults: 'min', 'km')
+        
+        Returns:
+            np.ndarray: One value per requested percentile
+        """
+        values = self.durations(unit or 'min') if metric == 'duration' else self.distances(unit or 'km')
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return np.full(len(q), np.nan)
+        return np.percentile(values, q)
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Aggregate totals and per-leg statistics for the whole batch.
+        
+        Returns:
+            Dict[str, float]: Route counts, total/mean distance (km) and
+            duration (min), and leg count, mean and p90/max leg duration (min)
+        """
+        distances = self.distances('km')
+        durations = self.durations('min')
+        legs, _ = self.leg_durations('min')
+        routed = ~np.isnan(distances)
+        return {
+            'responses': len(self.responses),
+            'routes': int(routed.sum()),
+            'total_distance_km': float(distances[routed].sum()),
+            'total_duration_min': float(durations[routed].sum()),
+            'mean_distance_km': float(distances[routed].mean()) if routed.any() else float('nan'),
+            'mean_duration_min': float(durations[routed].mean()) if routed.any() else float('nan'),
+            'legs': int(legs.size),
+            'mean_leg_duration_min': float(legs.mean()) if legs.size else float('nan'),
+            'p90_leg_duration_min': float(np.percentile(legs, 90)) if legs.size else float('nan'),
+            'max_leg_duration_min': float(legs.max()) if legs.size else float('nan'),
+        }
+
+
+def validate_coordinates(coordinates: Coordinates) -> None:
     """
     Validate a list of coordinates.
     
+    The range check runs over the whole array at once; only the first
+    offending coordinate is reported.
+    
     Args:
-        coordinates (List[Coordinate]): Coordinates to validate
+        coordinates (Coordinates): Coordinates to validate
     
     Raises:
         ValueError: If coordinates are invalid
     """
-    if not coordinates:
+    coordinates = CoordinateArray.coerce(coordinates)
+    if len(coordinates) == 0:
         raise ValueError("Coordinates list cannot be empty")
     
-    for coord in coordinates:
-        if not (-180 <= coord.longitude <= 180):
-            raise ValueError(f"Invalid longitude: {coord.longitude}")
-        if not (-90 <= coord.latitude <= 90):
-            raise ValueError(f"Invalid latitude: {coord.latitude}")
+    invalid = np.flatnonzero(coordinates.invalid_mask())
+    if invalid.size:
+        lon, lat = coordinates.data[invalid[0]]
+        if not (-180 <= lon <= 180):
+            raise ValueError(f"Invalid longitude: {lon}")
+        raise ValueError(f"Invalid latitude: {lat}")
 
 
 # Example usage
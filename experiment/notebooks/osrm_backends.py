@@ -0,0 +1,198 @@
+"""
+Backend pool for spreading OSRM requests over several osrm-routed servers.
+
+``BackendPool`` tracks outstanding requests, recent latencies and failures
+per backend. Requests go to the healthy backend with the fewest outstanding
+requests; a backend that fails ``failure_threshold`` times in a row is
+ejected (its circuit opens) for ``cooldown`` seconds and then readmitted on
+probation. The pool also supplies the latency percentile after which the
+client sends a hedged duplicate to a second backend.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Iterable, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class Backend:
+    """
+    Health and load of one osrm-routed server.
+
+    Attributes:
+        url (str): Base URL of the server
+        outstanding (int): Requests currently in flight
+        requests (int): Completed requests
+        errors (int): Requests that failed with a server or network error
+        consecutive_failures (int): Failures since the last success
+        opened_at (float, optional): When the circuit opened; None while healthy
+        latencies (Deque[float]): Recent successful request latencies in seconds
+    """
+    url: str
+    outstanding: int = 0
+    requests: int = 0
+    errors: int = 0
+    consecutive_failures: int = 0
+    opened_at: Optional[float] = None
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=256))
+
+    @property
+    def healthy(self) -> bool:
+        return self.opened_at is None
+
+
+@dataclass
+class BackendStats:
+    """
+    Snapshot of one backend.
+
+    Attributes:
+        url (str): Base URL of the server
+        healthy (bool): Whether the circuit is closed
+        outstanding (int): Requests in flight
+        requests (int): Completed requests
+        errors (int): Failed requests
+        p50 (float): Median recent latency in seconds (NaN without samples)
+        p95 (float): 95th percentile recent latency in seconds (NaN without samples)
+    """
+    url: str
+    healthy: bool
+    outstanding: int
+    requests: int
+    errors: int
+    p50: float
+    p95: float
+
+
+class BackendPool:
+    """
+    Thread-safe least-outstanding-requests balancer with circuit breaking.
+
+    Args:
+        urls (Iterable[str]): Base URLs of the osrm-routed servers
+        failure_threshold (int, optional): Consecutive failures that eject a backend
+        cooldown (float, optional): Seconds an ejected backend sits out
+        hedge_percentile (float, optional): Latency percentile after which a
+            hedged duplicate is sent to another backend
+        hedge_min_samples (int, optional): Latency samples needed before hedging
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+    ):
+        self.backends: List[Backend] = [Backend(url.rstrip("/")) for url in urls]
+        if not self.backends:
+            raise ValueError("BackendPool needs at least one backend URL")
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def acquire(self, exclude: Iterable[str] = ()) -> Optional[Backend]:
+        """
+        Pick a backend for the next request and count it as outstanding.
+
+        Healthy backends with the fewest outstanding requests win. Backends
+        whose cooldown has passed are readmitted on probation: one more
+        failure ejects them again. If every backend is ejected, the one
+        ejected longest ago is tried rather than failing outright.
+
+        Args:
+            exclude (Iterable[str], optional): URLs not to pick, e.g. the
+                backend a hedged request is already waiting on
+
+        Returns:
+            Optional[Backend]: Chosen backend, or None if all are excluded
+        """
+        excluded = set(exclude)
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if b.url not in excluded]
+            if not candidates:
+                return None
+            for backend in candidates:
+                if not backend.healthy and now - backend.opened_at >= self.cooldown:
+                    backend.opened_at = None
+                    backend.consecutive_failures = self.failure_threshold - 1
+            healthy = [b for b in candidates if b.healthy]
+            if healthy:
+                backend = min(healthy, key=lambda b: b.outstanding)
+            else:
+                backend = min(candidates, key=lambda b: b.opened_at)
+            backend.outstanding += 1
+            return backend
+
+    def release(self, backend: Backend, latency: Optional[float], ok: Optional[bool]) -> None:
+        """
+        Record the outcome of a request.
+
+        Args:
+            backend (Backend): Backend returned by ``acquire``
+            latency (float, optional): Request latency in seconds
+            ok (bool, optional): True on success, False on a server or network
+                failure, None for outcomes that say nothing about the
+                backend's health (e.g. an invalid query)
+        """
+        with self._lock:
+            backend.outstanding -= 1
+            backend.requests += 1
+            if ok:
+                backend.consecutive_failures = 0
+                backend.opened_at = None
+                if latency is not None:
+                    backend.latencies.append(latency)
+            elif ok is False:
+                backend.errors += 1
+                backend.consecutive_failures += 1
+                if backend.consecutive_failures >= self.failure_threshold and backend.healthy:
+                    backend.opened_at = time.monotonic()
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Latency after which a request should be hedged.
+
+        Returns:
+            Optional[float]: Seconds, or None until enough samples exist
+        """
+        with self._lock:
+            samples = [lat for b in self.backends for lat in b.latencies]
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return float(np.percentile(samples, self.hedge_percentile))
+
+    def record_hedge(self) -> None:
+        """Count a hedged duplicate request."""
+        with self._lock:
+            self.hedges += 1
+
+    def stats(self) -> List[BackendStats]:
+        """
+        Per-backend health and load.
+
+        Returns:
+            List[BackendStats]: One entry per backend, in configuration order
+        """
+        with self._lock:
+            snapshot = [
+                (b.url, b.healthy, b.outstanding, b.requests, b.errors, list(b.latencies))
+                for b in self.backends
+            ]
+        stats = []
+        for url, healthy, outstanding, requests, errors, latencies in snapshot:
+            p50, p95 = np.percentile(latencies, [50, 95]) if latencies else (np.nan, np.nan)
+            stats.append(BackendStats(url, healthy, outstanding, requests, errors, float(p50), float(p95)))
+        return stats
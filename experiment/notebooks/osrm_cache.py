@@ -0,0 +1,227 @@
+"""
+Response cache for the OSRM client.
+
+Caches decoded OSRM responses under keys built from quantized coordinates,
+the routing profile, the service and its query parameters. Entries live in
+an in-memory LRU with TTL expiry and can optionally be persisted to SQLite
+so repeated runs over overlapping locations skip the HTTP round trip.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+def _to_json(value: Any) -> Any:
+    """Serialize NumPy arrays, e.g. streamed table grids, as nested lists."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@dataclass
+class CacheStats:
+    """
+    Snapshot of cache activity.
+
+    Attributes:
+        hits (int): Lookups served from memory or disk
+        misses (int): Lookups that required a request
+        disk_hits (int): Subset of hits served from the on-disk store
+        evictions (int): Entries dropped from memory to honour ``max_entries``
+        expirations (int): Entries dropped because they outlived the TTL
+        size (int): Entries currently held in memory
+        disk_size (int): Entries currently held on disk
+    """
+    hits: int = 0
+    misses: int = 0
+    disk_hits: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    size: int = 0
+    disk_size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of OSRM responses with TTL and optional SQLite store.
+
+    Cached responses are shared between callers and must be treated as
+    read-only.
+
+    Args:
+        max_entries (int, optional): Entries kept in memory before LRU eviction
+        ttl (float, optional): Seconds an entry stays valid; None never expires
+        path (str, optional): SQLite file backing the cache across runs
+        precision (int, optional): Decimal places coordinates are rounded to
+            when building keys (5 is roughly 1 m)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: Optional[float] = 24 * 60 * 60,
+        path: Optional[str] = None,
+        precision: int = 5,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.precision = precision
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, created REAL NOT NULL, body TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def key(
+        self,
+        service: str,
+        profile: str,
+        coordinates: np.ndarray,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Build a cache key for a request.
+
+        Args:
+            service (str): OSRM service name
+            profile (str): Routing profile name
+            coordinates (np.ndarray): Array-like of (lon, lat) pairs
+            params (Dict[str, Any], optional): Query parameters
+
+        Returns:
+            str: Key shared by requests whose coordinates round to the same grid
+        """
+        grid = np.rint(np.asarray(coordinates, dtype=np.float64) * 10 ** self.precision)
+        query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        digest = hashlib.sha1(grid.astype("<i8").tobytes())
+        digest.update(query.encode())
+        return f"{service}/{profile}/{len(grid)}/{digest.hexdigest()}"
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a response.
+
+        Args:
+            key (str): Key from ``key``
+
+        Returns:
+            Optional[Any]: Cached response, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created, now):
+                    self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                    return value
+                del self._entries[key]
+                self._stats.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT created, body FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    created, body = row
+                    if not self._expired(created, now):
+                        value = json.loads(body)
+                        self._remember(key, created, value)
+                        self._stats.hits += 1
+                        self._stats.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._stats.expirations += 1
+
+            self._stats.misses += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a response in memory and, if configured, on disk.
+
+        Args:
+            key (str): Key from ``key``
+            value (Any): Decoded JSON response
+        """
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, created, body) VALUES (?, ?, ?)",
+                    (key, created, json.dumps(value, separators=(",", ":"), default=_to_json)),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, created: float, value: Any) -> None:
+        """Insert into the in-memory LRU. Caller holds the lock."""
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def stats(self) -> CacheStats:
+        """
+        Current cache statistics.
+
+        Returns:
+            CacheStats: Copy of the counters with up-to-date sizes
+        """
+        with self._lock:
+            disk_size = 0
+            if self._db is not None:
+                disk_size = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                disk_hits=self._stats.disk_hits,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                size=len(self._entries),
+                disk_size=disk_size,
+            )
+
+    def clear(self) -> None:
+        """Drop every entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self) -> None:
+        """Close the on-disk store. In-memory entries stay usable."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,153 @@
+"""
+Record and replay OSRM traffic.
+
+A ``Cassette`` is a single SQLite file. In ``record`` mode the client sends
+requests as usual and stores each raw response body; in ``replay`` mode it
+answers every request from the file and never touches the network, so a run
+can be repeated byte for byte without an OSRM server.
+
+Requests are keyed by the SHA-256 of the exact request (path, coordinates and
+query parameters, minus waypoint hints, which depend on what was snapped
+before), so unlike ``ResponseCache`` nothing is rounded. Response bodies are
+stored zlib-compressed and content-addressed by their own SHA-256, so
+identical bodies are kept once. Replay is an indexed primary-key lookup.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+MODES = ("record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+@dataclass
+class CassetteStats:
+    """
+    Snapshot of cassette activity.
+
+    Attributes:
+        hits (int): Requests answered from the cassette
+        misses (int): Replayed requests that were not recorded
+        recorded (int): Responses recorded in this session
+        size (int): Requests stored in the cassette
+        blobs (int): Distinct response bodies stored
+    """
+    hits: int = 0
+    misses: int = 0
+    recorded: int = 0
+    size: int = 0
+    blobs: int = 0
+
+
+class Cassette:
+    """
+    Thread-safe, content-addressed archive of OSRM responses.
+
+    Args:
+        path (str): SQLite file holding the cassette
+        mode (str, optional): "record" to store live responses, "replay" to
+            answer requests from the file only
+        compression (int, optional): zlib level for stored bodies
+    """
+
+    def __init__(self, path: str, mode: str = "replay", compression: int = 6):
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {MODES}, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._stats = CassetteStats()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS requests ("
+            "key TEXT PRIMARY KEY, status INTEGER NOT NULL, body TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        self._db.commit()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def key(path: str, params: Optional[Dict]) -> str:
+        """
+        Exact key of a request.
+
+        Args:
+            path (str): Request path, e.g. ``/route/v1/driving/101.6,3.1;101.7,3.2``
+            params (Dict, optional): Query parameters; ``hints`` is ignored
+
+        Returns:
+            str: Hex SHA-256 digest
+        """
+        query = urlencode(sorted((k, str(v)) for k, v in (params or {}).items() if k != "hints"))
+        return hashlib.sha256(f"{path}?{query}".encode()).hexdigest()
+
+    def play(self, key: str) -> Tuple[int, bytes]:
+        """
+        Recorded response of a request.
+
+        Args:
+            key (str): Key from ``key``
+
+        Returns:
+            Tuple[int, bytes]: HTTP status and raw response body
+
+        Raises:
+            CassetteMiss: If the request was not recorded
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT r.status, b.data FROM requests r JOIN blobs b ON b.digest = r.body WHERE r.key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self._stats.misses += 1
+                raise CassetteMiss(f"Request {key} is not in cassette {self.path}")
+            self._stats.hits += 1
+        return row[0], zlib.decompress(row[1])
+
+    def record(self, key: str, status: int, body: bytes) -> None:
+        """
+        Store a response, replacing any earlier recording of the request.
+
+        Args:
+            key (str): Key from ``key``
+            status (int): HTTP status
+            body (bytes): Raw response body
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        data = zlib.compress(body, self.compression)
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)", (digest, data))
+            self._db.execute(
+                "INSERT OR REPLACE INTO requests (key, status, body) VALUES (?, ?, ?)", (key, status, digest)
+            )
+            self._db.commit()
+            self._stats.recorded += 1
+
+    def stats(self) -> CassetteStats:
+        """Copy of the counters with the current sizes."""
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM requests").fetchone()[0]
+            blobs = self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+            return CassetteStats(self._stats.hits, self._stats.misses, self._stats.recorded, size, blobs)
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._db.close()
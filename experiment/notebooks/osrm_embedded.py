@@ -0,0 +1,659 @@
+"""
+Embedded routing engine for small regions.
+
+``RoadGraph`` turns an OSM XML extract into a compact CSR (compressed sparse
+row) car graph weighted by travel time, with precomputed ALT landmarks
+(A*, Landmarks, Triangle inequality). ``EmbeddedRouter`` answers ``route``
+and ``table`` queries in-process and returns responses shaped like
+``OSRMClient``'s, so notebooks and offline jobs can route without an
+osrm-routed server:
+
+- ``route`` runs a landmark-guided A* search per leg.
+- ``table`` and ``table_matrix`` run one many-to-many shortest-path pass per
+  batch of sources with SciPy's compiled Dijkstra.
+
+Coordinates snap to the nearest graph node in the largest strongly
+connected component; partial edges at the ends are ignored. Speeds follow a
+simplified version of OSRM's car profile.
+
+Only OSM XML (``.osm``, ``.osm.gz``, ``.osm.bz2``) is read. Convert a PBF
+extract first, e.g. ``osmium extract -b 101.6,3.0,101.8,3.3 region.osm.pbf -o kl.osm``.
+"""
+
+import bz2
+import functools
+import gzip
+import heapq
+import math
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+from scipy.spatial import cKDTree
+
+from . import osrm_polyline
+from .osrm import (
+    CoordinateArray,
+    Coordinates,
+    OSRMGeometry,
+    OSRMOverview,
+    OSRMProfile,
+    OSRMRequestError,
+    TableMatrix,
+    validate_coordinates,
+)
+
+EARTH_RADIUS_M = 6371008.8
+
+# Default speeds in km/h by highway type, after OSRM's car profile
+HIGHWAY_SPEEDS: Dict[str, float] = {
+    "motorway": 90, "motorway_link": 45,
+    "trunk": 85, "trunk_link": 40,
+    "primary": 65, "primary_link": 30,
+    "secondary": 55, "secondary_link": 25,
+    "tertiary": 40, "tertiary_link": 20,
+    "unclassified": 25, "residential": 25,
+    "living_street": 10, "service": 15,
+}
+_NO_ACCESS = {"no", "private", "agricultural", "forestry", "delivery"}
+# A* computes landmark bounds lazily, for blocks of 2**_BOUND_BLOCK_BITS consecutive node ids
+_BOUND_BLOCK_BITS = 8
+_BOUND_BLOCK_MASK = (1 << _BOUND_BLOCK_BITS) - 1
+
+
+def _haversine(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """Great-circle distance in meters between broadcastable lon/lat arrays."""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _speed(tags: Dict[str, str]) -> Optional[float]:
+    """Travel speed of a way in km/h, or None if cars cannot use it."""
+    highway = tags.get("highway")
+    if highway not in HIGHWAY_SPEEDS or tags.get("area") == "yes":
+        return None
+    if tags.get("access") in _NO_ACCESS or tags.get("motor_vehicle") in _NO_ACCESS:
+        return None
+    maxspeed = tags.get("maxspeed", "")
+    try:
+        speed = float(maxspeed[:-3]) * 1.609344 if maxspeed.endswith("mph") else float(maxspeed)
+    except ValueError:
+        speed = math.nan
+    # Zero, negative and non-finite limits are tagging errors; use the highway default
+    return speed if 0 < speed < math.inf else float(HIGHWAY_SPEEDS[highway])
+
+
+def _direction(tags: Dict[str, str]) -> Tuple[bool, bool]:
+    """Whether a way can be driven (forward, backward)."""
+    oneway = tags.get("oneway")
+    if oneway in ("yes", "1", "true"):
+        return True, False
+    if oneway == "-1":
+        return False, True
+    if oneway != "no" and (
+        tags.get("junction") in ("roundabout", "circular") or tags.get("highway") == "motorway"
+    ):
+        return True, False
+    return True, True
+
+
+def _open_extract(path: str):
+    if path.endswith(".pbf"):
+        raise ValueError(
+            f"{path} is a PBF extract; only OSM XML is supported. Convert it first, "
+            "e.g. `osmium cat region.osm.pbf -o region.osm`"
+        )
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def _unit_vectors(coordinates: np.ndarray) -> np.ndarray:
+    """(n, 3) points on the unit sphere for (lon, lat) rows in degrees."""
+    lon, lat = np.radians(coordinates[:, 0]), np.radians(coordinates[:, 1])
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+@dataclass
+class RoadGraph:
+    """
+    Directed road graph in CSR form.
+
+    Edges out of node ``u`` are ``indices[indptr[u]:indptr[u + 1]]``, sorted
+    by target, with matching ``durations`` and ``lengths``.
+
+    Attributes:
+        coordinates (np.ndarray): (n, 2) node positions as (lon, lat)
+        indptr (np.ndarray): (n + 1,) row offsets
+        indices (np.ndarray): Edge targets
+        durations (np.ndarray): Edge travel times in seconds
+        lengths (np.ndarray): Edge lengths in meters
+        landmarks (np.ndarray): Landmark node ids
+        from_landmarks (np.ndarray): (k, n) travel time from each landmark to every node
+        to_landmarks (np.ndarray): (k, n) travel time from every node to each landmark
+    """
+    coordinates: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    durations: np.ndarray
+    lengths: np.ndarray
+    landmarks: np.ndarray
+    from_landmarks: np.ndarray
+    to_landmarks: np.ndarray
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.coordinates)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_edges(
+        cls,
+        coordinates: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        durations: np.ndarray,
+        lengths: np.ndarray,
+        n_landmarks: int = 8,
+    ) -> "RoadGraph":
+        """
+        Build a graph from an edge list, keeping the fastest of parallel edges.
+
+        Args:
+            coordinates (np.ndarray): (n, 2) node positions as (lon, lat)
+            sources (np.ndarray): Edge source node ids
+            targets (np.ndarray): Edge target node ids
+            durations (np.ndarray): Edge travel times in seconds
+            lengths (np.ndarray): Edge lengths in meters
+            n_landmarks (int, optional): ALT landmarks to precompute
+
+        Returns:
+            RoadGraph: Graph with landmarks
+        """
+        n = len(coordinates)
+        sources, targets = np.asarray(sources, np.int64), np.asarray(targets, np.int64)
+        durations, lengths = np.asarray(durations, np.float64), np.asarray(lengths, np.float64)
+        keep = sources != targets
+        sources, targets, durations, lengths = sources[keep], targets[keep], durations[keep], lengths[keep]
+
+        order = np.lexsort((durations, targets, sources))
+        sources, targets, durations, lengths = sources[order], targets[order], durations[order], lengths[order]
+        first = np.ones(len(sources), dtype=bool)
+        first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        sources, targets, durations, lengths = sources[first], targets[first], durations[first], lengths[first]
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+        graph = cls(
+            coordinates=np.ascontiguousarray(coordinates, dtype=np.float64),
+            indptr=indptr,
+            indices=targets,
+            durations=durations,
+            lengths=lengths,
+            landmarks=np.empty(0, dtype=np.int64),
+            from_landmarks=np.empty((0, n)),
+            to_landmarks=np.empty((0, n)),
+        )
+        graph.select_landmarks(n_landmarks)
+        return graph
+
+    @classmethod
+    def from_osm(
+        cls,
+        path: str,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        n_landmarks: int = 8,
+    ) -> "RoadGraph":
+        """
+        Build a car graph from an OSM XML extract.
+
+        Args:
+            path (str): ``.osm``, ``.osm.gz`` or ``.osm.bz2`` file
+            bbox (Tuple[float, float, float, float], optional): (min_lon,
+                min_lat, max_lon, max_lat) to keep; everything by default
+            n_landmarks (int, optional): ALT landmarks to precompute
+
+        Returns:
+            RoadGraph: Graph over the nodes used by drivable ways
+
+        Raises:
+            ValueError: For PBF extracts or extracts without drivable ways
+        """
+        node_ids: Dict[int, int] = {}
+        lons: List[float] = []
+        lats: List[float] = []
+        edge_from: List[int] = []
+        edge_to: List[int] = []
+        edge_speed: List[float] = []
+        way_nodes: List[int] = []
+        way_tags: Dict[str, str] = {}
+
+        with _open_extract(path) as f:
+            for _, elem in ET.iterparse(f, events=("end",)):
+                if elem.tag == "node":
+                    lon, lat = float(elem.get("lon")), float(elem.get("lat"))
+                    if bbox is None or (bbox[0] <= lon <= bbox[2] and bbox[1] <= lat <= bbox[3]):
+                        node_ids[int(elem.get("id"))] = len(lons)
+                        lons.append(lon)
+                        lats.append(lat)
+                    # Tags of a node (gates, barriers) must not reach the next way
+                    way_nodes, way_tags = [], {}
+                    elem.clear()
+                elif elem.tag == "nd":
+                    way_nodes.append(int(elem.get("ref")))
+                elif elem.tag == "tag":
+                    way_tags[elem.get("k")] = elem.get("v")
+                elif elem.tag == "way":
+                    speed = _speed(way_tags)
+                    if speed is not None:
+                        forward, backward = _direction(way_tags)
+                        refs = [node_ids.get(ref) for ref in way_nodes]
+                        for a, b in zip(refs, refs[1:]):
+                            if a is None or b is None:
+                                continue
+                            if forward:
+                                edge_from.append(a)
+                                edge_to.append(b)
+                                edge_speed.append(speed)
+                            if backward:
+                                edge_from.append(b)
+                                edge_to.append(a)
+                                edge_speed.append(speed)
+                    way_nodes, way_tags = [], {}
+                    elem.clear()
+                elif elem.tag == "relation":
+                    way_nodes, way_tags = [], {}
+                    elem.clear()
+
+        if not edge_from:
+            raise ValueError(f"No drivable ways found in {path}")
+
+        # Keep only nodes on drivable ways, renumbered densely
+        edge_from_arr, edge_to_arr = np.array(edge_from), np.array(edge_to)
+        used, inverse = np.unique(np.concatenate((edge_from_arr, edge_to_arr)), return_inverse=True)
+        sources, targets = inverse[:len(edge_from)], inverse[len(edge_from):]
+        coordinates = np.column_stack((np.array(lons)[used], np.array(lats)[used]))
+        lengths = _haversine(*coordinates[sources].T, *coordinates[targets].T)
+        durations = lengths / (np.array(edge_speed) / 3.6)
+        return cls.from_edges(coordinates, sources, targets, durations, lengths, n_landmarks)
+
+    def matrix(self, weights: Optional[np.ndarray] = None, transpose: bool = False) -> csr_matrix:
+        """Graph as a SciPy sparse matrix of durations (or other per-edge weights)."""
+        matrix = csr_matrix(
+            (self.durations if weights is None else weights, self.indices, self.indptr),
+            shape=(self.n_nodes, self.n_nodes),
+        )
+        return matrix.T.tocsr() if transpose else matrix
+
+    def largest_component(self) -> np.ndarray:
+        """Mask of nodes in the largest strongly connected component."""
+        _, labels = connected_components(self.matrix(), directed=True, connection="strong")
+        return labels == np.argmax(np.bincount(labels))
+
+    def select_landmarks(self, k: int, seed: int = 0) -> None:
+        """
+        Choose ``k`` landmarks by farthest-point selection and precompute
+        travel times to and from them.
+
+        Args:
+            k (int): Number of landmarks
+            seed (int, optional): Seed for the first landmark
+        """
+        component = np.flatnonzero(self.largest_component())
+        forward_graph, backward_graph = self.matrix(), self.matrix(transpose=True)
+        # A search from a random node finds a far-away first landmark
+        start = int(np.random.default_rng(seed).choice(component))
+        candidate = int(component[np.argmax(dijkstra(forward_graph, indices=start)[component])])
+        landmarks: List[int] = []
+        from_rows, to_rows = [], []
+        spread = np.full(self.n_nodes, np.inf)
+        for _ in range(min(k, len(component))):
+            landmarks.append(candidate)
+            from_rows.append(dijkstra(forward_graph, indices=candidate))
+            to_rows.append(dijkstra(backward_graph, indices=candidate))
+            # Next landmark: the node farthest from every landmark so far
+            spread = np.minimum(spread, from_rows[-1] + to_rows[-1])
+            candidate = int(component[np.argmax(spread[component])])
+        self.landmarks = np.array(landmarks, dtype=np.int64)
+        self.from_landmarks = np.array(from_rows).reshape(len(landmarks), self.n_nodes)
+        self.to_landmarks = np.array(to_rows).reshape(len(landmarks), self.n_nodes)
+
+    def save(self, path: str) -> None:
+        """Write the graph and landmarks to a compressed ``.npz`` file."""
+        np.savez_compressed(path, **{name: getattr(self, name) for name in self.__dataclass_fields__})
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        """Read a graph written by ``save``."""
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in cls.__dataclass_fields__})
+
+    @functools.cached_property
+    def _edge_keys(self) -> np.ndarray:
+        """Sorted ``source * n + target`` of every edge."""
+        sources = np.repeat(np.arange(self.n_nodes, dtype=np.int64), np.diff(self.indptr))
+        return sources * self.n_nodes + self.indices
+
+    def edge_ids(self, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Edge index of each (source, target) pair, which must exist."""
+        sources, targets = np.asarray(sources, np.int64), np.asarray(targets, np.int64)
+        return np.searchsorted(self._edge_keys, sources * self.n_nodes + targets)
+
+
+class EmbeddedRouter:
+    """
+    In-process router with an ``OSRMClient``-compatible ``route``/``table`` API.
+
+    Only car routing is modelled; the ``profile`` arguments are accepted for
+    compatibility and ignored.
+
+    Args:
+        graph (RoadGraph): Road graph to route on
+        table_batch (int, optional): Sources per many-to-many Dijkstra pass
+    """
+
+    def __init__(self, graph: RoadGraph, table_batch: int = 16):
+        self.graph = graph
+        self.table_batch = table_batch
+        self._snappable = np.flatnonzero(graph.largest_component())
+        # Chord length between unit vectors ranks nodes like great-circle distance
+        self._snap_tree = cKDTree(_unit_vectors(graph.coordinates[self._snappable]))
+        self._adjacency = None
+        self._forward = graph.matrix()
+
+    @classmethod
+    def from_osm(
+        cls,
+        path: str,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        n_landmarks: int = 8,
+    ) -> "EmbeddedRouter":
+        """Router over ``RoadGraph.from_osm(path, bbox, n_landmarks)``."""
+        return cls(RoadGraph.from_osm(path, bbox, n_landmarks))
+
+    def __enter__(self) -> "EmbeddedRouter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Nothing to release; present for ``OSRMClient`` compatibility."""
+
+    def snap(self, coordinates: Coordinates) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest routable node of each coordinate.
+
+        Args:
+            coordinates (Coordinates): Coordinates to snap
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Node ids and snapping distances in meters
+        """
+        coordinates = CoordinateArray.coerce(coordinates)
+        validate_coordinates(coordinates)
+        _, nearest = self._snap_tree.query(_unit_vectors(coordinates.data))
+        nodes = self._snappable[np.asarray(nearest, dtype=np.int64).reshape(-1)]
+        snapped = self.graph.coordinates[nodes]
+        return nodes, _haversine(*coordinates.data.T, *snapped.T)
+
+    def _waypoints(self, nodes: np.ndarray, distances: np.ndarray) -> List[Dict]:
+        return [
+            {"hint": "", "distance": float(d), "name": "", "location": self.graph.coordinates[node].tolist()}
+            for node, d in zip(nodes.tolist(), distances.tolist())
+        ]
+
+    def shortest_path(self, source: int, target: int) -> Optional[List[int]]:
+        """
+        Fastest path between two nodes by landmark-guided A*.
+
+        Args:
+            source (int): Start node
+            target (int): End node
+
+        Returns:
+            Optional[List[int]]: Node ids along the path, None if unreachable
+        """
+        if source == target:
+            return [source]
+        graph = self.graph
+        if self._adjacency is None:
+            self._adjacency = (graph.indptr.tolist(), graph.indices.tolist(), graph.durations.tolist())
+        indptr, indices, durations = self._adjacency
+        from_target = graph.from_landmarks[:, target][:, None]
+        to_target = graph.to_landmarks[:, target][:, None]
+        blocks: Dict[int, List[float]] = {}
+
+        def bound(node: int) -> float:
+            """Triangle-inequality lower bound to the target; inf if the target is unreachable."""
+            block = node >> _BOUND_BLOCK_BITS
+            values = blocks.get(block)
+            if values is None:
+                # Bounds are computed for the block of node ids around each reached node only
+                span = slice(block << _BOUND_BLOCK_BITS, (block + 1) << _BOUND_BLOCK_BITS)
+                with np.errstate(invalid="ignore"):
+                    h = np.maximum(
+                        from_target - graph.from_landmarks[:, span], graph.to_landmarks[:, span] - to_target
+                    ).max(axis=0, initial=0.0)
+                values = blocks[block] = np.nan_to_num(h, nan=0.0, posinf=np.inf).tolist()
+            return values[node & _BOUND_BLOCK_MASK]
+
+        if math.isinf(bound(source)):
+            return None
+        best = {source: 0.0}
+        parent = {source: -1}
+        heap = [(bound(source), 0.0, source)]
+        settled = set()
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            if node == target:
+                path = [node]
+                while parent[path[-1]] != -1:
+                    path.append(parent[path[-1]])
+                return path[::-1]
+            settled.add(node)
+            for e in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[e]
+                new_cost = cost + durations[e]
+                if new_cost < best.get(neighbour, math.inf):
+                    h = bound(neighbour)
+                    if not math.isinf(h):
+                        best[neighbour] = new_cost
+                        parent[neighbour] = node
+                        heapq.heappush(heap, (new_cost + h, new_cost, neighbour))
+        return None
+
+    def route(
+        self,
+        coordinates: Coordinates,
+        *,
+        profile: OSRMProfile = OSRMProfile.DRIVING,
+        alternatives: bool = False,
+        steps: bool = False,
+        annotations: bool = False,
+        overview: OSRMOverview = OSRMOverview.SIMPLIFIED,
+        geometry: OSRMGeometry = OSRMGeometry.POLYLINE
+    ) -> Dict:
+        """
+        Route through coordinates in order, shaped like ``OSRMClient.route``.
+
+        ``alternatives`` and ``steps`` are accepted for compatibility; no
+        alternatives or turn-by-turn steps are produced. Simplified overview
+        returns the full geometry.
+
+        Args:
+            coordinates (Coordinates): Waypoints to visit in order
+            profile (OSRMProfile, optional): Ignored
+            alternatives (bool, optional): Ignored
+            steps (bool, optional): Ignored
+            annotations (bool, optional): Include per-edge duration/distance annotations
+            overview (OSRMOverview, optional): FALSE omits the geometry
+            geometry (OSRMGeometry, optional): Geometry encoding format
+
+        Returns:
+            Dict: ``{"code": "Ok", "routes": [...], "waypoints": [...]}``
+
+        Raises:
+            OSRMRequestError: With status 400, as osrm-routed answers, for
+                fewer than two coordinates or an unreachable leg
+        """
+        nodes, snap_distances = self.snap(coordinates)
+        if len(nodes) < 2:
+            raise OSRMRequestError("InvalidQuery: Number of coordinates needs to be at least two", 400)
+
+        legs, path_nodes = [], [int(nodes[0])]
+        for source, target in zip(nodes[:-1].tolist(), nodes[1:].tolist()):
+            path = self.shortest_path(source, target)
+            if path is None:
+                raise OSRMRequestError("NoRoute: Impossible route between points", 400)
+            edges = self.graph.edge_ids(path[:-1], path[1:])
+            leg_durations, leg_lengths = self.graph.durations[edges], self.graph.lengths[edges]
+            leg = {
+                "distance": float(leg_lengths.sum()),
+                "duration": float(leg_durations.sum()),
+                "weight": float(leg_durations.sum()),
+                "summary": "",
+                "steps": [],
+            }
+            if annotations:
+                leg["annotation"] = {
+                    "distance": leg_lengths.tolist(),
+                    "duration": leg_durations.tolist(),
+                    "nodes": path,
+                }
+            legs.append(leg)
+            path_nodes.extend(path[1:])
+
+        route = {
+            "distance": sum(leg["distance"] for leg in legs),
+            "duration": sum(leg["duration"] for leg in legs),
+            "weight": sum(leg["weight"] for leg in legs),
+            "weight_name": "duration",
+            "legs": legs,
+        }
+        if overview != OSRMOverview.FALSE:
+            points = self.graph.coordinates[path_nodes]
+            if geometry == OSRMGeometry.GEOJSON:
+                route["geometry"] = {"type": "LineString", "coordinates": points.tolist()}
+            else:
+                precision = 6 if geometry == OSRMGeometry.POLYLINE6 else 5
+                route["geometry"] = osrm_polyline.encode_array(points, precision)
+        return {"code": "Ok", "routes": [route], "waypoints": self._waypoints(nodes, snap_distances)}
+
+    def table_matrix(
+        self,
+        coordinates: Coordinates,
+        *,
+        profile: OSRMProfile = OSRMProfile.DRIVING,
+        sources: Optional[List[int]] = None,
+        destinations: Optional[List[int]] = None,
+        with_distances: bool = True,
+        **kwargs
+    ) -> TableMatrix:
+        """
+        Many-to-many travel times and distances, like ``OSRMClient.table_matrix``.
+
+        Sources are searched in batches with SciPy's Dijkstra. Distances are
+        the lengths of the fastest paths, summed along each shortest-path
+        tree by pointer jumping.
+
+        Args:
+            coordinates (Coordinates): All coordinates in the problem
+            profile (OSRMProfile, optional): Ignored
+            sources (List[int], optional): Indices of source coordinates (default: all)
+            destinations (List[int], optional): Indices of destination coordinates (default: all)
+            with_distances (bool, optional): Also compute distances (NaN otherwise)
+            **kwargs: Tiling options of ``OSRMClient.table_matrix``; ignored
+
+        Returns:
+            TableMatrix: Matrices of shape (len(sources), len(destinations))
+        """
+        nodes, _ = self.snap(coordinates)
+        source_nodes = nodes if sources is None else nodes[list(sources)]
+        destination_nodes = nodes if destinations is None else nodes[list(destinations)]
+        return self._node_table(source_nodes, destination_nodes, with_distances)
+
+    def _node_table(
+        self, source_nodes: np.ndarray, destination_nodes: np.ndarray, with_distances: bool
+    ) -> TableMatrix:
+        """Travel times and distances between snapped nodes."""
+        durations = np.full((len(source_nodes), len(destination_nodes)), np.nan)
+        distances = np.full_like(durations, np.nan)
+
+        for start in range(0, len(source_nodes), self.table_batch):
+            batch = source_nodes[start:start + self.table_batch]
+            times, predecessors = dijkstra(self._forward, indices=batch, return_predecessors=True)
+            rows = slice(start, start + len(batch))
+            durations[rows] = times[:, destination_nodes]
+            if with_distances:
+                distances[rows] = self._tree_lengths(predecessors)[:, destination_nodes]
+        durations[~np.isfinite(durations)] = np.nan
+        distances[np.isnan(durations)] = np.nan
+        return TableMatrix(durations=durations, distances=distances)
+
+    def _tree_lengths(self, predecessors: np.ndarray) -> np.ndarray:
+        """Path length from the root of each shortest-path tree to every node."""
+        reached = predecessors >= 0
+        rows, nodes = np.nonzero(reached)
+        lengths = np.zeros(predecessors.shape)
+        lengths[rows, nodes] = self.graph.lengths[self.graph.edge_ids(predecessors[rows, nodes], nodes)]
+        jump = np.where(reached, predecessors, -1)
+        # Each pass doubles the path span summed into every node
+        while np.any(jump >= 0):
+            valid = jump >= 0
+            safe = np.where(valid, jump, 0)
+            lengths = lengths + np.where(valid, np.take_along_axis(lengths, safe, axis=1), 0.0)
+            jump = np.where(valid, np.take_along_axis(jump, safe, axis=1), -1)
+        return lengths
+
+    def table(
+        self,
+        coordinates: Coordinates,
+        *,
+        profile: OSRMProfile = OSRMProfile.DRIVING,
+        sources: Optional[List[int]] = None,
+        destinations: Optional[List[int]] = None,
+        annotations: Optional[Tuple[str, ...]] = None
+    ) -> Dict:
+        """
+        Distance/duration table shaped like ``OSRMClient.table``.
+
+        Args:
+            coordinates (Coordinates): Coordinates to compute table for
+            profile (OSRMProfile, optional): Ignored
+            sources (List[int], optional): Indices of source coordinates
+            destinations (List[int], optional): Indices of destination coordinates
+            annotations (Tuple[str, ...], optional): Matrices to return,
+                e.g. ``("duration", "distance")``; durations only by default
+
+        Returns:
+            Dict: ``{"code": "Ok", "durations": ..., ...}`` with None for unreachable pairs
+        """
+        annotations = annotations or ("duration",)
+        nodes, snap_distances = self.snap(coordinates)
+        source_idx = np.arange(len(nodes)) if sources is None else np.asarray(sources)
+        destination_idx = np.arange(len(nodes)) if destinations is None else np.asarray(destinations)
+        matrix = self._node_table(nodes[source_idx], nodes[destination_idx], "distance" in annotations)
+        response = {
+            "code": "Ok",
+            "sources": self._waypoints(nodes[source_idx], snap_distances[source_idx]),
+            "destinations": self._waypoints(nodes[destination_idx], snap_distances[destination_idx]),
+        }
+        for name, values in (("duration", matrix.durations), ("distance", matrix.distances)):
+            if name in annotations:
+                response[f"{name}s"] = [
+                    [None if math.isnan(v) else v for v in row] for row in values.tolist()
+                ]
+        return response
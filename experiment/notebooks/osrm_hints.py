@@ -0,0 +1,232 @@
+"""
+Persistent snapping hints for the OSRM client.
+
+OSRM returns a ``hint`` with every waypoint that lets later requests skip
+snapping that coordinate to the road network. ``HintStore`` keeps the hint
+and snapped position of each distinct location, keyed by quantized
+coordinates and profile, in SQLite. Hints are only meaningful for the
+processed map they came from, so the store is tagged with a map version and
+emptied when it changes. Locations OSRM could not snap are remembered in
+memory for a short time so they are not requested again on every call.
+"""
+
+import glob
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def processed_map_version(
+    region: str = "malaysia-singapore-brunei", data_dir: str = "osrm-data"
+) -> str:
+    """
+    Fingerprint the processed map written by ``00.py osrm process-map``.
+
+    The fingerprint covers the name, size and modification time of every
+    ``{region}-latest.osrm*`` file, so it changes whenever the map is
+    re-extracted, re-partitioned or re-customized.
+
+    Args:
+        region (str, optional): Region the map was processed for
+        data_dir (str, optional): Directory holding the processed map
+
+    Returns:
+        str: Version string, empty if no processed map exists
+    """
+    pattern = os.path.join(os.path.abspath(data_dir), f"{region}-latest.osrm*")
+    files = sorted(glob.glob(pattern))
+    if not files:
+        return ""
+    digest = hashlib.sha1()
+    for path in files:
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class HintStats:
+    """
+    Snapshot of hint store activity.
+
+    Attributes:
+        hits (int): Coordinates that had a stored hint
+        misses (int): Coordinates without a stored hint
+        size (int): Locations currently stored
+    """
+    hits: int = 0
+    misses: int = 0
+    size: int = 0
+
+
+class HintStore:
+    """
+    Thread-safe store of OSRM waypoint hints and snapped coordinates.
+
+    Args:
+        path (str, optional): SQLite file; ":memory:" keeps hints for this process only
+        map_version (str, optional): Version of the processed map; stored hints
+            from another version are discarded. Defaults to ``processed_map_version()``
+        precision (int, optional): Decimal places coordinates are rounded to
+            when looking up hints
+        failure_ttl (float, optional): Seconds a location OSRM could not snap
+            is skipped before it is tried again
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        map_version: Optional[str] = None,
+        precision: int = 6,
+        failure_ttl: float = 5 * 60,
+    ):
+        if map_version is None:
+            map_version = processed_map_version()
+        self.path = path
+        self.map_version = map_version
+        self.precision = precision
+        self.failure_ttl = failure_ttl
+        self._lock = threading.Lock()
+        self._stats = HintStats()
+        self._hints: Dict[Tuple[str, int, int], Tuple[str, float, float]] = {}
+        # Expiry time of each location that failed to snap
+        self._failures: Dict[Tuple[str, int, int], float] = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS hints ("
+            "profile TEXT NOT NULL, lon INTEGER NOT NULL, lat INTEGER NOT NULL, "
+            "hint TEXT NOT NULL, snapped_lon REAL NOT NULL, snapped_lat REAL NOT NULL, "
+            "PRIMARY KEY (profile, lon, lat))"
+        )
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'map_version'").fetchone()
+        if row is None or row[0] != map_version:
+            self._db.execute("DELETE FROM hints")
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('map_version', ?)", (map_version,)
+            )
+        self._db.commit()
+        for profile, lon, lat, hint, snapped_lon, snapped_lat in self._db.execute("SELECT * FROM hints"):
+            self._hints[(profile, lon, lat)] = (hint, snapped_lon, snapped_lat)
+
+    def _keys(self, profile: str, coordinates: np.ndarray) -> List[Tuple[str, int, int]]:
+        grid = np.rint(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2) * 10 ** self.precision)
+        return [(profile, lon, lat) for lon, lat in grid.astype(np.int64).tolist()]
+
+    def lookup(self, profile: str, coordinates: np.ndarray) -> List[Optional[str]]:
+        """
+        Stored hints for coordinates.
+
+        Args:
+            profile (str): Routing profile name
+            coordinates (np.ndarray): (n, 2) array of (lon, lat)
+
+        Returns:
+            List[Optional[str]]: Hint per coordinate, None where unknown
+        """
+        with self._lock:
+            entries = [self._hints.get(key) for key in self._keys(profile, coordinates)]
+            found = sum(entry is not None for entry in entries)
+            self._stats.hits += found
+            self._stats.misses += len(entries) - found
+        return [entry[0] if entry is not None else None for entry in entries]
+
+    def snapped(self, profile: str, coordinates: np.ndarray) -> np.ndarray:
+        """
+        Stored snapped positions for coordinates.
+
+        Args:
+            profile (str): Routing profile name
+            coordinates (np.ndarray): (n, 2) array of (lon, lat)
+
+        Returns:
+            np.ndarray: (n, 2) snapped (lon, lat), NaN where unknown
+        """
+        with self._lock:
+            entries = [self._hints.get(key) for key in self._keys(profile, coordinates)]
+        snapped = np.full((len(entries), 2), np.nan)
+        for i, entry in enumerate(entries):
+            if entry is not None:
+                snapped[i] = entry[1:]
+        return snapped
+
+    def put_many(
+        self,
+        profile: str,
+        coordinates: np.ndarray,
+        hints: Sequence[str],
+        snapped: np.ndarray,
+    ) -> None:
+        """
+        Store hints and snapped positions.
+
+        Args:
+            profile (str): Routing profile name
+            coordinates (np.ndarray): (n, 2) requested (lon, lat)
+            hints (Sequence[str]): Waypoint hint per coordinate
+            snapped (np.ndarray): (n, 2) snapped (lon, lat) per coordinate
+        """
+        keys = self._keys(profile, coordinates)
+        rows = [
+            (*key, hint, float(lon), float(lat))
+            for key, hint, (lon, lat) in zip(keys, hints, np.asarray(snapped).tolist())
+        ]
+        with self._lock:
+            for profile_, lon_key, lat_key, hint, lon, lat in rows:
+                self._hints[(profile_, lon_key, lat_key)] = (hint, lon, lat)
+            self._db.executemany("INSERT OR REPLACE INTO hints VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def put_failures(self, profile: str, coordinates: np.ndarray) -> None:
+        """
+        Remember that coordinates could not be snapped, for ``failure_ttl`` seconds.
+
+        Args:
+            profile (str): Routing profile name
+            coordinates (np.ndarray): (n, 2) requested (lon, lat)
+        """
+        expires = time.monotonic() + self.failure_ttl
+        with self._lock:
+            for key in self._keys(profile, coordinates):
+                self._failures[key] = expires
+
+    def failed(self, profile: str, coordinates: np.ndarray) -> List[bool]:
+        """
+        Whether each coordinate recently failed to snap.
+
+        Args:
+            profile (str): Routing profile name
+            coordinates (np.ndarray): (n, 2) array of (lon, lat)
+
+        Returns:
+            List[bool]: True where a failure is stored and has not expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, expires in self._failures.items() if expires <= now]:
+                del self._failures[key]
+            return [key in self._failures for key in self._keys(profile, coordinates)]
+
+    def stats(self) -> HintStats:
+        """Copy of the counters with the current size."""
+        with self._lock:
+            return HintStats(self._stats.hits, self._stats.misses, len(self._hints))
+
+    def clear(self) -> None:
+        """Drop every stored hint."""
+        with self._lock:
+            self._hints.clear()
+            self._failures.clear()
+            self._db.execute("DELETE FROM hints")
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._db.close()
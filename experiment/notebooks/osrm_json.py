@@ -0,0 +1,161 @@
+"""
+JSON decoding for OSRM responses.
+
+``loads`` uses orjson when it is installed and falls back to the standard
+library otherwise. ``TableStreamParser`` decodes the ``durations`` and
+``distances`` grids of a table response incrementally, chunk by chunk,
+writing each matrix row straight into a preallocated NumPy array instead of
+building the nested Python lists a full JSON parse would create.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional fast backend
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON document with the fastest available backend.
+
+    Args:
+        data (Union[bytes, str]): JSON document
+
+    Returns:
+        Any: Decoded object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+_GRID_KEYS = {b'"durations"': "durations", b'"distances"': "distances"}
+_KEY_PATTERN = re.compile(rb'"(?:durations|distances)"\s*:\s*\[')
+_CODE_PATTERN = re.compile(rb'"code"\s*:\s*"([^"]*)"')
+# Bytes kept between chunks while searching, enough to hold a split key
+_SEEK_TAIL = 64
+_SEPARATORS = frozenset(b" \t\r\n,")
+_CLOSE = ord("]")
+
+
+class TableStreamParser:
+    """
+    Incremental parser for OSRM table responses.
+
+    Feed response body chunks in order, then call ``close``. Grids present in
+    the response are written row by row into arrays of shape
+    ``(n_sources, n_destinations)``; ``null`` cells become NaN. Everything
+    else in the body (waypoints, fallback cells) is skipped.
+
+    Args:
+        n_sources (int): Number of rows in each grid
+        n_destinations (int): Number of columns in each grid
+    """
+
+    def __init__(self, n_sources: int, n_destinations: int):
+        self.shape = (n_sources, n_destinations)
+        self.grids: Dict[str, np.ndarray] = {}
+        self.code: Optional[str] = None
+        self._buffer = bytearray()
+        self._grid: Optional[np.ndarray] = None
+        self._row = 0
+        self._pos = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Consume the next chunk of the response body.
+
+        Args:
+            chunk (bytes): Next bytes of the body
+
+        Raises:
+            ValueError: If a grid row does not match the expected shape
+        """
+        self._buffer += chunk
+        while self._seek() if self._grid is None else self._read_row():
+            pass
+        # Drop consumed bytes once per chunk rather than once per row
+        del self._buffer[:self._pos]
+        self._pos = 0
+
+    def _seek(self) -> bool:
+        """Find the start of the next grid. Returns False when more data is needed."""
+        if self.code is None:
+            code = _CODE_PATTERN.search(self._buffer, self._pos)
+            if code is not None:
+                self.code = code.group(1).decode()
+        match = _KEY_PATTERN.search(self._buffer, self._pos)
+        if match is None:
+            self._pos = max(self._pos, len(self._buffer) - _SEEK_TAIL)
+            return False
+        name = _GRID_KEYS[bytes(self._buffer[match.start():match.start() + 11])]
+        self._grid = np.full(self.shape, np.nan)
+        self.grids[name] = self._grid
+        self._row = 0
+        self._pos = match.end()
+        return True
+
+    def _read_row(self) -> bool:
+        """Parse the next row or the end of the grid. Returns False when more data is needed."""
+        buffer = self._buffer
+        while self._pos < len(buffer) and buffer[self._pos] in _SEPARATORS:
+            self._pos += 1
+        if self._pos == len(buffer):
+            return False
+        if buffer[self._pos] == _CLOSE:
+            if self._row != self.shape[0]:
+                raise ValueError(f"Table grid has {self._row} rows, expected {self.shape[0]}")
+            self._pos += 1
+            self._grid = None
+            return True
+        end = buffer.find(b"]", self._pos)
+        if end < 0:
+            return False
+        if self._row >= self.shape[0]:
+            raise ValueError(f"Table grid has more than {self.shape[0]} rows")
+        row = bytes(buffer[self._pos + 1:end]).replace(b"null", b"nan")
+        values = np.fromstring(row, dtype=np.float64, sep=",") if row.strip() else np.empty(0)
+        if values.size != self.shape[1]:
+            raise ValueError(f"Table row has {values.size} cells, expected {self.shape[1]}")
+        self._grid[self._row] = values
+        self._row += 1
+        self._pos = end + 1
+        return True
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish parsing.
+
+        Returns:
+            Dict[str, Any]: ``{"code": ..., "durations": array, "distances": array}``
+            with whichever grids the response contained
+
+        Raises:
+            ValueError: If the body ended inside a grid
+        """
+        if self._grid is not None:
+            raise ValueError("Table response ended inside a grid")
+        return {"code": self.code, **self.grids}
+
+
+def parse_table_stream(chunks: Iterable[bytes], shape: Tuple[int, int]) -> Dict[str, Any]:
+    """
+    Parse an OSRM table response body from an iterable of chunks.
+
+    Args:
+        chunks (Iterable[bytes]): Response body, e.g. ``response.iter_content(...)``
+        shape (Tuple[int, int]): (n_sources, n_destinations) of the request
+
+    Returns:
+        Dict[str, Any]: See ``TableStreamParser.close``
+    """
+    parser = TableStreamParser(*shape)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
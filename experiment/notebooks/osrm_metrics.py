@@ -0,0 +1,184 @@
+"""
+Client-side instrumentation for OSRM requests.
+
+``ClientMetrics`` records, per service and backend, a latency histogram,
+request/response byte counts, coordinate counts and errors, plus cache hits
+and misses per service. Snapshots export as Prometheus text format or JSON.
+"""
+
+import bisect
+import json
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class _Series:
+    """Counters for one (service, backend) pair."""
+    requests: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    latency_sum: float = 0.0
+    latency_buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    request_bytes: int = 0
+    response_bytes: int = 0
+    coordinates: int = 0
+
+
+class ClientMetrics:
+    """
+    Thread-safe metrics registry for one or more OSRM clients.
+
+    Args:
+        prefix (str, optional): Prefix of exported Prometheus metric names
+    """
+
+    def __init__(self, prefix: str = "osrm_client"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._cache: Dict[str, Dict[str, int]] = {}
+
+    def record_request(
+        self,
+        service: str,
+        backend: str,
+        latency: float,
+        request_bytes: int,
+        response_bytes: int,
+        coordinates: int,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Record one HTTP request.
+
+        Args:
+            service (str): OSRM service name
+            backend (str): Base URL the request went to
+            latency (float): Seconds from sending to the decoded response
+            request_bytes (int): Size of the request line and query string
+            response_bytes (int): Size of the response body
+            coordinates (int): Coordinates in the request
+            error (str, optional): Error kind (HTTP status or "network") if it failed
+        """
+        with self._lock:
+            series = self._series.setdefault((service, backend), _Series())
+            series.requests += 1
+            series.latency_sum += latency
+            series.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            series.request_bytes += request_bytes
+            series.response_bytes += response_bytes
+            series.coordinates += coordinates
+            if error is not None:
+                series.errors[error] = series.errors.get(error, 0) + 1
+
+    def record_cache(self, service: str, hit: bool) -> None:
+        """
+        Record a response cache lookup.
+
+        Args:
+            service (str): OSRM service name
+            hit (bool): Whether the response came from the cache
+        """
+        with self._lock:
+            counts = self._cache.setdefault(service, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def snapshot(self) -> Dict:
+        """
+        Current values of every metric.
+
+        Returns:
+            Dict: JSON-serializable snapshot with ``requests`` (one entry per
+            service and backend) and ``cache`` (hits/misses per service)
+        """
+        with self._lock:
+            requests = []
+            for (service, backend), series in sorted(self._series.items()):
+                cumulative, buckets = 0, {}
+                for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), series.latency_buckets):
+                    cumulative += count
+                    buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+                requests.append({
+                    "service": service,
+                    "backend": backend,
+                    "requests": series.requests,
+                    "errors": dict(series.errors),
+                    "latency_seconds_sum": series.latency_sum,
+                    "latency_seconds_mean": series.latency_sum / series.requests if series.requests else 0.0,
+                    "latency_seconds_buckets": buckets,
+                    "request_bytes": series.request_bytes,
+                    "response_bytes": series.response_bytes,
+                    "coordinates": series.coordinates,
+                })
+            cache = {service: dict(counts) for service, counts in sorted(self._cache.items())}
+        return {"requests": requests, "cache": cache}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Snapshot as a JSON document."""
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """
+        Snapshot in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text, ending with a newline
+        """
+        p = self.prefix
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {p}_request_duration_seconds OSRM request latency.",
+            f"# TYPE {p}_request_duration_seconds histogram",
+        ]
+        for entry in snapshot["requests"]:
+            labels = f'service="{entry["service"]}",backend="{entry["backend"]}"'
+            for bound, count in entry["latency_seconds_buckets"].items():
+                lines.append(f'{p}_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{p}_request_duration_seconds_sum{{{labels}}} {entry['latency_seconds_sum']}")
+            lines.append(f"{p}_request_duration_seconds_count{{{labels}}} {entry['requests']}")
+
+        counters = [
+            ("request_bytes_total", "request_bytes", "Bytes sent in request lines and query strings."),
+            ("response_bytes_total", "response_bytes", "Bytes received in response bodies."),
+            ("coordinates_total", "coordinates", "Coordinates sent."),
+        ]
+        for name, key, help_text in counters:
+            lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} counter"]
+            for entry in snapshot["requests"]:
+                labels = f'service="{entry["service"]}",backend="{entry["backend"]}"'
+                lines.append(f"{p}_{name}{{{labels}}} {entry[key]}")
+
+        lines += [f"# HELP {p}_errors_total Failed requests.", f"# TYPE {p}_errors_total counter"]
+        for entry in snapshot["requests"]:
+            for kind, count in sorted(entry["errors"].items()):
+                labels = f'service="{entry["service"]}",backend="{entry["backend"]}",error="{kind}"'
+                lines.append(f"{p}_errors_total{{{labels}}} {count}")
+
+        lines += [f"# HELP {p}_cache_lookups_total Response cache lookups.", f"# TYPE {p}_cache_lookups_total counter"]
+        for service, counts in snapshot["cache"].items():
+            for key, result in (("hits", "hit"), ("misses", "miss")):
+                labels = f'service="{service}",result="{result}"'
+                lines.append(f"{p}_cache_lookups_total{{{labels}}} {counts[key]}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """
+        Write a snapshot to a file, or to stdout when ``path`` is "-".
+
+        Files ending in ``.prom`` or ``.txt`` get the Prometheus text format;
+        anything else (and stdout) gets JSON.
+
+        Args:
+            path (str): Destination file or "-"
+        """
+        if path == "-":
+            sys.stdout.write(self.to_json() + "\n")
+            return
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json() + "\n"
+        with open(path, "w") as f:
+            f.write(text)
@@ -1,14 +1,47 @@
 """Route Optimization Module for Clustering and Route Generation."""
 
+import asyncio
 import csv
+import io
+import json
 import math
-from typing import List, Dict, Tuple
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Dict, Iterable, Iterator, TextIO, Tuple, Optional, Union
 
 import numpy as np
 import requests
 from sklearn.cluster import KMeans
+from sklearn.neighbors import BallTree, NearestNeighbors
 from sklearn.preprocessing import StandardScaler
-from .notebooks.osrm import OSRMClient, Coordinate, OSRMOverview, OSRMGeometry
+from .notebooks.osrm import OSRMClient, OSRMRequestError, CoordinateArray, OSRMOverview, OSRMGeometry
+from .notebooks.osrm_cache import ResponseCache
+from .notebooks.osrm_cassette import Cassette
+from .matrix_store import MatrixStore, coordinate_ids
+from .tsp import solve_tsp
+
+# Points may be (latitude, longitude) tuples, an (n, 2) lat/lon array or a
+# CoordinateArray (which stores lon/lat and is converted accordingly)
+Points = Union[List[Tuple[float, float]], np.ndarray, CoordinateArray]
+
+
+def as_latlon_array(points: Points) -> np.ndarray:
+    """
+    Convert any supported point container to an (n, 2) latitude/longitude array.
+    
+    Args:
+        points: Points in any supported container
+    
+    Returns:
+        Float64 array of (latitude, longitude) rows; no copy for float64 arrays
+    """
+    if isinstance(points, CoordinateArray):
+        return points.to_latlon()
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -35,20 +68,333 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     
     return R * c
 
-def validate_coordinates(points: List[Tuple[float, float]]) -> bool:
+# Earth's radius in kilometers, shared by the array kernels below
+EARTH_RADIUS_KM = 6371.0
+
+def _unit_vectors(points: Points) -> np.ndarray:
+    """(n, 3) positions on the unit sphere, computed once per point."""
+    X = np.radians(as_latlon_array(points))
+    cos_lat = np.cos(X[:, 0])
+    return np.column_stack((cos_lat * np.cos(X[:, 1]), cos_lat * np.sin(X[:, 1]), np.sin(X[:, 0])))
+
+def _chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Great circle distance in km from the straight-line distance on the unit sphere."""
+    # Equivalent to haversine, without the 1 - cos(d) cancellation at short range
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+
+def haversine_rowwise(a: Points, b: Points) -> np.ndarray:
+    """
+    Great circle distance between matching rows of two point arrays.
+    
+    Args:
+        a: n (latitude, longitude) points
+        b: n (latitude, longitude) points
+    
+    Returns:
+        (n,) distances in kilometers
+    """
+    return _chord_to_km(np.linalg.norm(_unit_vectors(a) - _unit_vectors(b), axis=1))
+
+def haversine_one_to_many(point: Tuple[float, float], points: Points) -> np.ndarray:
+    """
+    Great circle distance from one point to many.
+    
+    Args:
+        point: (latitude, longitude) origin
+        points: n (latitude, longitude) destinations
+    
+    Returns:
+        (n,) distances in kilometers
+    """
+    return _chord_to_km(np.linalg.norm(_unit_vectors(points) - _unit_vectors([point]), axis=1))
+
+def haversine_pairwise(a: Points, b: Optional[Points] = None) -> np.ndarray:
+    """
+    Great circle distance between every pair of points.
+    
+    Each point is converted to a unit vector once, so an (n, m) matrix
+    costs O(n + m) trig calls; pairs only need differences and one arcsin.
+    
+    Args:
+        a: n (latitude, longitude) points
+        b: m (latitude, longitude) points; ``a`` against itself if omitted
+    
+    Returns:
+        (n, m) distances in kilometers
+    """
+    u = _unit_vectors(a)
+    v = u if b is None else _unit_vectors(b)
+    squared = np.zeros((len(u), len(v)))
+    for axis in range(3):
+        squared += np.subtract.outer(u[:, axis], v[:, axis]) ** 2
+    return _chord_to_km(np.sqrt(squared))
+
+class SpatialIndex:
+    """
+    Ball tree over (latitude, longitude) points for nearest-neighbour and
+    radius queries with great circle distances.
+    
+    Args:
+        points: (latitude, longitude) points to index
+        leaf_size: Ball tree leaf size
+    """
+    
+    def __init__(self, points: Points, leaf_size: int = 40):
+        self.points = as_latlon_array(points)
+        self._tree = BallTree(np.radians(self.points), leaf_size=leaf_size, metric='haversine')
+    
+    def __len__(self) -> int:
+        return len(self.points)
+    
+    def query(self, points: Points, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest indexed points.
+        
+        Args:
+            points: (latitude, longitude) query points
+            k: Neighbours per query point
+        
+        Returns:
+            (distances in kilometers, indices), each of shape (len(points), k),
+            nearest first
+        """
+        distances, indices = self._tree.query(np.radians(as_latlon_array(points)), k=k)
+        return distances * EARTH_RADIUS_KM, indices
+    
+    def query_radius(
+        self,
+        points: Points,
+        radius_km: float,
+        return_distance: bool = False
+    ) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Indexed points within a radius.
+        
+        Args:
+            points: (latitude, longitude) query points
+            radius_km: Search radius in kilometers
+            return_distance: Also return distances, sorted nearest first
+        
+        Returns:
+            Object array of index arrays per query point, plus matching
+            distance arrays in kilometers if ``return_distance``
+        """
+        X = np.radians(as_latlon_array(points))
+        r = radius_km / EARTH_RADIUS_KM
+        if not return_distance:
+            return self._tree.query_radius(X, r=r)
+        indices, distances = self._tree.query_radius(X, r=r, return_distance=True, sort_results=True)
+        return indices, distances * EARTH_RADIUS_KM
+
+def validate_coordinates(points: Points) -> bool:
     """
     Validate that all coordinates are within acceptable ranges.
     
     Args:
-        points: List of (latitude, longitude) tuples
+        points: (latitude, longitude) points in any supported container
     
     Returns:
         Boolean indicating if all coordinates are valid
     """
-    for lat, lon in points:
-        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
-            return False
-    return True
+    X = as_latlon_array(points)
+    lat, lon = X[:, 0], X[:, 1]
+    return bool(np.all((lat >= -90) & (lat <= 90) & (lon >= -180) & (lon <= 180)))
+
+@dataclass
+class RowError:
+    """
+    A CSV row that could not be loaded.
+    
+    Attributes:
+        row: Data row index, counting from 0 after the header
+        message: Why the row was rejected
+    """
+    row: int
+    message: str
+
+@dataclass
+class LoadedPoints:
+    """
+    Points loaded from a CSV file.
+    
+    Attributes:
+        points: (n, 2) float64 array of valid (latitude, longitude) rows
+        rows: Data row index of each point
+        errors: Every rejected row, in file order
+    """
+    points: np.ndarray
+    rows: np.ndarray
+    errors: List[RowError] = field(default_factory=list)
+    
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+def _csv_header(path: str) -> Tuple[List[str], int]:
+    """Header fields and the byte offset where data rows start."""
+    with open(path, 'rb') as f:
+        line = f.readline()
+    header = next(csv.reader([line.decode('utf-8-sig')]), [])
+    return [name.strip() for name in header], len(line)
+
+def _chunk_ranges(path: str, start: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Split the data rows into byte ranges ending at newlines.
+    
+    A range is extended while it holds an odd number of quote characters, so
+    a quoted field spanning lines is never cut in two.
+    """
+    size = os.path.getsize(path)
+    if size <= start:
+        return []
+    ranges = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        quoted = mm.find(b'"', start) != -1
+        pos = start
+        while pos < size:
+            end = pos
+            quotes = 0
+            while True:
+                newline = mm.find(b'\n', min(end + chunk_bytes, size - 1))
+                nxt = size if newline == -1 else newline + 1
+                if quoted:
+                    quotes += mm[end:nxt].count(b'"')
+                end = nxt
+                if quotes % 2 == 0 or end >= size:
+                    break
+            ranges.append((pos, end))
+            pos = end
+    return ranges
+
+def _parse_fast(data: bytes, lat_idx: int, lon_idx: int, n_cols: int):
+    """
+    Parse a chunk of plain, regular rows with array operations.
+    
+    Returns (latitudes, longitudes), or None when the chunk has quotes,
+    blank or ragged rows, or fields that are not numbers.
+    """
+    if b'"' in data or not data:
+        return None
+    if not data.endswith(b'\n'):
+        data += b'\n'
+    buf = np.frombuffer(data, dtype=np.uint8)
+    delimiters = np.flatnonzero((buf == ord(',')) | (buf == ord('\n')))
+    if len(delimiters) % n_cols:
+        return None
+    ends = delimiters.reshape(-1, n_cols)
+    # Every row must end with its last delimiter, the newline
+    if not np.all(buf[ends[:, -1]] == ord('\n')) or np.any(buf[ends[:, :-1]] == ord('\n')):
+        return None
+    starts = np.concatenate(([0], delimiters[:-1] + 1)).reshape(-1, n_cols)
+    
+    columns = []
+    for idx in (lat_idx, lon_idx):
+        start, width = starts[:, idx], ends[:, idx] - starts[:, idx]
+        w = int(width.max()) if len(width) else 0
+        if w == 0:
+            return None
+        offsets = np.arange(w)
+        # Fixed-width byte strings padded with spaces; '\r' is whitespace too
+        chars = buf[np.minimum(start[:, None] + offsets, len(buf) - 1)]
+        chars = np.where(offsets < width[:, None], chars, ord(' ')).astype(np.uint8)
+        try:
+            columns.append(chars.view(f'S{w}').ravel().astype(np.float64))
+        except ValueError:
+            return None
+    return columns[0], columns[1]
+
+def _parse_rows(data: bytes, lat_idx: int, lon_idx: int):
+    """Parse a chunk row by row with the csv module, collecting (row, reason, fields) errors."""
+    reader = csv.reader(io.StringIO(data.decode('utf-8', errors='replace'), newline=''))
+    lat, lon, rows, errors = [], [], [], []
+    n_row = -1
+    for n_row, row in enumerate(reader):
+        if not row:
+            continue
+        try:
+            y, x = float(row[lat_idx]), float(row[lon_idx])
+        except IndexError:
+            errors.append((n_row, "missing latitude/longitude column", row))
+            continue
+        except ValueError:
+            errors.append((n_row, "float conversion failed", row))
+            continue
+        lat.append(y)
+        lon.append(x)
+        rows.append(n_row)
+    return np.array(lat), np.array(lon), np.array(rows, dtype=np.int64), n_row + 1, errors
+
+def _parse_range(path: str, start: int, end: int, lat_idx: int, lon_idx: int, n_cols: int):
+    """
+    Parse the rows in a byte range of a CSV file.
+    
+    Returns (latitudes, longitudes, rows, n_rows, errors) with rows and
+    errors numbered from the start of the range.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    fast = _parse_fast(data, lat_idx, lon_idx, n_cols)
+    if fast is None:
+        return _parse_rows(data, lat_idx, lon_idx)
+    lat, lon = fast
+    return lat, lon, np.arange(len(lat), dtype=np.int64), len(lat), []
+
+def load_points(filepath: str, chunk_bytes: int = 1 << 22, workers: int = 1) -> LoadedPoints:
+    """
+    Load latitude and longitude points from a CSV file, reporting bad rows.
+    
+    The file is parsed in byte-range chunks. Chunks of plain numeric rows are
+    parsed with array operations; chunks with quotes, blank or ragged rows,
+    or non-numeric values fall back to the csv module row by row. Every row is
+    validated in bulk, and rows that fail are reported instead of raised.
+    
+    Args:
+        filepath: Path to the CSV file, with 'latitude' and 'longitude' columns
+        chunk_bytes: Approximate size of each chunk
+        workers: Processes parsing chunks in parallel; 1 parses in-process
+    
+    Returns:
+        LoadedPoints with the valid points and the per-row error report
+    """
+    header, data_start = _csv_header(filepath)
+    try:
+        lat_idx, lon_idx = header.index('latitude'), header.index('longitude')
+    except ValueError:
+        raise ValueError(f"CSV file {filepath} needs 'latitude' and 'longitude' columns, got {header}")
+    args = [
+        (filepath, start, end, lat_idx, lon_idx, len(header))
+        for start, end in _chunk_ranges(filepath, data_start, chunk_bytes)
+    ]
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse_range, *zip(*args)))
+    else:
+        parsed = [_parse_range(*a) for a in args]
+    
+    lats, lons, rows, errors = [], [], [], []
+    offset = 0
+    for lat, lon, chunk_rows, n_rows, chunk_errors in parsed:
+        lats.append(lat)
+        lons.append(lon)
+        rows.append(chunk_rows + offset)
+        errors.extend(
+            RowError(n_row + offset, f"{reason}: {n_row + offset}:{fields}")
+            for n_row, reason, fields in chunk_errors
+        )
+        offset += n_rows
+    
+    X = np.column_stack((np.concatenate(lats), np.concatenate(lons))) if lats else np.empty((0, 2))
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    lat, lon = X[:, 0], X[:, 1]
+    valid = (lat >= -90) & (lat <= 90) & (lon >= -180) & (lon <= 180)
+    if not valid.all():
+        errors.extend(
+            RowError(r, f"Invalid coordinates in CSV file {r}:{[y, x]}")
+            for r, y, x in zip(rows[~valid].tolist(), lat[~valid].tolist(), lon[~valid].tolist())
+        )
+        errors.sort(key=lambda e: e.row)
+    return LoadedPoints(X[valid], rows[valid], errors)
 
 def load_points_from_csv(filepath: str) -> List[Tuple[float, float]]:
     """
@@ -59,72 +405,330 @@ def load_points_from_csv(filepath: str) -> List[Tuple[float, float]]:
     
     Returns:
         List of (latitude, longitude) tuples
+    
+    Raises:
+        ValueError: On the first row that fails to parse or validate; use
+            ``load_points`` for the full error report
+    """
+    loaded = load_points(filepath)
+    if loaded.errors:
+        raise ValueError(loaded.errors[0].message)
+    return [tuple(p) for p in loaded.points.tolist()]
+
+def project_points(points: Points) -> np.ndarray:
     """
-    points = []
-    with open(filepath, 'r') as csvfile:
-        reader = csv.reader(csvfile)
-        header = next(reader)  # Skip header
-        lat_col_idx = header.index('latitude')  
-        lon_col_idx = header.index('longitude')
-        # Validate coordinates
-        for n_row, row in enumerate(reader):
-            try:
-                lat, lon = float(row[lat_col_idx]), float(row[lon_col_idx])
-            except ValueError:
-                raise ValueError(f"float conversion failed: {n_row}:{row}")
-            if not validate_coordinates([(lat, lon)]):
-                raise ValueError(f"Invalid coordinates in CSV file {n_row}:{row}")
-            points.append((lat, lon))
-    
-    return points
-
-def cluster_destinations(points: List[Tuple[float, float]], max_cluster_size: int = 5) -> List[List[Tuple[float, float]]]:
+    Project (latitude, longitude) points to local planar coordinates in meters.
+    
+    Uses an equirectangular projection around the points' mean latitude,
+    which is accurate enough for city-scale clustering.
+    
+    Args:
+        points: (latitude, longitude) points in any supported container
+    
+    Returns:
+        (n, 2) array of (x, y) in meters
+    """
+    X = np.radians(as_latlon_array(points))
+    if len(X) == 0:
+        return np.empty((0, 2))
+    R = 6371000.0
+    return np.column_stack((R * X[:, 1] * np.cos(X[:, 0].mean()), R * X[:, 0]))
+
+def _propose(
+    labels: np.ndarray,
+    remaining: np.ndarray,
+    pending: np.ndarray,
+    candidates: np.ndarray,
+    costs: np.ndarray
+) -> None:
+    """
+    Assign pending points in proposal rounds, updating ``labels`` and ``remaining`` in place.
+    
+    Every unassigned point proposes to its next candidate center, and each
+    center accepts its cheapest proposers up to its remaining capacity.
+    Points rejected by all of their candidates stay unassigned.
+    
+    Args:
+        labels: Center index of each point, -1 while unassigned
+        remaining: Room left in each center
+        pending: Indices of the points to assign
+        candidates: (len(pending), m) candidate centers per point, best first
+        costs: Cost of each candidate, same shape
+    """
+    m = candidates.shape[1]
+    pointer = np.zeros(len(pending), dtype=np.int64)
+    active = np.arange(len(pending))
+    while len(active):
+        proposal = candidates[active, pointer[active]]
+        order = np.lexsort((costs[active, pointer[active]], proposal))
+        proposal, ranked = proposal[order], active[order]
+        # Rank of each proposer among those proposing to the same center
+        group_start = np.flatnonzero(np.r_[True, proposal[1:] != proposal[:-1]])
+        rank = np.arange(len(proposal)) - np.repeat(group_start, np.diff(np.r_[group_start, len(proposal)]))
+        accept = rank < remaining[proposal]
+        labels[pending[ranked[accept]]] = proposal[accept]
+        remaining -= np.bincount(proposal[accept], minlength=len(remaining))
+        pointer[ranked[~accept]] += 1
+        active = ranked[~accept]
+        active = active[pointer[active] < m]
+
+def _capacity_assign(
+    X: np.ndarray,
+    centers: np.ndarray,
+    capacity: int,
+    n_candidates: int = 8
+) -> np.ndarray:
+    """
+    Assign points to their nearest centers without exceeding a capacity.
+    
+    Points propose to their ``n_candidates`` nearest centers (see
+    ``_propose``); points that run out of candidates are retried against
+    the centers that still have room. A pass is O(n log k).
+    
+    Args:
+        X: (n, 2) projected points
+        centers: (k, 2) projected centers, with ``k * capacity >= n``
+        capacity: Maximum points per center
+        n_candidates: Nearest centers each point proposes to per pass
+    
+    Returns:
+        Center index of each point
+    """
+    labels = np.full(len(X), -1, dtype=np.int64)
+    remaining = np.full(len(centers), capacity, dtype=np.int64)
+    while np.any(labels < 0):
+        open_centers = np.flatnonzero(remaining > 0)
+        pending = np.flatnonzero(labels < 0)
+        m = min(n_candidates, len(open_centers))
+        distances, candidates = NearestNeighbors(n_neighbors=m).fit(centers[open_centers]).kneighbors(X[pending])
+        _propose(labels, remaining, pending, open_centers[candidates], distances)
+    return labels
+
+def _medoid_assign(D: np.ndarray, medoids: np.ndarray, capacity: int) -> np.ndarray:
+    """Assign points to the closest medoid in ``D`` without exceeding a capacity."""
+    costs = D[:, medoids]
+    candidates = np.argsort(costs, axis=1, kind='stable')
+    labels = np.full(len(D), -1, dtype=np.int64)
+    remaining = np.full(len(medoids), capacity, dtype=np.int64)
+    # Every point may try every medoid, so one pass assigns everything
+    _propose(labels, remaining, np.arange(len(D)), candidates, np.take_along_axis(costs, candidates, axis=1))
+    return labels
+
+def _morton_order(X: np.ndarray) -> np.ndarray:
+    """Order of points along a Z-order (Morton) curve, which keeps neighbours close."""
+    span = np.ptp(X, axis=0)
+    grid = ((X - X.min(axis=0)) / np.where(span > 0, span, 1) * 0xFFFF).astype(np.uint64)
+    
+    def spread(v: np.ndarray) -> np.ndarray:
+        # Insert a zero bit between each of the 16 low bits
+        v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF)
+        v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+        v = (v | (v << np.uint64(2))) & np.uint64(0x33333333)
+        return (v | (v << np.uint64(1))) & np.uint64(0x55555555)
+    
+    return np.argsort(spread(grid[:, 0]) | (spread(grid[:, 1]) << np.uint64(1)), kind='stable')
+
+def _balanced_labels(
+    X: np.ndarray,
+    max_cluster_size: int,
+    max_iter: int = 30,
+    tol: float = 1e-3
+) -> np.ndarray:
+    """
+    Capacity-constrained k-means labels for projected points.
+    
+    Centers are seeded with the means of consecutive runs of points along a
+    Morton curve, which is O(n log n) where k-means++ seeding is O(n k).
+    Iteration stops once fewer than ``tol`` of the points change cluster.
+    """
+    n_clusters = max(1, math.ceil(len(X) / max_cluster_size))
+    runs = np.arange(len(X)) * n_clusters // len(X)
+    order = _morton_order(X)
+    counts = np.bincount(runs, minlength=n_clusters)
+    centers = np.column_stack([
+        np.bincount(runs, weights=X[order, dim], minlength=n_clusters) / counts
+        for dim in range(X.shape[1])
+    ])
+    labels = None
+    for _ in range(max_iter):
+        new_labels = _capacity_assign(X, centers, max_cluster_size)
+        if labels is not None and np.count_nonzero(new_labels != labels) <= tol * len(X):
+            labels = new_labels
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=n_clusters)
+        filled = counts > 0
+        for dim in range(X.shape[1]):
+            centers[filled, dim] = np.bincount(labels, weights=X[:, dim], minlength=n_clusters)[filled] / counts[filled]
+    return labels
+
+def _kmedoids_labels(
+    durations: np.ndarray,
+    max_cluster_size: int,
+    max_iter: int = 30,
+    random_state: int = 42
+) -> np.ndarray:
+    """
+    Capacity-constrained k-medoids labels on a travel time matrix.
+    
+    Travel times are symmetrised (a stop is as close as the average of the
+    two directions) and unreachable pairs get a prohibitive cost. Medoids
+    are seeded k-means++ style, then assignment and medoid updates
+    alternate until the medoids stop changing. Each medoid update scores
+    every point against its own cluster at once with ``np.add.reduceat``.
+    """
+    D = np.asarray(durations, dtype=np.float64)
+    D = (D + D.T) / 2
+    finite = np.isfinite(D)
+    D = np.where(finite, D, (D[finite].max() if finite.any() else 1.0) * len(D) + 1.0)
+    n = len(D)
+    n_clusters = max(1, math.ceil(n / max_cluster_size))
+    
+    # Seed: each medoid drawn with probability proportional to squared distance
+    rng = np.random.default_rng(random_state)
+    medoids = [int(rng.integers(n))]
+    closest = D[medoids[0]].copy()
+    for _ in range(n_clusters - 1):
+        weights = closest ** 2
+        weights[medoids] = 0
+        total = weights.sum()
+        if total > 0:
+            medoid = int(rng.choice(n, p=weights / total))
+        else:
+            medoid = int(rng.choice(np.setdiff1d(np.arange(n), medoids)))
+        medoids.append(medoid)
+        closest = np.minimum(closest, D[medoid])
+    medoids = np.array(medoids)
+    
+    for _ in range(max_iter):
+        labels = _medoid_assign(D, medoids, max_cluster_size)
+        # Total time from every point to the members of its own cluster
+        order = np.argsort(labels, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(labels[order]) != 0])
+        group = np.searchsorted(labels[order][starts], labels)
+        cost = np.add.reduceat(D[:, order], starts, axis=1)[np.arange(n), group]
+        # New medoid: the cheapest member of each cluster
+        best = np.lexsort((cost, labels))
+        first = np.r_[True, labels[best][1:] != labels[best][:-1]]
+        new_medoids = medoids.copy()
+        new_medoids[labels[best][first]] = best[first]
+        if np.array_equal(new_medoids, medoids):
+            break
+        medoids = new_medoids
+    return labels
+
+def cluster_destinations(
+    points: Points,
+    max_cluster_size: int = 5,
+    method: str = 'kmeans',
+    durations: Optional[np.ndarray] = None
+) -> List[List[Tuple[float, float]]]:
     """
     Cluster destinations using a modified K-Means approach.
     
+    ``method='kmeans'`` runs plain K-Means on latitude/longitude with
+    ``ceil(n / max_cluster_size)`` clusters, which does not enforce the
+    size limit. ``method='balanced'`` projects the points to meters, seeds
+    centers from runs of points along a Morton curve and alternates
+    capacity-constrained assignment with center updates, so no cluster
+    exceeds ``max_cluster_size``.
+    ``method='kmedoids'`` clusters on road travel times instead of
+    straight-line distance, also within ``max_cluster_size``, so stops on
+    opposite sides of a river or highway are kept apart.
+    
     Args:
-        points: List of (latitude, longitude) points
+        points: (latitude, longitude) points in any supported container
         max_cluster_size: Maximum number of destinations per cluster
+        method: 'kmeans', 'balanced' or 'kmedoids'
+        durations: (n, n) travel times between the points, required for
+            'kmedoids'; e.g. from ``OSRMClient.table_matrix`` (through its
+            response cache) or a ``MatrixStore``
     
     Returns:
         List of clusters, where each cluster is a list of (latitude, longitude) points
     """
     # Prepare data for clustering
-    X = np.array(points)
-    
-    # Determine optimal number of clusters
-    n_clusters = max(1, math.ceil(len(points) / max_cluster_size))
+    X = as_latlon_array(points)
+    if len(X) == 0:
+        return []
     
-    # Perform clustering
-    kmeans = KMeans(n_clusters=n_clusters, n_init=10, random_state=42)
-    kmeans.fit(X)
+    if method == 'balanced':
+        labels = _balanced_labels(project_points(X), max_cluster_size)
+    elif method == 'kmedoids':
+        if durations is None or np.shape(durations) != (len(X), len(X)):
+            raise ValueError("method='kmedoids' needs an (n, n) durations matrix")
+        labels = _kmedoids_labels(durations, max_cluster_size)
+    elif method == 'kmeans':
+        # Determine optimal number of clusters
+        n_clusters = max(1, math.ceil(len(X) / max_cluster_size))
+        
+        # Perform clustering
+        kmeans = KMeans(n_clusters=n_clusters, n_init=10, random_state=42)
+        labels = kmeans.fit(X).labels_
+    else:
+        raise ValueError(f"Unknown clustering method: {method}")
     
-    # Group points by cluster
-    clusters = [[] for _ in range(n_clusters)]
-    for point, label in zip(points, kmeans.labels_):
-        clusters[label].append(point)
-    
-    return clusters
+    # Group points by cluster, keeping input order within each cluster
+    order = np.argsort(labels, kind='stable')
+    bounds = np.flatnonzero(np.diff(labels[order])) + 1
+    return [list(map(tuple, group.tolist())) for group in np.split(X[order], bounds)]
 
-def optimize_route(points: List[Tuple[float, float]], osrm_url: str = 'http://localhost:5000') -> Dict:
+def optimize_route(
+    points: Points,
+    osrm_url: str = 'http://localhost:5000',
+    client: Optional[OSRMClient] = None,
+    sequence: bool = False,
+    roundtrip: bool = False,
+    matrix_store: Optional[MatrixStore] = None,
+    end: Optional[int] = None
+) -> Dict:
     """
     Optimize route using OSRM service.
     
+    With ``sequence``, the stops are reordered before routing: one table
+    request (served from the client's cache when possible) gives the
+    duration matrix, the stop order is solved in-process with
+    ``tsp.solve_tsp``, and a single route request fetches the geometry.
+    The first point stays the start, and the point at ``end`` (if given)
+    stays the last stop. With a ``matrix_store`` the matrix is read from the
+    store, which only requests rows for unseen points.
+    
     Args:
-        points: List of (latitude, longitude) points to route
-        osrm_url: Base URL for OSRM service
+        points: (latitude, longitude) points to route, in any supported container
+        osrm_url: Base URL for OSRM service, used when no client is given
+        client: Shared OSRM client; reusing one keeps its connections alive
+        sequence: Reorder stops to minimise travel time before routing
+        roundtrip: With ``sequence``, return to the first point at the end
+        matrix_store: Persistent matrices to sequence from, keyed by
+            ``matrix_store.coordinate_ids``
+        end: With ``sequence``, index of the point to finish at, e.g. a depot
+            other than the start; cannot be combined with ``roundtrip``
     
     Returns:
-        OSRM routing response
+        OSRM routing response; its waypoints follow the visiting order
     """
     if len(points) < 2:
         raise ValueError("At least two points are required for routing")
+    if roundtrip and end is not None:
+        raise ValueError("roundtrip and end cannot be combined; a round trip ends at the start")
+    
+    # Reuse the caller's client so its connection pool survives across clusters
+    if client is None:
+        client = OSRMClient(osrm_url)
     
-    # Create OSRM Client
-    client = OSRMClient(osrm_url)
+    # Convert points to the client's lon/lat array without per-point objects
+    coordinates = points if isinstance(points, CoordinateArray) else CoordinateArray.from_latlon(points)
     
-    # Convert points to Coordinate objects
-    coordinates = [Coordinate(lon, lat) for lat, lon in points]
+    # Sequence stops on the duration matrix, leaving one route call for geometry
+    if sequence:
+        if matrix_store is not None:
+            ids = coordinate_ids(coordinates)
+            matrix_store.add(ids, coordinates, client)
+            durations = matrix_store.matrix(ids).durations
+        else:
+            durations = client.table_matrix(coordinates).durations
+        tour = solve_tsp(durations, start=0, end=0 if roundtrip else end)
+        coordinates = coordinates[tour.order]
     
     # Request route
     route_response = client.route(
@@ -135,30 +739,432 @@ def optimize_route(points: List[Tuple[float, float]], osrm_url: str = 'http://lo
     
     return route_response
 
-def process_route_optimization(csv_path: str, max_cluster_size: int = 5) -> List[Dict]:
+@dataclass
+class ClusterFailure:
+    """
+    A cluster that could not be routed.
+    
+    Attributes:
+        index: Position of the cluster in the clustering result
+        points: The cluster's (latitude, longitude) points
+        error: Exception of the last attempt; a TimeoutError when the
+            cluster ran past its timeout
+        attempts: Attempts made, including retries
+    """
+    index: int
+    points: Points
+    error: Exception
+    attempts: int
+
+@dataclass
+class ClusterResult:
+    """
+    Outcome of routing one cluster.
+    
+    Attributes:
+        index: Position of the cluster in the clustering result
+        points: The cluster's (latitude, longitude) points
+        route: Route response, None if the cluster failed
+        failure: Why the cluster failed, None if it was routed
+    """
+    index: int
+    points: Points
+    route: Optional[Dict] = None
+    failure: Optional[ClusterFailure] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.failure is None
+
+@dataclass
+class RouteOptimizationReport:
+    """
+    Outcome of routing every cluster.
+    
+    Attributes:
+        routes: Route response per cluster in cluster order, None where it failed
+        failures: Failed clusters in cluster order
+    """
+    routes: List[Optional[Dict]]
+    failures: List[ClusterFailure] = field(default_factory=list)
+    
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+    
+    @property
+    def succeeded(self) -> List[Dict]:
+        """Route responses of the clusters that were routed, in cluster order."""
+        return [route for route in self.routes if route is not None]
+    
+    @classmethod
+    def from_results(cls, results: Iterable[ClusterResult]) -> 'RouteOptimizationReport':
+        """Collect cluster results, in any order, into a report in cluster order."""
+        results = sorted(results, key=lambda result: result.index)
+        return cls([result.route for result in results], [result.failure for result in results if not result.ok])
+
+def _route_with_retries(
+    cluster: Points,
+    attempts: List[int],
+    retries: int,
+    backoff: float,
+    **kwargs
+) -> Dict:
+    """``optimize_route`` retried with exponential backoff on transient OSRM errors."""
+    for attempt in range(retries + 1):
+        attempts[0] = attempt + 1
+        try:
+            return optimize_route(cluster, **kwargs)
+        except OSRMRequestError as e:
+            if not e.transient or attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt)
+
+def iter_optimized_clusters(
+    clusters: List[Points],
+    client: OSRMClient,
+    sequence: bool = False,
+    matrix_store: Optional[MatrixStore] = None,
+    max_workers: int = 4,
+    timeout: Optional[float] = None,
+    retries: int = 2,
+    backoff: float = 0.5,
+    ordered: bool = True,
+    max_pending: Optional[int] = None
+) -> Iterator[ClusterResult]:
+    """
+    Route clusters concurrently, yielding each result as soon as it is ready.
+    
+    Retries and timeouts work as in ``optimize_clusters``. At most
+    ``max_pending`` clusters are in flight or finished but not yet yielded,
+    so a slow consumer pauses routing instead of piling up responses.
+    Closing the iterator early cancels the clusters not yet started.
+    
+    Args:
+        clusters: Clusters of (latitude, longitude) points
+        client: Shared OSRM client; its connection pool is used by every worker
+        sequence: Reorder each cluster's stops before routing, see ``optimize_route``
+        matrix_store: Persistent matrices for sequencing; every cluster's
+            points are added before routing starts
+        max_workers: Clusters routed at the same time
+        timeout: Seconds a cluster may take, retries included; None waits indefinitely
+        retries: Retries of a cluster after a transient error
+        backoff: Delay before the first retry in seconds, doubled for each further retry
+        ordered: Yield in cluster order; otherwise in completion order
+        max_pending: Bound on clusters routed ahead of the consumer,
+            ``2 * max_workers`` if omitted
+    
+    Yields:
+        ClusterResult per cluster
+    """
+    n = len(clusters)
+    max_workers = max(1, max_workers)
+    max_pending = max(max_workers, max_pending or 2 * max_workers)
+    attempts = [[0] for _ in clusters]
+    started: Dict[int, float] = {}
+    
+    def run(i: int) -> Dict:
+        started[i] = time.monotonic()
+        return _route_with_retries(
+            clusters[i], attempts[i], retries, backoff,
+            client=client, sequence=sequence, matrix_store=matrix_store
+        )
+    
+    def failed(i: int, error: Exception) -> ClusterResult:
+        return ClusterResult(i, clusters[i], failure=ClusterFailure(i, clusters[i], error, attempts[i][0]))
+    
+    # Fill the store once up front; workers then only read their blocks
+    if sequence and matrix_store is not None and n:
+        coordinates = CoordinateArray.from_latlon(np.concatenate([as_latlon_array(c) for c in clusters]))
+        matrix_store.add(coordinate_ids(coordinates), coordinates, client)
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="route-cluster")
+    pending: Dict[Future, int] = {}
+    ready: Dict[int, ClusterResult] = {}
+    submitted = yielded = 0
+    try:
+        while yielded < n:
+            while submitted < n and len(pending) + len(ready) < max_pending:
+                pending[executor.submit(run, submitted)] = submitted
+                submitted += 1
+            
+            # Hand over a finished result before waiting for more
+            if ordered and yielded in ready:
+                yield ready.pop(yielded)
+                yielded += 1
+                continue
+            if not ordered and ready:
+                yield ready.pop(next(iter(ready)))
+                yielded += 1
+                continue
+            
+            poll = None
+            if timeout is not None:
+                deadlines = [started[i] + timeout for i in pending.values() if i in started]
+                poll = max(0.0, min(deadlines) - time.monotonic()) if deadlines else timeout
+            done, _ = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    ready[i] = ClusterResult(i, clusters[i], route=future.result())
+                except Exception as e:
+                    ready[i] = failed(i, e)
+            if timeout is not None:
+                now = time.monotonic()
+                for future, i in list(pending.items()):
+                    if i in started and now - started[i] > timeout:
+                        del pending[future]
+                        ready[i] = failed(i, TimeoutError(f"Cluster {i} did not finish within {timeout}s"))
+    finally:
+        # Timed-out workers are abandoned rather than waited for
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def optimize_clusters(
+    clusters: List[Points],
+    client: OSRMClient,
+    sequence: bool = False,
+    matrix_store: Optional[MatrixStore] = None,
+    max_workers: int = 4,
+    timeout: Optional[float] = None,
+    retries: int = 2,
+    backoff: float = 0.5
+) -> RouteOptimizationReport:
+    """
+    Route clusters concurrently on a thread pool sharing one client.
+    
+    Transient OSRM errors (network errors, timeouts, 429 and 5xx) are
+    retried with exponential backoff; any other error fails the cluster
+    at once. A cluster still running ``timeout`` seconds after it started
+    is reported as failed and its result discarded; the worker stays busy
+    until the client's own request timeout ends the call.
+    
+    Args:
+        clusters: Clusters of (latitude, longitude) points
+        client: Shared OSRM client; its connection pool is used by every worker
+        sequence: Reorder each cluster's stops before routing, see ``optimize_route``
+        matrix_store: Persistent matrices for sequencing
+        max_workers: Clusters routed at the same time
+        timeout: Seconds a cluster may take, retries included; None waits indefinitely
+        retries: Retries of a cluster after a transient error
+        backoff: Delay before the first retry in seconds, doubled for each further retry
+    
+    Returns:
+        RouteOptimizationReport with the routes in cluster order and the failures
+    """
+    results = iter_optimized_clusters(
+        clusters, client, sequence=sequence, matrix_store=matrix_store, max_workers=max_workers,
+        timeout=timeout, retries=retries, backoff=backoff, max_pending=len(clusters)
+    )
+    return RouteOptimizationReport.from_results(results)
+
+def iter_route_optimization(
+    csv_path: str,
+    max_cluster_size: int = 5,
+    osrm_url: str = 'http://localhost:5000',
+    client: Optional[OSRMClient] = None,
+    cache: Optional[ResponseCache] = None,
+    cassette: Optional[Cassette] = None,
+    sequence: bool = False,
+    matrix_store: Optional[MatrixStore] = None,
+    cluster_method: str = 'kmeans',
+    max_workers: int = 1,
+    cluster_timeout: Optional[float] = None,
+    retries: int = 2,
+    ordered: bool = True,
+    max_pending: Optional[int] = None
+) -> Iterator[ClusterResult]:
+    """
+    Full route optimization pipeline, yielding each cluster's route as soon as it is ready.
+    
+    Points are loaded and clustered when iteration starts; routes are then
+    produced by ``iter_optimized_clusters``, at most ``max_pending`` ahead of
+    the consumer, so memory stays flat however many clusters there are.
+    A client created for the run is closed when the iterator finishes or is
+    closed. The other arguments are those of ``process_route_optimization``.
+    
+    Args:
+        ordered: Yield in cluster order; otherwise in completion order
+        max_pending: Bound on clusters routed ahead of the consumer,
+            ``2 * max_workers`` if omitted
+    
+    Yields:
+        ClusterResult per cluster
+    """
+    # Load and validate points
+    loaded = load_points(csv_path)
+    if loaded.errors:
+        raise ValueError(loaded.errors[0].message)
+    points = loaded.points
+    
+    # One pooled client serves every cluster in the run
+    owns_client = client is None
+    if owns_client:
+        client = OSRMClient(osrm_url, cache=cache, cassette=cassette)
+    
+    try:
+        coordinates = CoordinateArray.from_latlon(as_latlon_array(points))
+        if matrix_store is not None and (sequence or cluster_method == 'kmedoids'):
+            matrix_store.add(coordinate_ids(coordinates), coordinates, client)
+        
+        # Cluster destinations
+        durations = None
+        if cluster_method == 'kmedoids':
+            if matrix_store is not None:
+                durations = matrix_store.matrix(coordinate_ids(coordinates)).durations
+            else:
+                durations = client.table_matrix(coordinates).durations
+        clusters = cluster_destinations(points, max_cluster_size, method=cluster_method, durations=durations)
+        
+        # Optimize routes for each cluster
+        yield from iter_optimized_clusters(
+            clusters,
+            client,
+            sequence=sequence,
+            matrix_store=matrix_store,
+            max_workers=max_workers,
+            timeout=cluster_timeout,
+            retries=retries,
+            ordered=ordered,
+            max_pending=max_pending
+        )
+    finally:
+        if owns_client:
+            client.close()
+
+def process_route_optimization(
+    csv_path: str,
+    max_cluster_size: int = 5,
+    osrm_url: str = 'http://localhost:5000',
+    client: Optional[OSRMClient] = None,
+    cache: Optional[ResponseCache] = None,
+    cassette: Optional[Cassette] = None,
+    sequence: bool = False,
+    matrix_store: Optional[MatrixStore] = None,
+    cluster_method: str = 'kmeans',
+    max_workers: int = 1,
+    cluster_timeout: Optional[float] = None,
+    retries: int = 2,
+    return_report: bool = False
+) -> Union[List[Dict], RouteOptimizationReport]:
     """
     Full route optimization pipeline.
     
     Args:
         csv_path: Path to CSV file with points
         max_cluster_size: Maximum destinations per route
+        osrm_url: Base URL for OSRM service, used when no client is given
+        client: Shared OSRM client; one is created for the run if omitted
+        cache: Response cache for the client created by this run, e.g.
+            ``ResponseCache(path='osrm-cache.sqlite')`` to reuse responses
+            across runs
+        cassette: Cassette for the client created by this run, e.g.
+            ``Cassette('run.cassette', mode='replay')`` to repeat a recorded
+            run without a server
+        sequence: Reorder each cluster's stops with ``tsp.solve_tsp`` before routing
+        matrix_store: Persistent matrices for sequencing; every point is added
+            up front, so only locations new to the store cost table requests
+        cluster_method: Clustering method of ``cluster_destinations``; use
+            'balanced' to enforce ``max_cluster_size``, or 'kmedoids' to
+            cluster on road durations (from ``matrix_store`` when given,
+            otherwise one tiled table request through the client)
+        max_workers: Clusters routed concurrently through the shared client
+        cluster_timeout: Seconds a cluster may take before it is reported as failed
+        retries: Retries of a cluster after a transient OSRM error
+        return_report: Return a ``RouteOptimizationReport`` with every
+            cluster's outcome instead of the list of routes
     
     Returns:
-        List of optimized route responses
+        List of optimized route responses in cluster order, skipping failed
+        clusters, or the full report with ``return_report``
     """
-    # Load and validate points
-    points = load_points_from_csv(csv_path)
+    results = iter_route_optimization(
+        csv_path,
+        max_cluster_size,
+        osrm_url,
+        client=client,
+        cache=cache,
+        cassette=cassette,
+        sequence=sequence,
+        matrix_store=matrix_store,
+        cluster_method=cluster_method,
+        max_workers=max_workers,
+        cluster_timeout=cluster_timeout,
+        retries=retries
+    )
+    report = RouteOptimizationReport.from_results(results)
     
-    # Cluster destinations
-    clusters = cluster_destinations(points, max_cluster_size)
+    if return_report:
+        return report
+    for failure in report.failures:
+        print(f"Error optimizing cluster {failure.index}: {failure.error}")
+    return report.succeeded
+
+async def aiter_route_optimization(csv_path: str, **kwargs) -> AsyncIterator[ClusterResult]:
+    """
+    Async iterator over ``iter_route_optimization``, for event-loop consumers
+    such as a dashboard rendering routes as they arrive.
     
-    # Optimize routes for each cluster
-    optimized_routes = []
-    for cluster in clusters:
-        try:
-            route = optimize_route(cluster)
-            optimized_routes.append(route)
-        except Exception as e:
-            print(f"Error optimizing cluster: {e}")
+    The pipeline runs on a dedicated thread and is advanced one result per
+    step, so it never runs further ahead of the consumer than its
+    ``max_pending`` bound and the event loop is never blocked.
+    
+    Args:
+        csv_path: Path to CSV file with points
+        **kwargs: Keyword arguments of ``iter_route_optimization``
+    
+    Yields:
+        ClusterResult per cluster
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="route-stream")
+    results = iter_route_optimization(csv_path, **kwargs)
+    end = object()
+    try:
+        while True:
+            result = await loop.run_in_executor(executor, next, results, end)
+            if result is end:
+                break
+            yield result
+    finally:
+        # Runs after any in-flight step on the same thread, then frees the client
+        await loop.run_in_executor(executor, results.close)
+        executor.shutdown(wait=False)
+
+def write_ndjson(results: Iterable[ClusterResult], output: Union[str, TextIO] = '-') -> Tuple[int, int]:
+    """
+    Stream cluster results as newline-delimited JSON, one line per cluster.
+    
+    Each line is written and flushed before the next result is pulled, so
+    with ``iter_route_optimization`` routing stays within ``max_pending``
+    clusters of the writer (and of a slow reader on a pipe) instead of
+    buffering the batch. Lines look like::
+    
+        {"cluster": 0, "points": [[lat, lon], ...], "route": {...}}
+        {"cluster": 1, "points": [[lat, lon], ...], "error": "...", "attempts": 3}
+    
+    Args:
+        results: Cluster results, e.g. from ``iter_route_optimization``
+        output: File path, '-' for stdout, or an open text file
+    
+    Returns:
+        Number of routed and failed clusters written
+    """
+    if isinstance(output, str):
+        if output == '-':
+            return write_ndjson(results, sys.stdout)
+        with open(output, 'w') as f:
+            return write_ndjson(results, f)
     
-    return optimized_routes
+    routed = failed = 0
+    for result in results:
+        record = {"cluster": result.index, "points": as_latlon_array(result.points).tolist()}
+        if result.ok:
+            record["route"] = result.route
+            routed += 1
+        else:
+            record["error"] = str(result.failure.error)
+            record["attempts"] = result.failure.attempts
+            failed += 1
+        output.write(json.dumps(record, separators=(',', ':')) + '\n')
+        output.flush()
+    return routed, failed
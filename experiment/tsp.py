@@ -0,0 +1,221 @@
+"""Stop Sequencing on Duration Matrices.
+
+Orders the stops of a route in-process from a travel-time matrix (e.g.
+``OSRMClient.table_matrix``) instead of asking OSRM's ``trip`` service. A
+nearest-neighbour tour is improved with 2-opt and Or-opt moves until no move
+shortens it. Every candidate move of a kind is scored at once with NumPy, and
+the best one is applied. Matrices may be asymmetric, as OSRM durations are.
+
+Open paths, paths with a fixed end and round trips are all solved as a path
+between two fixed endpoints: a free end becomes a zero-cost dummy stop, and a
+round trip ends at a copy of the start.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass
+class Tour:
+    """
+    Sequenced stops.
+
+    Attributes:
+        order: Stop indices in visiting order; a round trip ends with the start again
+        cost: Total travel time along ``order``, in the matrix's units
+    """
+    order: np.ndarray
+    cost: float
+
+
+def tour_cost(durations: np.ndarray, order: np.ndarray) -> float:
+    """
+    Total travel time along a sequence of stops.
+
+    Args:
+        durations: (n, n) travel time matrix, row = origin, column = destination
+        order: Stop indices in visiting order
+
+    Returns:
+        Sum of the matrix entries of consecutive stops
+    """
+    order = np.asarray(order)
+    return float(durations[order[:-1], order[1:]].sum())
+
+
+def nearest_neighbour(durations: np.ndarray, start: int, end: int) -> np.ndarray:
+    """
+    Greedy path from ``start`` to ``end`` through every stop.
+
+    Args:
+        durations: (n, n) travel time matrix without NaN
+        start: First stop
+        end: Last stop; may equal ``start`` only when n is 1
+
+    Returns:
+        Stop indices in visiting order
+    """
+    n = len(durations)
+    visited = np.zeros(n, dtype=bool)
+    visited[[start, end]] = True
+    order = [start]
+    current = start
+    for _ in range(n - 2 if start != end else n - 1):
+        costs = np.where(visited, np.inf, durations[current])
+        current = int(np.argmin(costs))
+        visited[current] = True
+        order.append(current)
+    if end != start:
+        order.append(end)
+    return np.array(order, dtype=np.int64)
+
+
+def _best_two_opt(durations: np.ndarray, order: np.ndarray):
+    """Most improving segment reversal as (delta, i, j): reverse ``order[i + 1:j + 1]``."""
+    m = len(order)
+    forward = durations[order[:-1], order[1:]]
+    backward = durations[order[1:], order[:-1]]
+    # Prefix sums give the cost of any sub-path in either direction
+    fwd = np.concatenate(([0.0], np.cumsum(forward)))
+    bwd = np.concatenate(([0.0], np.cumsum(backward)))
+
+    i = np.arange(m - 1)[:, None]
+    j = np.arange(m - 1)[None, :]
+    valid = j > i + 1
+    i_, j_ = np.broadcast_arrays(i, j)
+    i_, j_ = i_[valid], j_[valid]
+    if i_.size == 0:
+        return 0.0, 0, 0
+    delta = (
+        durations[order[i_], order[j_]] + durations[order[i_ + 1], order[j_ + 1]]
+        - forward[i_] - forward[j_]
+        + (bwd[j_] - bwd[i_ + 1]) - (fwd[j_] - fwd[i_ + 1])
+    )
+    best = int(np.argmin(delta))
+    return float(delta[best]), int(i_[best]), int(j_[best])
+
+
+def _best_or_opt(durations: np.ndarray, order: np.ndarray, max_segment: int):
+    """Most improving segment move as (delta, i, length, j): move ``order[i:i + length]`` after ``order[j]``."""
+    m = len(order)
+    best = (0.0, 0, 0, 0)
+    edges = durations[order[:-1], order[1:]]
+    j = np.arange(m - 1)[None, :]
+    for length in range(1, max_segment + 1):
+        # Segments never include the fixed first and last stops
+        i = np.arange(1, m - length)[:, None]
+        if i.size == 0:
+            break
+        first, last = order[i], order[i + length - 1]
+        removal = (
+            durations[order[i - 1], first] + durations[last, order[i + length]]
+            - durations[order[i - 1], order[i + length]]
+        )
+        insertion = durations[order[j], first] + durations[last, order[j + 1]] - edges[j]
+        delta = insertion - removal
+        # Inserting next to its own position (or inside itself) is not a move
+        delta = np.where((j >= i - 1) & (j <= i + length - 1), np.inf, delta)
+        flat = int(np.argmin(delta))
+        row, col = divmod(flat, delta.shape[1])
+        if delta[row, col] < best[0]:
+            best = (float(delta[row, col]), int(i[row, 0]), length, col)
+    return best
+
+
+def improve(
+    durations: np.ndarray,
+    order: np.ndarray,
+    max_segment: int = 3,
+    max_iterations: int = 10000,
+    tolerance: float = 1e-9
+) -> np.ndarray:
+    """
+    Improve a path with fixed endpoints by 2-opt and Or-opt moves.
+
+    Each iteration applies the best 2-opt reversal, or the best Or-opt move
+    of up to ``max_segment`` consecutive stops when no reversal helps, until
+    neither improves the path by more than ``tolerance``.
+
+    Args:
+        durations: (n, n) travel time matrix without NaN
+        order: Initial path; its first and last stops stay in place
+        max_segment: Longest run of stops an Or-opt move relocates
+        max_iterations: Upper bound on applied moves
+        tolerance: Smallest improvement worth applying
+
+    Returns:
+        Improved stop indices in visiting order
+    """
+    order = np.array(order, dtype=np.int64)
+    for _ in range(max_iterations):
+        delta, i, j = _best_two_opt(durations, order)
+        if delta < -tolerance:
+            order[i + 1:j + 1] = order[i + 1:j + 1][::-1]
+            continue
+        delta, i, length, j = _best_or_opt(durations, order, max_segment)
+        if delta < -tolerance:
+            segment = order[i:i + length]
+            rest = np.concatenate((order[:i], order[i + length:]))
+            # Insertion edge index shifts left when it lies after the removed segment
+            at = j + 1 if j < i else j + 1 - length
+            order = np.concatenate((rest[:at], segment, rest[at:]))
+            continue
+        break
+    return order
+
+
+def solve_tsp(
+    durations: np.ndarray,
+    start: int = 0,
+    end: Optional[int] = None,
+    max_segment: int = 3,
+    max_iterations: int = 10000
+) -> Tour:
+    """
+    Sequence stops to minimise total travel time.
+
+    Args:
+        durations: (n, n) travel time matrix, row = origin, column = destination;
+            NaN (unreachable) entries are treated as prohibitively long
+        start: Stop the route must begin at
+        end: Stop the route must finish at; None leaves the end free and
+            ``end == start`` asks for a round trip
+        max_segment: Longest run of stops an Or-opt move relocates
+        max_iterations: Upper bound on improving moves
+
+    Returns:
+        Tour with the visiting order and its cost
+    """
+    durations = np.asarray(durations, dtype=np.float64)
+    n = len(durations)
+    if durations.shape != (n, n):
+        raise ValueError(f"Expected a square matrix, got shape {durations.shape}")
+    if not 0 <= start < n or (end is not None and not 0 <= end < n):
+        raise ValueError("start and end must be stop indices")
+    if n == 1:
+        order = np.array([start, start] if end == start else [start], dtype=np.int64)
+        return Tour(order, 0.0)
+
+    finite = durations[np.isfinite(durations)]
+    penalty = (finite.max() if finite.size else 1.0) * n * 10 + 1.0
+    matrix = np.where(np.isfinite(durations), durations, penalty)
+
+    # Reduce every case to a path between two fixed stops
+    if end is None or end == start:
+        last = n
+        extended = np.zeros((n + 1, n + 1))
+        extended[:n, :n] = matrix
+        if end == start:
+            extended[:n, n] = matrix[:, start]
+            extended[n, :n] = matrix[start]
+        extended[n, n] = 0.0
+        matrix = extended
+    else:
+        last = end
+
+    order = improve(matrix, nearest_neighbour(matrix, start, last), max_segment, max_iterations)
+    if last == n:
+        order = order[:-1] if end is None else np.append(order[:-1], start)
+    return Tour(order, tour_cost(durations, order))
@@ -10,6 +10,7 @@ from scripts.osrm import (
     render_bulk,
     start_server, 
     stop_server, 
+    stub_server,
     test_render,
     watch_server_logs
 )
@@ -40,5 +41,6 @@ osrm_app.command()(process_map)
 osrm_app.command()(render_bulk)
 osrm_app.command()(start_server)
 osrm_app.command()(stop_server)
+osrm_app.command()(stub_server)
 osrm_app.command()(test_render)
 osrm_app.command()(watch_server_logs)
\ No newline at end of file
@@ -8,6 +8,7 @@ from .process_map import process_map
 from .render_bulk import render_bulk
 from .start_server import start_server
 from .stop_server import stop_server
+from .stub_server import stub_server
 from .test_render import test_render
 from .watch_logs import watch_server_logs
 
@@ -20,6 +21,7 @@ __all__ = [
     "render_bulk",
     "start_server", 
     "stop_server", 
+    "stub_server",
     "test_render",
     "watch_server_logs"
 ]
@@ -1,31 +1,39 @@
 #!/usr/bin/env python3
-import requests
+from typing import Optional
+
 import typer
 from scripts.core import console
 
 def check_server_status(
     region: str = typer.Option("malaysia-singapore-brunei", help="Region to check"),
-    port: int = typer.Option(5000, help="Port the OSRM server is running on")
+    port: int = typer.Option(5000, help="Port the OSRM server is running on"),
+    metrics: Optional[str] = typer.Option(
+        None, help="Write client metrics to this file (.prom for Prometheus text, else JSON; '-' for stdout)"
+    )
 ):
     """Check the status of the OSRM routing server."""
+    from experiment.notebooks.osrm import Coordinate, OSRMClient, OSRMRequestError
+    from experiment.notebooks.osrm_metrics import ClientMetrics
+
+    client_metrics = ClientMetrics()
+    client = OSRMClient(f"http://localhost:{port}", timeout=5, metrics=client_metrics)
     try:
-        # Construct the health check URL
-        url = f"http://localhost:{port}/route/v1/driving/101.629174,3.107824;101.616409,3.146852"
-        
         # Send a test request
-        response = requests.get(url, timeout=5)
-        
-        # Check if response is successful
-        if response.status_code == 200:
-            console.print(f"[green]OSRM server for {region} is running successfully on port {port}[/green]")
-            return True
-        else:
-            console.print(f"[yellow]OSRM server returned status code {response.status_code}[/yellow]")
-            return False
+        client.route([Coordinate(101.629174, 3.107824), Coordinate(101.616409, 3.146852)])
+        console.print(f"[green]OSRM server for {region} is running successfully on port {port}[/green]")
+        return True
     
-    except requests.RequestException as e:
-        console.print(f"[red]Error connecting to OSRM server: {e}[/red]")
+    except OSRMRequestError as e:
+        if e.status_code is not None:
+            console.print(f"[yellow]OSRM server returned status code {e.status_code}[/yellow]")
+        else:
+            console.print(f"[red]Error connecting to OSRM server: {e}[/red]")
         return False
+    
+    finally:
+        client.close()
+        if metrics:
+            client_metrics.dump(metrics)
 
 def main():
     typer.run(check_server_status)
@@ -6,24 +6,34 @@ import webbrowser
 from scripts.core.console import print_success
 
 def render_bulk(
-    path_json: str = typer.Option(..., help="Path to JSON file with route data"),
+    path_json: str = typer.Option(..., help="Path to JSON (or NDJSON) file with route data"),
     points_csv: str = typer.Option(..., help="Path to JSON file with points data"),
     start_lon: float = typer.Option(101.62917384709634, help="Starting longitude"),
     start_lat: float = typer.Option(3.107824318483157, help="Starting latitude")
 ):
     """Render multiple routes from a JSON file using OSRM and Leaflet."""
-    # Read JSON file
-    from polyline import decode
-    # Read JSON file
-    from polyline import decode
+    from experiment.notebooks.osrm_polyline import decode_many
 
+    # Read JSON file, or the NDJSON stream written by route_optimizer.write_ndjson
     with open(path_json, 'r') as f:
-        routes_data = json.load(f)
-        for route_data in routes_data:
-            route_data['routes'][0]['geometry'] = [
-                [coord[0], coord[1]] for coord in
-                decode(route_data['routes'][0]['geometry'])
-            ]
+        if path_json.endswith('.ndjson'):
+            routes_data = [record['route'] for record in map(json.loads, f) if 'route' in record]
+        else:
+            routes_data = json.load(f)
+
+    # Decode every encoded geometry in one pass, then hand Leaflet [lat, lon] pairs
+    encoded = [
+        route_data for route_data in routes_data
+        if isinstance(route_data['routes'][0]['geometry'], str)
+    ]
+    coords, offsets = decode_many([route_data['routes'][0]['geometry'] for route_data in encoded])
+    for i, route_data in enumerate(encoded):
+        route_data['routes'][0]['geometry'] = coords[offsets[i]:offsets[i + 1], ::-1].tolist()
+    for route_data in routes_data:
+        geometry = route_data['routes'][0]['geometry']
+        if isinstance(geometry, dict):
+            # GeoJSON geometries (as requested by optimize_route) are [lon, lat]
+            route_data['routes'][0]['geometry'] = [[lat, lon] for lon, lat in geometry['coordinates']]
     with open(points_csv, 'r') as f:
         points_data = [line.strip().split(',') for line in f]
         points = [[float(point[1]), float(point[0])] for point in points_data]
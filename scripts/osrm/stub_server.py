@@ -0,0 +1,314 @@
+"""
+Local stand-in for osrm-routed.
+
+Answers ``/route``, ``/table``, ``/nearest``, ``/trip`` and ``/match`` v1
+requests with responses shaped like OSRM's, without Docker or map data.
+Distances are great-circle (haversine) distances multiplied by a circuity
+factor and durations follow from a constant speed, so results are
+deterministic and cheap to compute. Latency and error rates can be injected
+to load-test clients.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import typer
+from scripts.core import console
+
+EARTH_RADIUS_M = 6371008.8
+SERVICES = ("route", "table", "nearest", "trip", "match")
+
+
+class StubError(Exception):
+    """A request the stub answers with an OSRM error body."""
+
+    def __init__(self, code: str, message: str, status: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+def _haversine(origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+    """Great-circle distance in metres between broadcastable (..., 2) lon/lat arrays."""
+    lon1, lat1 = np.radians(origins[..., 0]), np.radians(origins[..., 1])
+    lon2, lat2 = np.radians(destinations[..., 0]), np.radians(destinations[..., 1])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _parse_coordinates(text: str) -> np.ndarray:
+    """Parse ``lon,lat;lon,lat``, ``polyline(...)`` or ``polyline6(...)`` into (n, 2) lon/lat."""
+    from experiment.notebooks.osrm_polyline import decode_array
+
+    text = unquote(text)
+    for prefix, precision in (("polyline6(", 6), ("polyline(", 5)):
+        if text.startswith(prefix) and text.endswith(")"):
+            try:
+                return decode_array(text[len(prefix):-1], precision)
+            except ValueError as e:
+                raise StubError("InvalidQuery", f"Invalid polyline: {e}")
+    try:
+        coords = np.array([[float(v) for v in pair.split(",")] for pair in text.split(";")])
+    except ValueError:
+        raise StubError("InvalidQuery", "Query string malformed close to position 0")
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        raise StubError("InvalidQuery", "Coordinates must be lon,lat pairs")
+    return coords
+
+
+def _indices(value: Optional[str], n: int) -> np.ndarray:
+    """Parse a ``sources``/``destinations`` parameter."""
+    if value is None or value == "all":
+        return np.arange(n)
+    try:
+        indices = np.array([int(v) for v in value.split(";")])
+    except ValueError:
+        raise StubError("InvalidQuery", f"Invalid index list: {value}")
+    if indices.size and (indices.min() < 0 or indices.max() >= n):
+        raise StubError("InvalidValue", "Index out of range")
+    return indices
+
+
+class StubOSRM:
+    """
+    Synthetic OSRM responses.
+
+    Args:
+        circuity (float, optional): Ratio of road distance to great-circle distance
+        speed_kmh (float, optional): Constant travel speed used for durations
+    """
+
+    def __init__(self, circuity: float = 1.3, speed_kmh: float = 40.0):
+        self.circuity = circuity
+        self.speed_ms = speed_kmh / 3.6
+
+    def handle(self, path: str) -> Dict:
+        """
+        Answer one request path.
+
+        Args:
+            path (str): Request path with query string, e.g. ``/route/v1/driving/...``
+
+        Returns:
+            Dict: OSRM-shaped JSON response
+
+        Raises:
+            StubError: For requests OSRM would reject
+        """
+        url = urlsplit(path)
+        parts = url.path.strip("/").split("/", 3)
+        if len(parts) != 4 or parts[1] != "v1":
+            raise StubError("InvalidUrl", f"URL string malformed: {url.path}")
+        service, _, _, coords_text = parts
+        if service not in SERVICES:
+            raise StubError("InvalidService", f"Service {service} not found!")
+        if coords_text.endswith(".json"):
+            coords_text = coords_text[:-5]
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        coords = _parse_coordinates(coords_text)
+        if np.any(np.abs(coords[:, 0]) > 180) or np.any(np.abs(coords[:, 1]) > 90):
+            raise StubError("InvalidValue", "Coordinate is invalid")
+        return getattr(self, service)(coords, params)
+
+    def _segments(self, coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Distance and duration of each consecutive pair of coordinates."""
+        distances = _haversine(coords[:-1], coords[1:]) * self.circuity
+        return distances, distances / self.speed_ms
+
+    @staticmethod
+    def _waypoint(location: np.ndarray, **extra) -> Dict:
+        lon, lat = (round(float(v), 6) for v in location)
+        return {"hint": f"stub:{lon},{lat}", "distance": 0.0, "name": "", "location": [lon, lat], **extra}
+
+    @staticmethod
+    def _geometry(coords: np.ndarray, params: Dict) -> Optional[object]:
+        from experiment.notebooks.osrm_polyline import encode_array
+
+        if params.get("overview") == "false":
+            return None
+        geometries = params.get("geometries", "polyline")
+        if geometries == "geojson":
+            return {"type": "LineString", "coordinates": np.round(coords, 6).tolist()}
+        return encode_array(coords, 6 if geometries == "polyline6" else 5)
+
+    def _route_object(self, coords: np.ndarray, params: Dict) -> Dict:
+        """One route through ``coords`` as straight legs between consecutive points."""
+        distances, durations = self._segments(coords)
+        annotations = params.get("annotations", "false")
+        legs = []
+        for i, (distance, duration) in enumerate(zip(distances.tolist(), durations.tolist())):
+            leg = {"distance": distance, "duration": duration, "weight": duration, "summary": "", "steps": []}
+            if params.get("steps") == "true":
+                leg["steps"] = [
+                    {"distance": distance, "duration": duration, "weight": duration, "name": "", "mode": "driving",
+                     "maneuver": {"type": "depart", "location": coords[i].tolist()}},
+                    {"distance": 0.0, "duration": 0.0, "weight": 0.0, "name": "", "mode": "driving",
+                     "maneuver": {"type": "arrive", "location": coords[i + 1].tolist()}},
+                ]
+            if annotations != "false":
+                leg["annotation"] = {"distance": [distance], "duration": [duration], "speed": [self.speed_ms]}
+            legs.append(leg)
+        route = {
+            "distance": float(distances.sum()),
+            "duration": float(durations.sum()),
+            "weight": float(durations.sum()),
+            "weight_name": "duration",
+            "legs": legs,
+        }
+        geometry = self._geometry(coords, params)
+        if geometry is not None:
+            route["geometry"] = geometry
+        return route
+
+    def route(self, coords: np.ndarray, params: Dict) -> Dict:
+        if len(coords) < 2:
+            raise StubError("InvalidQuery", "Number of coordinates needs to be at least two")
+        return {
+            "code": "Ok",
+            "routes": [self._route_object(coords, params)],
+            "waypoints": [self._waypoint(c) for c in coords],
+        }
+
+    def table(self, coords: np.ndarray, params: Dict) -> Dict:
+        sources = _indices(params.get("sources"), len(coords))
+        destinations = _indices(params.get("destinations"), len(coords))
+        distances = _haversine(coords[sources][:, None, :], coords[destinations][None, :, :]) * self.circuity
+        response = {
+            "code": "Ok",
+            "sources": [self._waypoint(coords[i]) for i in sources],
+            "destinations": [self._waypoint(coords[i]) for i in destinations],
+        }
+        annotations = params.get("annotations", "duration").split(",")
+        if "duration" in annotations:
+            response["durations"] = (distances / self.speed_ms).tolist()
+        if "distance" in annotations:
+            response["distances"] = distances.tolist()
+        return response
+
+    def nearest(self, coords: np.ndarray, params: Dict) -> Dict:
+        if len(coords) != 1:
+            raise StubError("InvalidQuery", "Query string malformed close to position 0")
+        number = int(params.get("number", 1))
+        return {"code": "Ok", "waypoints": [self._waypoint(coords[0], nodes=[0, 0]) for _ in range(number)]}
+
+    def trip(self, coords: np.ndarray, params: Dict) -> Dict:
+        # Visits the coordinates in input order; good enough for a stand-in
+        path = np.vstack([coords, coords[:1]]) if params.get("roundtrip", "true") == "true" else coords
+        if len(path) < 2:
+            raise StubError("InvalidQuery", "Number of coordinates needs to be at least two")
+        return {
+            "code": "Ok",
+            "trips": [self._route_object(path, params)],
+            "waypoints": [self._waypoint(c, waypoint_index=i, trips_index=0) for i, c in enumerate(coords)],
+        }
+
+    def match(self, coords: np.ndarray, params: Dict) -> Dict:
+        if len(coords) < 2:
+            raise StubError("InvalidQuery", "Number of coordinates needs to be at least two")
+        matching = self._route_object(coords, params)
+        matching["confidence"] = 1.0
+        return {
+            "code": "Ok",
+            "matchings": [matching],
+            "tracepoints": [
+                self._waypoint(c, matchings_index=0, waypoint_index=i, alternatives_count=0)
+                for i, c in enumerate(coords)
+            ],
+        }
+
+
+def make_stub_server(
+    host: str = "127.0.0.1",
+    port: int = 5000,
+    circuity: float = 1.3,
+    speed_kmh: float = 40.0,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    seed: Optional[int] = None,
+) -> ThreadingHTTPServer:
+    """
+    Build a stand-in OSRM server without starting it.
+
+    Call ``serve_forever`` (e.g. on a daemon thread) to start answering and
+    ``shutdown`` to stop. Pass ``port=0`` to pick a free port, then read it
+    from ``server.server_port``.
+
+    Args:
+        host (str, optional): Interface to bind
+        port (int, optional): Port to bind
+        circuity (float, optional): Ratio of road distance to great-circle distance
+        speed_kmh (float, optional): Constant travel speed used for durations
+        latency (float, optional): Seconds added to every response
+        jitter (float, optional): Extra uniformly random seconds added to every response
+        error_rate (float, optional): Fraction of requests answered with HTTP 500
+        seed (int, optional): Seed for the latency and error draws
+
+    Returns:
+        ThreadingHTTPServer: Bound server
+    """
+    stub = StubOSRM(circuity, speed_kmh)
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with rng_lock:
+                delay = latency + rng.uniform(0.0, jitter)
+                failed = rng.random() < error_rate
+            if delay > 0:
+                time.sleep(delay)
+            if failed:
+                status, body = 500, {"code": "InternalError", "message": "Injected error"}
+            else:
+                try:
+                    status, body = 200, stub.handle(self.path)
+                except StubError as e:
+                    status, body = e.status, {"code": e.code, "message": str(e)}
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def stub_server(
+    port: int = typer.Option(5000, help="Port to serve on"),
+    host: str = typer.Option("127.0.0.1", help="Interface to bind"),
+    circuity: float = typer.Option(1.3, help="Road distance as a multiple of great-circle distance"),
+    speed_kmh: float = typer.Option(40.0, help="Constant travel speed for durations"),
+    latency: float = typer.Option(0.0, help="Seconds of latency added to every response"),
+    jitter: float = typer.Option(0.0, help="Extra random latency in seconds, uniform in [0, jitter]"),
+    error_rate: float = typer.Option(0.0, help="Fraction of requests answered with HTTP 500"),
+    seed: Optional[int] = typer.Option(None, help="Random seed for latency and errors"),
+):
+    """Serve synthetic OSRM responses for offline testing and benchmarking."""
+    server = make_stub_server(host, port, circuity, speed_kmh, latency, jitter, error_rate, seed)
+    console.print(f"[green]OSRM stand-in server listening on http://{host}:{server.server_port}[/green]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("[yellow]Stopping OSRM stand-in server.[/yellow]")
+    finally:
+        server.server_close()
+
+def main():
+    typer.run(stub_server)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 """Render OSRM route on a Leaflet map."""
 import os
 import typer
-import requests
 import webbrowser
+from typing import Optional
 from scripts.core import console
 from scripts.core.console import print_success
 
@@ -11,20 +11,27 @@ def test_render(
     start_lon: float = typer.Option(101.62917384709634, help="Starting longitude"),
     start_lat: float = typer.Option(3.107824318483157, help="Starting latitude"),
     end_lon: float = typer.Option(101.61640928213977, help="Ending longitude"),
-    end_lat: float = typer.Option(3.1468522006525212, help="Ending latitude")
+    end_lat: float = typer.Option(3.1468522006525212, help="Ending latitude"),
+    metrics: Optional[str] = typer.Option(
+        None, help="Write client metrics to this file (.prom for Prometheus text, else JSON; '-' for stdout)"
+    )
 ):
     """Render a route between two points using OSRM and Leaflet."""
-    # Construct OSRM route request URL
-    route_url = (
-        f"http://localhost:{port}/route/v1/driving/"
-        f"{start_lon},{start_lat};{end_lon},{end_lat}"
-        "?overview=full&geometries=geojson"
+    from experiment.notebooks.osrm import (
+        Coordinate, OSRMClient, OSRMGeometry, OSRMOverview, OSRMRequestError
     )
+    from experiment.notebooks.osrm_metrics import ClientMetrics
+
+    client_metrics = ClientMetrics()
+    client = OSRMClient(f"http://localhost:{port}", timeout=10, metrics=client_metrics)
 
     with console.status("Fetching route from OSRM server..."):
         try:
-            response = requests.get(route_url, timeout=10)
-            route_data = response.json()
+            route_data = client.route(
+                [Coordinate(start_lon, start_lat), Coordinate(end_lon, end_lat)],
+                overview=OSRMOverview.FULL,
+                geometry=OSRMGeometry.GEOJSON
+            )
 
             if route_data.get('routes'):
                 route = route_data['routes'][0]
@@ -85,6 +92,11 @@ def test_render(
             else:
                 console.print("[red]No route found between the specified points.[/red]")
         
-        except requests.RequestException as e:
+        except OSRMRequestError as e:
             console.print(f"[red]Error fetching route: {e}[/red]")
             raise typer.Abort()
+        
+        finally:
+            client.close()
+            if metrics:
+                client_metrics.dump(metrics)
@@ -0,0 +1,45 @@
+"""Shared fixtures: a stand-in OSRM server from ``scripts.osrm.stub_server``."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from scripts.osrm.stub_server import make_stub_server
+
+
+def _serve(**kwargs):
+    server = make_stub_server(port=0, seed=0, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture(scope="session")
+def stub_url():
+    """Base URL of a stub OSRM server answering instantly and without errors."""
+    server = _serve()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def make_stub():
+    """Factory for stub servers with custom latency or error rate, shut down after the test."""
+    servers = []
+
+    def make(**kwargs) -> str:
+        server = _serve(**kwargs)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield make
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def kl_points():
+    """Random (latitude, longitude) points around Kuala Lumpur."""
+    rng = np.random.default_rng(0)
+    return np.column_stack((3.0 + rng.random(60) / 5, 101.6 + rng.random(60) / 5))
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from experiment.notebooks.osrm import Coordinate, CoordinateArray, validate_coordinates
+
+LONLAT = np.array([[101.6, 3.1], [101.7, 3.2], [-73.985428, 40.748817], [0.0, 0.0]])
+
+
+def test_slices_are_views_of_the_buffer():
+    array = CoordinateArray(LONLAT.copy())
+    head = array[1:3]
+    assert np.shares_memory(head.data, array.data)
+    head.data[0, 0] = 100.0
+    assert array.data[1, 0] == 100.0
+    assert array[0] == Coordinate(101.6, 3.1)
+
+
+@pytest.mark.parametrize("coordinates", [
+    LONLAT,
+    LONLAT.tolist(),
+    [tuple(row) for row in LONLAT.tolist()],
+    [Coordinate(lon, lat) for lon, lat in LONLAT.tolist()],
+    tuple(Coordinate(lon, lat) for lon, lat in LONLAT.tolist()),
+])
+def test_coerce_accepts_lists_tuples_and_arrays(coordinates):
+    assert CoordinateArray.coerce(coordinates) == CoordinateArray(LONLAT)
+
+
+def test_coerce_returns_coordinate_arrays_unchanged():
+    array = CoordinateArray(LONLAT)
+    assert CoordinateArray.coerce(array) is array
+    assert len(CoordinateArray.coerce([])) == 0
+
+
+@pytest.mark.parametrize("data", [np.zeros((3, 3)), np.zeros(4), np.zeros((2, 2, 2))])
+def test_rejects_arrays_that_are_not_lon_lat_pairs(data):
+    with pytest.raises(ValueError, match=r"Expected an array of shape \(n, 2\)"):
+        CoordinateArray(data)
+
+
+@pytest.mark.parametrize("row, message", [
+    ([181.0, 3.1], "Invalid longitude: 181.0"),
+    ([101.6, -90.5], "Invalid latitude: -90.5"),
+    ([np.nan, 3.1], "Invalid longitude: nan"),
+    ([101.6, np.nan], "Invalid latitude: nan"),
+])
+def test_validation_reports_the_first_invalid_coordinate(row, message):
+    data = np.vstack((LONLAT, [row], [[200.0, 100.0]]))
+    assert CoordinateArray(data).invalid_mask().tolist() == [False] * 4 + [True, True]
+    with pytest.raises(ValueError, match=message):
+        validate_coordinates(CoordinateArray(data))
+
+
+def test_validation_rejects_empty_input():
+    with pytest.raises(ValueError, match="cannot be empty"):
+        validate_coordinates(CoordinateArray(np.empty((0, 2))))
+
+
+def test_microdegrees_round_trip():
+    micro = CoordinateArray(LONLAT).to_microdegrees()
+    assert micro.dtype == np.int32
+    assert micro.tolist()[2] == [-73985428, 40748817]
+    assert CoordinateArray.from_microdegrees(micro) == CoordinateArray(LONLAT)
+    np.testing.assert_array_equal(CoordinateArray.from_microdegrees(micro).to_microdegrees(), micro)
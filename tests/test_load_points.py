@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from experiment.route_optimizer import load_points, load_points_from_csv
+
+MIXED = (
+    'id,latitude,longitude\r\n'
+    '1,3.1,101.6\r\n'
+    '2,abc,101.7\r\n'
+    '3,95,101\r\n'
+    '"4,x",3.2,"101.8"\r\n'
+    '\r\n'
+    '5,3.3\r\n'
+    '6,3.4,101.9\r\n'
+)
+
+
+@pytest.mark.parametrize("chunk_bytes", [8, 1 << 20])
+def test_bad_rows_are_reported_not_raised(tmp_path, chunk_bytes):
+    path = tmp_path / "mixed.csv"
+    path.write_text(MIXED, newline="")
+    loaded = load_points(str(path), chunk_bytes=chunk_bytes)
+    np.testing.assert_array_equal(loaded.points, [[3.1, 101.6], [3.2, 101.8], [3.4, 101.9]])
+    assert loaded.rows.tolist() == [0, 3, 6]
+    assert [error.row for error in loaded.errors] == [1, 2, 5]
+    assert not loaded.ok
+
+
+def test_wrapper_raises_on_first_bad_row(tmp_path):
+    path = tmp_path / "mixed.csv"
+    path.write_text(MIXED, newline="")
+    with pytest.raises(ValueError, match="float conversion failed: 1:"):
+        load_points_from_csv(str(path))
+
+
+def test_fast_path_parses_floats_exactly(tmp_path):
+    rng = np.random.default_rng(0)
+    points = np.column_stack((3 + rng.random(5000), 101 + rng.random(5000)))
+    path = tmp_path / "points.csv"
+    path.write_text("name,longitude,latitude\n" + "".join(f"m{i},{lon},{lat}\n" for i, (lat, lon) in enumerate(points.tolist())))
+    for workers in (1, 2):
+        loaded = load_points(str(path), chunk_bytes=4096, workers=workers)
+        assert loaded.ok
+        np.testing.assert_array_equal(loaded.points, points)
+        assert loaded.rows.tolist() == list(range(5000))
+
+
+def test_quoted_fields_spanning_lines_stay_whole(tmp_path):
+    path = tmp_path / "quoted.csv"
+    path.write_text("name,latitude,longitude\n" + "".join(f'"a\nb{i}",{3 + i / 1e4},{101 + i / 1e4}\n' for i in range(300)))
+    loaded = load_points(str(path), chunk_bytes=50)
+    assert loaded.ok
+    assert len(loaded.points) == 300
+
+
+def test_missing_columns_raise(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("lat,lon\n3.1,101.6\n")
+    with pytest.raises(ValueError, match="latitude"):
+        load_points(str(path))
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from experiment.matrix_store import MatrixStore, coordinate_ids
+from experiment.notebooks.osrm import CoordinateArray, OSRMClient
+from experiment.route_optimizer import optimize_clusters
+
+
+def test_add_fetches_only_new_blocks(tmp_path, stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points[:20])
+    ids = coordinate_ids(coordinates)
+    with OSRMClient(stub_url) as client:
+        store = MatrixStore(str(tmp_path), capacity=4)
+        assert store.add(ids[:10], coordinates[:10], client) == 10
+        assert store.add(ids, coordinates, client) == 10
+        assert store.add(ids, coordinates, client) == 0
+        full = client.table_matrix(coordinates)
+    np.testing.assert_allclose(store.matrix(ids).durations, full.durations, rtol=1e-5, atol=0.1)
+
+
+def test_concurrent_adds_keep_store_consistent(tmp_path, stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points)
+    ids = coordinate_ids(coordinates)
+    with OSRMClient(stub_url) as client:
+        store = MatrixStore(str(tmp_path), capacity=2)
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda i: store.add(ids[i:i + 5], coordinates[i:i + 5], client), range(0, 60, 5)))
+        full = client.table_matrix(coordinates)
+    assert len(store) == 60
+    np.testing.assert_allclose(store.matrix(ids).durations, full.durations, rtol=1e-5, atol=0.1)
+
+    reopened = MatrixStore(str(tmp_path), readonly=True)
+    np.testing.assert_array_equal(reopened.matrix(ids).durations, store.matrix(ids).durations)
+
+
+def test_sequenced_clusters_share_store_across_workers(tmp_path, stub_url, kl_points):
+    clusters = np.array_split(kl_points, 12)
+    with OSRMClient(stub_url) as client:
+        store = MatrixStore(str(tmp_path), capacity=16)
+        report = optimize_clusters(clusters, client, sequence=True, matrix_store=store, max_workers=8)
+    assert report.ok, report.failures
+    assert len(report.routes) == 12
+    assert store.durations.shape == (60, 60)
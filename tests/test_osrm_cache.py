@@ -0,0 +1,42 @@
+import time
+
+import numpy as np
+import pytest
+
+from experiment.notebooks.osrm_cache import ResponseCache
+
+COORDS = np.array([[101.6, 3.1], [101.7, 3.2]])
+
+
+def test_nearby_coordinates_share_a_key():
+    cache = ResponseCache(precision=5)
+    assert cache.key("route", "driving", COORDS) == cache.key("route", "driving", COORDS + 1e-7)
+    assert cache.key("route", "driving", COORDS) != cache.key("route", "driving", COORDS + 1e-4)
+    assert cache.key("route", "driving", COORDS) != cache.key("route", "driving", COORDS, {"steps": "true"})
+
+
+def test_lru_eviction_and_ttl():
+    cache = ResponseCache(max_entries=2, ttl=0.05)
+    for key in "abc":
+        cache.put(key, {"key": key})
+    assert cache.get("a") is None
+    assert cache.get("c") == {"key": "c"}
+    time.sleep(0.1)
+    assert cache.get("c") is None
+    stats = cache.stats()
+    assert (stats.evictions, stats.expirations) == (1, 1)
+
+
+def test_disk_store_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path=path)
+    cache.put("k", {"routes": [1, 2]})
+    cache.close()
+    reopened = ResponseCache(path=path)
+    assert reopened.get("k") == {"routes": [1, 2]}
+    assert reopened.stats().disk_hits == 1
+
+
+def test_rejects_empty_memory():
+    with pytest.raises(ValueError):
+        ResponseCache(max_entries=0)
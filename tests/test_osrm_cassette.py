@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from experiment.notebooks.osrm import CoordinateArray, OSRMClient
+from experiment.notebooks.osrm_cache import ResponseCache
+from experiment.notebooks.osrm_cassette import Cassette, CassetteMiss
+
+
+def test_replay_matches_recording(tmp_path, stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points[:5])
+    with OSRMClient(stub_url, cassette=Cassette(str(tmp_path / "run.db"), mode="record")) as client:
+        recorded = client.route(coordinates)
+    with OSRMClient("http://127.0.0.1:9", cassette=Cassette(str(tmp_path / "run.db"))) as client:
+        assert client.route(coordinates) == recorded
+        with pytest.raises(CassetteMiss):
+            client.route(coordinates[:2])
+
+
+def test_recording_with_warm_cache_is_complete(tmp_path, stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points[:5])
+    cache = ResponseCache(path=str(tmp_path / "cache.db"))
+    with OSRMClient(stub_url, cache=cache) as client:
+        client.route(coordinates)
+        client.table_matrix(coordinates)
+
+    cassette = Cassette(str(tmp_path / "run.db"), mode="record")
+    with OSRMClient(stub_url, cache=cache, cassette=cassette) as client:
+        route = client.route(coordinates)
+        table = client.table_matrix(coordinates)
+    assert cassette.stats().size == 2
+
+    with OSRMClient("http://127.0.0.1:9", cassette=Cassette(str(tmp_path / "run.db"))) as client:
+        assert client.route(coordinates) == route
+        np.testing.assert_array_equal(client.table_matrix(coordinates).durations, table.durations)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from experiment.notebooks import osrm_json
+from experiment.notebooks.osrm import AsyncOSRMClient, CoordinateArray, OSRMClient, OSRMRequestError, RouteBatchAnalyzer
+from experiment.notebooks.osrm_cache import ResponseCache
+from experiment.notebooks.osrm_hints import HintStore
+from experiment.notebooks.osrm_metrics import ClientMetrics
+
+
+def test_client_reuses_one_session(stub_url, kl_points):
+    with OSRMClient(stub_url) as client:
+        session = client.session
+        client.route(CoordinateArray.from_latlon(kl_points[:3]))
+        client.route(CoordinateArray.from_latlon(kl_points[3:6]))
+        assert client.session is session
+
+
+def test_async_client_matches_sync_client(stub_url, kl_points):
+    routes = [CoordinateArray.from_latlon(kl_points[i:i + 3]) for i in range(0, 15, 3)]
+
+    async def run():
+        async with AsyncOSRMClient(stub_url, max_concurrency=4) as client:
+            return await asyncio.gather(*(client.route(coordinates) for coordinates in routes))
+
+    with OSRMClient(stub_url) as client:
+        expected = [client.route(coordinates) for coordinates in routes]
+    assert asyncio.run(run()) == expected
+
+
+def test_async_call_key_hashes_array_contents():
+    timestamps = np.arange(5000)
+    changed = timestamps.copy()
+    changed[2500] += 1
+    assert repr(timestamps) == repr(changed)
+    key = AsyncOSRMClient._call_key
+    assert key(OSRMClient.match, (), {"timestamps": timestamps}) != key(OSRMClient.match, (), {"timestamps": changed})
+    assert key(OSRMClient.match, (), {"timestamps": timestamps}) == key(OSRMClient.match, (), {"timestamps": timestamps.copy()})
+    assert key(OSRMClient.match, (), {"timestamps": timestamps}) != key(OSRMClient.match, (), {"timestamps": timestamps.astype(float)})
+
+
+def test_tiled_table_matrix_matches_single_table(stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points[:30])
+    with OSRMClient(stub_url) as client:
+        tiled = client.table_matrix(coordinates, tile_size=7)
+        response = client.table(coordinates, annotations=("duration", "distance"))
+    np.testing.assert_allclose(tiled.durations, np.array(response["durations"]), atol=0.1)
+    np.testing.assert_allclose(tiled.distances, np.array(response["distances"]), atol=0.1)
+
+
+def test_sources_and_destinations_select_blocks(stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points[:12])
+    with OSRMClient(stub_url) as client:
+        full = client.table_matrix(coordinates)
+        block = client.table_matrix(coordinates, sources=[1, 4], destinations=[0, 5, 9], tile_size=2)
+    np.testing.assert_array_equal(block.durations, full.durations[np.ix_([1, 4], [0, 5, 9])])
+
+
+def test_cache_serves_repeated_requests(stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points[:4])
+    cache = ResponseCache()
+    with OSRMClient(stub_url, cache=cache) as client:
+        first = client.route(coordinates)
+        second = client.route(coordinates)
+    assert second == first
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+
+
+def test_long_requests_use_polyline_paths(stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points)
+    with OSRMClient(stub_url, polyline_threshold=10) as encoded, OSRMClient(stub_url, polyline_threshold=None) as plain:
+        np.testing.assert_allclose(
+            encoded.table_matrix(coordinates).durations, plain.table_matrix(coordinates).durations, atol=0.5
+        )
+
+
+def test_batch_analyzer_totals(stub_url, kl_points):
+    with OSRMClient(stub_url) as client:
+        responses = [client.route(CoordinateArray.from_latlon(kl_points[i:i + 3])) for i in range(0, 12, 3)]
+    batch = RouteBatchAnalyzer(responses)
+    expected = [response["routes"][0]["distance"] / 1000 for response in responses]
+    np.testing.assert_allclose(batch.distances(), expected)
+
+
+def test_concurrent_identical_requests_are_coalesced(make_stub, kl_points):
+    url = make_stub(latency=0.2)
+    coordinates = CoordinateArray.from_latlon(kl_points[:3])
+    with OSRMClient(url) as client:
+        threads = [threading.Thread(target=client.route, args=(coordinates,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = client.coalescing_stats()
+    assert stats.requests == 5
+    assert stats.coalesced >= 1
+
+
+def test_snapped_locations_reuse_hints(stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points[:5])
+    hints = HintStore()
+    with OSRMClient(stub_url, hints=hints) as client:
+        client.snap(coordinates)
+        client.snap(coordinates)
+        route = client.route(coordinates)
+    assert route["code"] == "Ok"
+    assert hints.stats().size == 5
+    assert hints.stats().hits >= 5
+
+
+def test_failover_to_healthy_backend(stub_url, kl_points):
+    coordinates = CoordinateArray.from_latlon(kl_points[:3])
+    with OSRMClient([stub_url, "http://127.0.0.1:9"], timeout=2) as client:
+        for _ in range(6):
+            assert client.route(coordinates)["code"] == "Ok"
+        stats = {backend.url: backend for backend in client.backends.stats()}
+    assert stats[stub_url].requests >= 6
+
+
+def test_server_errors_are_transient(make_stub, kl_points):
+    url = make_stub(error_rate=1.0)
+    with OSRMClient(url) as client, pytest.raises(OSRMRequestError) as error:
+        client.route(CoordinateArray.from_latlon(kl_points[:2]))
+    assert error.value.status_code == 500
+    assert error.value.transient
+
+
+def test_metrics_count_requests_and_cache(stub_url, kl_points, tmp_path):
+    metrics = ClientMetrics()
+    coordinates = CoordinateArray.from_latlon(kl_points[:4])
+    with OSRMClient(stub_url, cache=ResponseCache(), metrics=metrics) as client:
+        client.route(coordinates)
+        client.route(coordinates)
+    snapshot = metrics.snapshot()
+    (route,) = [series for series in snapshot["requests"] if series["service"] == "route"]
+    assert route["requests"] == 1
+    assert route["coordinates"] == 4
+    assert snapshot["cache"]["route"] == {"hits": 1, "misses": 1}
+    metrics.dump(str(tmp_path / "metrics.json"))
+    assert json.loads((tmp_path / "metrics.json").read_text()) == snapshot
+
+
+def test_failed_stream_decoding_releases_the_connection(stub_url, kl_points, monkeypatch):
+    def broken(chunks, shape):
+        raise ValueError("bad grid")
+
+    monkeypatch.setattr(osrm_json, "parse_table_stream", broken)
+    coordinates = CoordinateArray.from_latlon(kl_points[:4])
+    errors = []
+
+    def run():
+        with OSRMClient(stub_url, pool_size=1) as client:
+            for _ in range(3):
+                try:
+                    client.table_matrix(coordinates)
+                except ValueError as e:
+                    errors.append(e)
+
+    # A leaked connection would block the next request on the exhausted pool
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert len(errors) == 3
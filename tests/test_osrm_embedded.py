@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import dijkstra
+
+from experiment.notebooks.osrm import CoordinateArray, OSRMRequestError
+from experiment.notebooks.osrm_embedded import EmbeddedRouter, RoadGraph, _speed
+
+OSM = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="3.1000" lon="101.6000"/>
+  <node id="2" lat="3.1000" lon="101.6010"/>
+  <node id="3" lat="3.1000" lon="101.6020"/>
+  <node id="4" lat="3.1000" lon="101.6030"/>
+  <node id="5" lat="3.1000" lon="101.6040"/>
+  <node id="6" lat="3.1000" lon="101.6050">
+    <tag k="barrier" v="gate"/>
+    <tag k="access" v="private"/>
+  </node>
+  <way id="10">
+    <nd ref="1"/><nd ref="2"/><nd ref="3"/><nd ref="4"/><nd ref="5"/><nd ref="6"/>
+    <tag k="highway" v="residential"/>
+  </way>
+</osm>
+"""
+
+
+def test_node_tags_do_not_leak_into_next_way(tmp_path):
+    path = tmp_path / "gate.osm"
+    path.write_text(OSM)
+    graph = RoadGraph.from_osm(str(path), n_landmarks=2)
+    assert graph.n_nodes == 6
+    assert graph.n_edges == 10
+
+
+def test_route_and_table_agree(tmp_path):
+    path = tmp_path / "gate.osm"
+    path.write_text(OSM)
+    router = EmbeddedRouter.from_osm(str(path), n_landmarks=2)
+    coordinates = CoordinateArray(np.array([[101.6001, 3.1001], [101.6049, 3.0999], [101.6021, 3.1]]))
+    route = router.route(coordinates[:2])
+    table = router.table_matrix(coordinates)
+    assert abs(route["routes"][0]["duration"] - table.durations[0, 1]) < 0.1
+    np.testing.assert_allclose(np.diag(table.durations), 0)
+
+
+def test_snap_matches_brute_force_nearest_node():
+    rng = np.random.default_rng(0)
+    n = 400
+    coordinates = np.column_stack((101.6 + rng.random(n) / 10, 3.0 + rng.random(n) / 10))
+    sources = np.arange(n)
+    targets = (sources + 1) % n
+    lengths = np.full(n, 100.0)
+    graph = RoadGraph.from_edges(
+        coordinates, np.r_[sources, targets], np.r_[targets, sources], np.r_[lengths, lengths] / 10, np.r_[lengths, lengths], 2
+    )
+    router = EmbeddedRouter(graph)
+    queries = np.column_stack((101.6 + rng.random(50) / 10, 3.0 + rng.random(50) / 10))
+    nodes, distances = router.snap(CoordinateArray(queries))
+
+    lon1, lat1 = np.radians(queries).T[:, :, None]
+    lon2, lat2 = np.radians(coordinates).T[:, None, :]
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    np.testing.assert_array_equal(nodes, np.argmin(h, axis=1))
+    assert np.all(distances >= 0)
+
+
+def _grid_graph(side, seed=0):
+    ids = np.arange(side * side).reshape(side, side)
+    lon, lat = np.meshgrid(101.6 + np.arange(side) / 1000, 3.0 + np.arange(side) / 1000)
+    horizontal = np.column_stack((ids[:, :-1].ravel(), ids[:, 1:].ravel()))
+    vertical = np.column_stack((ids[:-1].ravel(), ids[1:].ravel()))
+    edges = np.vstack((horizontal, vertical, horizontal[:, ::-1], vertical[:, ::-1]))
+    durations = 5 + 5 * np.random.default_rng(seed).random(len(edges))
+    return RoadGraph.from_edges(
+        np.column_stack((lon.ravel(), lat.ravel())), edges[:, 0], edges[:, 1], durations, 10 * durations, 4
+    )
+
+
+def test_shortest_path_matches_dijkstra():
+    graph = _grid_graph(40)
+    router = EmbeddedRouter(graph)
+    rng = np.random.default_rng(1)
+    sources, targets = rng.integers(graph.n_nodes, size=(2, 20))
+    expected = dijkstra(graph.matrix(), indices=sources)[np.arange(20), targets]
+    for source, target, duration in zip(sources.tolist(), targets.tolist(), expected):
+        path = router.shortest_path(source, target)
+        assert path[0] == source and path[-1] == target
+        assert graph.durations[graph.edge_ids(path[:-1], path[1:])].sum() == pytest.approx(duration)
+
+
+def test_route_errors_raise_like_the_http_client(monkeypatch):
+    router = EmbeddedRouter(_grid_graph(5))
+    coordinates = CoordinateArray(router.graph.coordinates[[0, 24]])
+    with pytest.raises(OSRMRequestError) as error:
+        router.route(coordinates[:1])
+    assert error.value.status_code == 400
+
+    monkeypatch.setattr(router, "shortest_path", lambda source, target: None)
+    with pytest.raises(OSRMRequestError, match="NoRoute") as error:
+        router.route(coordinates)
+    assert not error.value.transient
+
+
+@pytest.mark.parametrize("maxspeed, expected", [
+    ("50", 50.0),
+    ("30 mph", 30 * 1.609344),
+    ("0", 25.0),
+    ("-20", 25.0),
+    ("nan", 25.0),
+    ("signals", 25.0),
+])
+def test_speed_falls_back_on_invalid_maxspeed(maxspeed, expected):
+    assert _speed({"highway": "residential", "maxspeed": maxspeed}) == pytest.approx(expected)
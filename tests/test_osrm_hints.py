@@ -0,0 +1,51 @@
+import numpy as np
+
+from experiment.notebooks import osrm_hints
+from experiment.notebooks.osrm import CoordinateArray, OSRMClient, OSRMRequestError
+from experiment.notebooks.osrm_hints import HintStore, processed_map_version
+
+
+def test_map_version_defaults_to_processed_map(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "osrm-data").mkdir()
+    (tmp_path / "osrm-data" / "malaysia-singapore-brunei-latest.osrm").write_bytes(b"v1")
+    path = str(tmp_path / "hints.sqlite")
+    store = HintStore(path)
+    assert store.map_version == processed_map_version() != ""
+    store.put_many("driving", np.array([[101.6, 3.1]]), ["hint"], np.array([[101.6, 3.1]]))
+    store.close()
+
+    (tmp_path / "osrm-data" / "malaysia-singapore-brunei-latest.osrm").write_bytes(b"version 2")
+    assert HintStore(path).stats().size == 0
+
+
+def test_failures_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(osrm_hints.time, "monotonic", lambda: now[0])
+    store = HintStore(map_version="test", failure_ttl=60)
+    coordinates = np.array([[101.6, 3.1], [101.7, 3.2]])
+    store.put_failures("driving", coordinates[:1])
+    assert store.failed("driving", coordinates) == [True, False]
+    assert store.failed("walking", coordinates) == [False, False]
+    now[0] += 61
+    assert store.failed("driving", coordinates) == [False, False]
+
+
+def test_snap_skips_locations_that_recently_failed(stub_url, kl_points, monkeypatch):
+    coordinates = CoordinateArray.from_latlon(kl_points[:1])
+    calls = []
+
+    def nearest(self, coordinate, *, profile):
+        calls.append(coordinate)
+        if len(calls) == 1:
+            raise OSRMRequestError("OSRM API request failed: 503", 503)
+        return {"code": "Ok", "waypoints": []}
+
+    monkeypatch.setattr(OSRMClient, "nearest", nearest)
+    with OSRMClient(stub_url, hints=HintStore(map_version="test")) as client:
+        client.snap(coordinates)
+        client.snap(coordinates)
+        snapped = client.snap(coordinates)
+    # The transient error is retried; the empty answer is not
+    assert len(calls) == 2
+    assert np.isnan(snapped.data).all()
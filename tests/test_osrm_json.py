@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pytest
+
+from experiment.notebooks.osrm_json import TableStreamParser, parse_table_stream
+
+
+def _table_body(durations, distances=None):
+    document = {"code": "Ok", "durations": durations, "destinations": [{"location": [101.7, 3.1]}]}
+    if distances is not None:
+        document["distances"] = distances
+    return json.dumps(document).encode()
+
+
+def _chunks(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def test_any_chunk_boundary_gives_the_same_grids():
+    rng = np.random.default_rng(0)
+    durations = (rng.random((4, 3)) * 1000).round(1)
+    distances = (rng.random((4, 3)) * 10000).round(1)
+    body = _table_body(durations.tolist(), distances.tolist())
+    for size in (1, 2, 3, 7, 11, 64, len(body)):
+        result = parse_table_stream(_chunks(body, size), (4, 3))
+        assert result["code"] == "Ok"
+        np.testing.assert_array_equal(result["durations"], durations)
+        np.testing.assert_array_equal(result["distances"], distances)
+
+
+def test_null_cells_become_nan():
+    body = _table_body([[0, None], [None, 0]])
+    for size in (1, 3, len(body)):
+        result = parse_table_stream(_chunks(body, size), (2, 2))
+        np.testing.assert_array_equal(result["durations"], [[0, np.nan], [np.nan, 0]])
+    assert "distances" not in result
+
+
+@pytest.mark.parametrize("durations, message", [
+    ([[0, 1, 2], [3, 4, 5]], "cells"),
+    ([[0, 1]], "rows"),
+    ([[0, 1], [2, 3], [4, 5]], "more than 2 rows"),
+])
+def test_shape_mismatch_raises(durations, message):
+    with pytest.raises(ValueError, match=message):
+        parse_table_stream(_chunks(_table_body(durations), 5), (2, 2))
+
+
+def test_truncated_stream_raises_on_close():
+    body = _table_body([[0, 1], [2, 3]])
+    parser = TableStreamParser(2, 2)
+    parser.feed(body[:body.index(b"[2")])
+    with pytest.raises(ValueError, match="ended inside a grid"):
+        parser.close()
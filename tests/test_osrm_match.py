@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from experiment.notebooks.osrm import CoordinateArray, OSRMClient
+
+
+def _trace(n: int) -> CoordinateArray:
+    t = np.linspace(0, 1, n)
+    return CoordinateArray(np.column_stack((101.6 + 0.1 * t, 3.1 + 0.02 * np.sin(6 * t))))
+
+
+def test_windowed_match_equals_single_match(stub_url):
+    trace = _trace(45)
+    with OSRMClient(stub_url, polyline_threshold=None) as client:
+        whole = client.match_trace(trace, window=100)
+        windowed = client.match_trace(trace, window=12, overlap=4)
+    assert windowed.gaps == 0
+    assert windowed.duration == pytest.approx(whole.duration)
+    assert windowed.distance == pytest.approx(whole.distance)
+    np.testing.assert_allclose(windowed.coordinates.data, whole.coordinates.data)
+
+
+def test_short_trace_is_one_request(stub_url):
+    trace = _trace(5)
+    with OSRMClient(stub_url) as client:
+        matched = client.match_trace(trace)
+        response = client.match(trace)
+    assert matched.duration == pytest.approx(response["matchings"][0]["duration"])
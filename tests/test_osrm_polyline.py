@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from experiment.notebooks.osrm_polyline import decode_array, encode_array
+
+# Reference encoder from the optional osrm and map groups
+polyline = pytest.importorskip("polyline")
+
+
+@pytest.mark.parametrize("precision", [5, 6])
+def test_encode_matches_reference_encoder(precision):
+    rng = np.random.default_rng(0)
+    lonlat = np.column_stack((-180 + 360 * rng.random(200), -90 + 180 * rng.random(200)))
+    expected = polyline.encode([(lat, lon) for lon, lat in lonlat.tolist()], precision)
+    assert encode_array(lonlat, precision) == expected
+    np.testing.assert_allclose(decode_array(expected, precision), lonlat, atol=10 ** -precision)
+
+
+def test_encode_rounds_ties_away_from_zero():
+    lonlat = np.array([[101.6, 80.148725], [-101.6, -80.148725], [0.000025, -0.000035]])
+    expected = polyline.encode([(lat, lon) for lon, lat in lonlat.tolist()], 5)
+    assert encode_array(lonlat, 5) == expected
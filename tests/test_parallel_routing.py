@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+
+from experiment.notebooks.osrm import OSRMClient
+from experiment.route_optimizer import optimize_clusters
+
+
+def _clusters(kl_points, n=12):
+    return np.array_split(kl_points, n)
+
+
+def test_parallel_routes_match_sequential_in_cluster_order(make_stub, kl_points):
+    url = make_stub(latency=0.02, jitter=0.05)
+    with OSRMClient(url) as client:
+        sequential = optimize_clusters(_clusters(kl_points), client, max_workers=1)
+        parallel = optimize_clusters(_clusters(kl_points), client, max_workers=6)
+    assert sequential.ok and parallel.ok
+    assert parallel.routes == sequential.routes
+
+
+def test_transient_errors_are_retried(make_stub, kl_points):
+    url = make_stub(error_rate=0.4)
+    with OSRMClient(url) as client:
+        without = optimize_clusters(_clusters(kl_points), client, retries=0)
+        with_retries = optimize_clusters(_clusters(kl_points), client, retries=8, backoff=0.001)
+    assert without.failures
+    assert with_retries.ok
+
+
+def test_failures_are_reported_with_attempts(stub_url, kl_points):
+    clusters = [kl_points[:3], kl_points[3:4], kl_points[4:7]]
+    with OSRMClient(stub_url) as client:
+        report = optimize_clusters(clusters, client)
+    assert [route is None for route in report.routes] == [False, True, False]
+    (failure,) = report.failures
+    assert (failure.index, failure.attempts) == (1, 1)
+    assert isinstance(failure.error, ValueError)
+
+
+def test_slow_clusters_time_out(make_stub, kl_points):
+    url = make_stub(latency=1.0)
+    with OSRMClient(url) as client:
+        start = time.monotonic()
+        report = optimize_clusters(_clusters(kl_points, 3), client, max_workers=3, timeout=0.2)
+        elapsed = time.monotonic() - start
+    assert elapsed < 0.9
+    assert [type(failure.error) for failure in report.failures] == [TimeoutError] * 3
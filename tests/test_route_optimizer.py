@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from experiment.route_optimizer import (
+    SpatialIndex,
+    as_latlon_array,
+    cluster_destinations,
+    haversine_distance,
+    haversine_one_to_many,
+    haversine_pairwise,
+    haversine_rowwise,
+)
+
+
+@pytest.mark.parametrize("offset", [1e-7, 1e-6, 1e-5, 1e-4, 1e-2, 1.0, 30.0])
+def test_haversine_kernels_match_scalar_at_every_range(offset):
+    a = np.array([[3.1, 101.6], [-33.9, 151.2], [60.0, -10.0]])
+    b = a + [offset, offset / 2]
+    expected = np.array([haversine_distance(*p, *q) for p, q in zip(a, b)])
+    np.testing.assert_allclose(haversine_rowwise(a, b), expected, rtol=1e-6)
+    np.testing.assert_allclose(np.diag(haversine_pairwise(a, b)), expected, rtol=1e-6)
+    np.testing.assert_allclose(haversine_one_to_many(tuple(a[0]), b)[0], expected[0], rtol=1e-6)
+
+
+def test_haversine_of_identical_points_is_zero(kl_points):
+    assert np.all(haversine_rowwise(kl_points, kl_points) == 0)
+    assert np.all(np.diag(haversine_pairwise(kl_points)) == 0)
+
+
+@pytest.mark.parametrize("method", ["balanced", "kmedoids"])
+def test_capacity_constrained_clusters_respect_cap(method, kl_points):
+    durations = None
+    if method == "kmedoids":
+        durations = haversine_pairwise(kl_points) * 90
+    clusters = cluster_destinations(kl_points, max_cluster_size=7, method=method, durations=durations)
+    assert max(len(cluster) for cluster in clusters) <= 7
+    together = np.concatenate([as_latlon_array(cluster) for cluster in clusters])
+    assert sorted(map(tuple, together.tolist())) == sorted(map(tuple, kl_points.tolist()))
+
+
+def test_kmedoids_requires_durations(kl_points):
+    with pytest.raises(ValueError):
+        cluster_destinations(kl_points, method="kmedoids")
+
+
+def test_spatial_index_matches_pairwise_distances(kl_points):
+    index = SpatialIndex(kl_points)
+    distances, indices = index.query(kl_points[:5], k=3)
+    full = haversine_pairwise(kl_points[:5], kl_points)
+    np.testing.assert_allclose(distances, np.sort(full, axis=1)[:, :3], atol=1e-9)
+    within = index.query_radius(kl_points[:5], 2.0)
+    for row, found in zip(full, within):
+        assert sorted(found.tolist()) == np.flatnonzero(row <= 2.0).tolist()
@@ -0,0 +1,48 @@
+import io
+import json
+import time
+
+import numpy as np
+
+from experiment.notebooks.osrm import OSRMClient
+from experiment.route_optimizer import (
+    RouteOptimizationReport,
+    iter_optimized_clusters,
+    iter_route_optimization,
+    process_route_optimization,
+    write_ndjson,
+)
+
+CSV = "experiment/notebooks/malaysia_random_points.csv"
+
+
+def test_stream_is_bounded_by_max_pending(stub_url, kl_points, monkeypatch):
+    import experiment.route_optimizer as route_optimizer
+
+    calls = []
+    original = route_optimizer.optimize_route
+    monkeypatch.setattr(route_optimizer, "optimize_route", lambda *a, **k: calls.append(1) or original(*a, **k))
+    with OSRMClient(stub_url) as client:
+        results = iter_optimized_clusters(np.array_split(kl_points, 12), client, max_workers=2, max_pending=3)
+        next(results)
+        time.sleep(0.3)
+        assert len(calls) <= 3
+        remaining = list(results)
+    assert [result.index for result in remaining] == list(range(1, 12))
+
+
+def test_unordered_stream_collects_to_the_same_report(stub_url):
+    ordered = process_route_optimization(CSV, osrm_url=stub_url, return_report=True)
+    results = list(iter_route_optimization(CSV, osrm_url=stub_url, max_workers=4, ordered=False))
+    assert sorted(result.index for result in results) == list(range(len(ordered.routes)))
+    assert RouteOptimizationReport.from_results(results).routes == ordered.routes
+
+
+def test_ndjson_has_one_line_per_cluster(stub_url):
+    routes = process_route_optimization(CSV, osrm_url=stub_url)
+    output = io.StringIO()
+    routed, failed = write_ndjson(iter_route_optimization(CSV, osrm_url=stub_url, max_workers=4), output)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert (routed, failed) == (len(routes), 0)
+    assert [record["cluster"] for record in records] == list(range(len(routes)))
+    assert [record["route"] for record in records] == routes
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import requests
+
+from experiment.notebooks.osrm_polyline import encode_array
+from scripts.osrm.stub_server import StubError, StubOSRM
+
+
+def test_route_duration_follows_speed_and_circuity():
+    stub = StubOSRM(circuity=1.5, speed_kmh=36.0)
+    response = stub.handle("/route/v1/driving/101.6,3.1;101.7,3.1;101.7,3.2")
+    route = response["routes"][0]
+    assert response["code"] == "Ok"
+    assert len(route["legs"]) == 2
+    assert route["duration"] == pytest.approx(route["distance"] / 10.0)
+    assert route["distance"] == pytest.approx(1.5 * 2 * 11119.5, rel=1e-3)
+
+
+def test_table_is_symmetric_with_zero_diagonal():
+    stub = StubOSRM()
+    durations = np.array(stub.handle("/table/v1/driving/101.6,3.1;101.7,3.1;101.7,3.2")["durations"])
+    np.testing.assert_allclose(durations, durations.T)
+    np.testing.assert_array_equal(np.diag(durations), 0)
+
+
+def test_polyline_paths_parse_like_plain_coordinates():
+    coords = np.array([[101.61, 3.11], [101.72, 3.15], [101.65, 3.2]])
+    stub = StubOSRM()
+    plain = stub.handle("/table/v1/driving/" + ";".join(f"{lon},{lat}" for lon, lat in coords))
+    encoded = stub.handle(f"/table/v1/driving/polyline6({encode_array(coords, 6)})")
+    np.testing.assert_allclose(encoded["durations"], plain["durations"], atol=1e-3)
+
+
+@pytest.mark.parametrize("path, code", [
+    ("/route/v1/driving/101.6,3.1", "InvalidQuery"),
+    ("/route/v1/driving/101.6,95;101.7,3.1", "InvalidValue"),
+    ("/isochrone/v1/driving/101.6,3.1", "InvalidService"),
+])
+def test_rejects_what_osrm_rejects(path, code):
+    with pytest.raises(StubError) as error:
+        StubOSRM().handle(path)
+    assert error.value.code == code
+
+
+def test_http_errors_and_injected_failures(stub_url, make_stub):
+    assert requests.get(f"{stub_url}/route/v1/driving/101.6,3.1").status_code == 400
+    failing = make_stub(error_rate=1.0)
+    assert requests.get(f"{failing}/route/v1/driving/101.6,3.1;101.7,3.1").status_code == 500
@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from experiment.notebooks.osrm import OSRMClient
+from experiment.route_optimizer import optimize_route
+from experiment.tsp import solve_tsp, tour_cost
+
+
+def _brute_force(durations, start, end):
+    n = len(durations)
+    middle = [i for i in range(n) if i not in (start, end)]
+    best = np.inf
+    for perm in itertools.permutations(middle):
+        if end is None:
+            order = [start, *perm]
+        else:
+            order = [start, *perm, end]
+        best = min(best, tour_cost(durations, np.array(order)))
+    return best
+
+
+@pytest.fixture
+def asymmetric():
+    rng = np.random.default_rng(0)
+    points = rng.random((8, 2)) * 1000
+    durations = np.linalg.norm(points[:, None] - points[None], axis=2)
+    return durations * rng.uniform(1.0, 1.3, durations.shape)
+
+
+def test_open_path_is_near_optimal(asymmetric):
+    tour = solve_tsp(asymmetric, start=0)
+    assert sorted(tour.order.tolist()) == list(range(8))
+    assert tour.order[0] == 0
+    assert tour.cost <= 1.05 * _brute_force(asymmetric, 0, None)
+
+
+def test_fixed_end_and_round_trip(asymmetric):
+    path = solve_tsp(asymmetric, start=2, end=5)
+    assert (path.order[0], path.order[-1]) == (2, 5)
+    assert path.cost <= 1.05 * _brute_force(asymmetric, 2, 5)
+
+    trip = solve_tsp(asymmetric, start=3, end=3)
+    assert (trip.order[0], trip.order[-1], len(trip.order)) == (3, 3, 9)
+    assert trip.cost == pytest.approx(tour_cost(asymmetric, trip.order))
+
+
+def test_unreachable_pairs_are_avoided():
+    durations = np.array([[0, 1, np.nan], [1, 0, 1], [np.nan, 1, 0]], dtype=float)
+    tour = solve_tsp(durations, start=0)
+    assert tour.order.tolist() == [0, 1, 2]
+    assert tour.cost == 2
+
+
+def test_optimize_route_keeps_the_start_and_end_fixed(stub_url, kl_points):
+    points = kl_points[:12]
+    with OSRMClient(stub_url) as client:
+        route = optimize_route(points, client=client, sequence=True, end=5)
+        with pytest.raises(ValueError, match="roundtrip and end"):
+            optimize_route(points, client=client, sequence=True, roundtrip=True, end=5)
+    visited = np.array([waypoint["location"][::-1] for waypoint in route["waypoints"]])
+    assert len(visited) == 12
+    np.testing.assert_allclose(visited[0], points[0], atol=1e-6)
+    np.testing.assert_allclose(visited[-1], points[5], atol=1e-6)